@@ -16,6 +16,9 @@ fi
 echo "✅ Installing project dependencies with uv"
 uv sync
 
+echo "✅ Precomputing nearest stops per cell (assets/vbb_nearby.bin)"
+uv run python scripts/build_nearby_table.py
+
 service_name=$(uv run config --project-name)
 service_port=$(uv run config --flask-port)
 
@@ -0,0 +1,54 @@
+"""Benchmark the `vbb_decoder` options on the raw bytes of a hub-sized departures response.
+
+Decodes the payload from bench_parse_departures.py (serialised as VBB sends it) with each decoder,
+eagerly and (pydantic only) as lazy views, then reads the fields `quadrants.filter_and_group` uses. "json" is
+`json.loads` plus the dict walk; "pydantic" validates against `vbb_schema` in one pass first:
+    python scripts/bench_decode_departures.py
+    python scripts/bench_decode_departures.py --copies 100
+"""
+
+import argparse
+import json
+import statistics
+import time
+from unittest.mock import patch
+
+from bench_parse_departures import _read_quadrant_fields
+from bench_parse_departures import hub_payload
+
+from src.vbb_api import decode_departures
+from src.vbb_api import pydantic_departures_decoder
+
+
+def _decode_ms(body: bytes, repeats: int) -> tuple[float, float]:
+    """(median, min) milliseconds to decode `body` and read the quadrant fields."""
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _read_quadrant_fields(decode_departures(body))
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs), min(runs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=25, help="Times the recording is repeated as new trips")
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+
+    body = json.dumps(hub_payload(args.copies)).encode()
+    start = time.perf_counter()
+    pydantic_departures_decoder.get()
+    compile_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(body) / 1024:.0f} KB body, pydantic schema compiled in {compile_ms:.0f} ms (once per process)")
+    # decode_departures builds views only after pydantic validation.
+    for decoder, lazy in (("json", False), ("pydantic", False), ("pydantic", True)):
+        with patch("src.vbb_api.config", {"vbb_decoder": decoder, "lazy_departures": lazy}):
+            decode_departures(body)  # fill the flyweight registries, as a repeat poll finds them
+            median_ms, min_ms = _decode_ms(body, args.repeats)
+        label = f"{decoder}, {'lazy' if lazy else 'eager'}"
+        print(f"  {label:<16} {median_ms:7.2f} ms median   {min_ms:7.2f} ms min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark the columnar departure paths against the per-departure loops on a hub-sized feed.
+
+Uses `bench_parse_departures.hub_payload` (the recording repeated `--copies` times as distinct
+trips) and the display quadrants from config.json. For the display the table is built once per
+feed snapshot, so "table, per request" is the steady-state cost and "incl. build" the first request
+after a refresh; the dashboard builds a table per station fetch, so only "incl. build" applies:
+    python scripts/bench_departure_table.py
+    python scripts/bench_departure_table.py --copies 100
+"""
+
+import argparse
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from bench_parse_departures import hub_payload
+
+from src.config import load_app_config
+from src.datamodels import parse_departures
+from src.departure_table import DepartureTable
+from src.departure_table import filter_and_group_table
+from src.departure_table import process_station_table
+from src.quadrants import QuadrantRoutes
+from src.quadrants import filter_and_group
+from src.utils import process_station_departures
+
+CONFIG = Path(__file__).resolve().parent.parent / "config.json"
+
+
+def _ms(run, repeats: int) -> float:
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=25, help="Times the recording is repeated as new trips")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    departures = parse_departures(hub_payload(args.copies))
+    quadrants = load_app_config(CONFIG)["display"]["quadrants"]
+    routes = QuadrantRoutes.from_config(quadrants)
+    now = min(dep.when for dep in departures) - timedelta(minutes=2)
+    table = DepartureTable.from_departures(departures)
+    station = departures[0].stop
+
+    display = {
+        "per departure": lambda: filter_and_group(departures, now, quadrants, 5, routes=routes),
+        "table, per request": lambda: filter_and_group_table(table, now, quadrants, 5, routes=routes),
+        "table, incl. build": lambda: filter_and_group_table(
+            DepartureTable.from_departures(departures), now, quadrants, 5, routes=routes
+        ),
+    }
+    assert display["per departure"]() == display["table, per request"]()
+    with (
+        patch("src.utils.get_walk_time", return_value=4),
+        patch("src.departure_table.get_walk_time", return_value=4),
+        patch("src.utils.datetime") as mock_datetime,
+    ):
+        mock_datetime.now.return_value = now
+        dashboard = {
+            "per departure": lambda: process_station_departures(station, departures),
+            "table, incl. build": lambda: process_station_table(
+                station, DepartureTable.from_departures(departures), now=now
+            ),
+        }
+        assert dashboard["per departure"]() == dashboard["table, incl. build"]()
+
+        print(f"{len(departures)} departures, {len(table)} with coordinates")
+        for name, runs in (("display quadrants", display), ("dashboard rows", dashboard)):
+            print(name)
+            for label, run in runs.items():
+                print(f"  {label:<20} {_ms(run, args.repeats):7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
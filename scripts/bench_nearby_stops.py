@@ -0,0 +1,84 @@
+"""Micro-benchmark nearest-stop ranking on the real assets/vbb_stations.json.
+
+Compares the reference full scan (`vbb_api._rank_stops_by_distance`), the grid index alone
+(`StopGridIndex.nearest`) and the columnar NumPy table (`StopTable.nearest`, used by
+`get_nearby_stations`), and checks all three agree:
+    python scripts/bench_nearby_stops.py
+    python scripts/bench_nearby_stops.py --radius 1e9 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections.abc import Callable
+
+from src.stop_index import StopGridIndex
+from src.stop_table import StopTable
+from src.vbb_api import MAX_NEARBY_STATIONS
+from src.vbb_api import _all_stations
+from src.vbb_api import _rank_stops_by_distance
+
+# Query points are drawn from the snapshot's own bounding box.
+LAT_RANGE = (52.38, 52.68)
+LON_RANGE = (13.05, 13.65)
+
+
+def _time_per_query_us(rank: Callable[[float, float], list], points: list[tuple[float, float]], repeats: int) -> float:
+    """Median over `repeats` runs of the mean time per query, in microseconds."""
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for lat, lon in points:
+            rank(lat, lon)
+        runs.append((time.perf_counter() - start) / len(points) * 1e6)
+    return statistics.median(runs)
+
+
+def _ids_and_meters(ranked: list[tuple[float, dict]]) -> list[tuple[int, str]]:
+    return [(int(round(meters)), stop["id"]) for meters, stop in ranked]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--radius", type=float, default=1500, help="Straight-line radius in meters")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    stops = _all_stations()
+    rng = random.Random(0)
+    points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = StopGridIndex(stops)
+    index_build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    table = StopTable(stops)
+    table_build_ms = (time.perf_counter() - start) * 1000
+
+    rankers = {
+        "full scan (_rank_stops_by_distance)": lambda lat, lon: _rank_stops_by_distance(
+            stops, lat, lon, MAX_NEARBY_STATIONS, args.radius
+        ),
+        "grid index (StopGridIndex)": lambda lat, lon: index.nearest(lat, lon, MAX_NEARBY_STATIONS, args.radius),
+        "numpy table (StopTable)": lambda lat, lon: table.nearest(lat, lon, MAX_NEARBY_STATIONS, args.radius),
+    }
+
+    reference = rankers["full scan (_rank_stops_by_distance)"]
+    for name, rank in rankers.items():
+        mismatches = sum(_ids_and_meters(rank(lat, lon)) != _ids_and_meters(reference(lat, lon)) for lat, lon in points)
+        if mismatches:
+            raise SystemExit(f"{name} disagrees with the full scan on {mismatches} queries")
+
+    print(f"{len(stops)} stops, {args.queries} queries, radius {args.radius:g} m, top {MAX_NEARBY_STATIONS}")
+    print(f"build: grid index {index_build_ms:.1f} ms, numpy table {table_build_ms:.1f} ms")
+    baseline = None
+    for name, rank in rankers.items():
+        per_query = _time_per_query_us(rank, points, args.repeats)
+        baseline = baseline or per_query
+        print(f"  {name:<38} {per_query:9.1f} µs/query  ({baseline / per_query:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
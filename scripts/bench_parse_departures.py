@@ -0,0 +1,106 @@
+"""Benchmark `parse_departures` on a hub-sized payload built from the recorded departures.
+
+The recording in assets/vbb_recordings/departures is repeated `--copies` times as distinct trips
+(own tripId and fahrtNr, shifted by a minute per copy), which resembles a 30-minute window at a
+hub: few stops, lines and operators, many trips. Reports parse time and the memory blocks/bytes
+the parsed list keeps alive, for a cold parse (empty flyweight registries, the first poll) and a
+warm one (registries filled by the previous poll, the steady state). Both modes then read the
+fields `quadrants.filter_and_group` uses, which is all a lazy view decodes:
+    python scripts/bench_parse_departures.py
+    python scripts/bench_parse_departures.py --copies 100
+"""
+
+import argparse
+import copy
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+from src.datamodels import clear_flyweights
+from src.datamodels import parse_departures
+
+RECORDING = Path(__file__).resolve().parent.parent / "assets" / "vbb_recordings" / "departures" / "900110011.json"
+
+
+def _shift(timestamp: str | None, minutes: int) -> str | None:
+    if not isinstance(timestamp, str):
+        return timestamp
+    return (datetime.fromisoformat(timestamp) + timedelta(minutes=minutes)).isoformat()
+
+
+def hub_payload(copies: int) -> dict:
+    departures = json.loads(RECORDING.read_text())["payload"]["departures"]
+    scaled = []
+    for k in range(copies):
+        for departure in departures:
+            departure = copy.deepcopy(departure)
+            departure["tripId"] = f"{departure['tripId']}#{k}"
+            departure["line"]["fahrtNr"] = f"{departure['line']['fahrtNr']}-{k}"
+            departure["when"] = _shift(departure["when"], k)
+            departure["plannedWhen"] = _shift(departure["plannedWhen"], k)
+            scaled.append(departure)
+    return {"departures": scaled}
+
+
+def _read_quadrant_fields(departures: list) -> None:
+    for dep in departures:
+        dep.tripId, dep.when, dep.line.name, dep.provenance
+        dep.stop.location, dep.destination and dep.destination.location
+
+
+def _parse(payload: dict, lazy: bool) -> list:
+    departures = parse_departures(payload, lazy=lazy)
+    _read_quadrant_fields(departures)
+    return departures
+
+
+def _retained(payload: dict, lazy: bool) -> tuple[int, int]:
+    """(blocks, bytes) still allocated for one parse's result."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    departures = _parse(payload, lazy)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del departures
+    return sum(stat.count_diff for stat in stats), sum(stat.size_diff for stat in stats)
+
+
+def _parse_ms(payload: dict, repeats: int, cold: bool, lazy: bool) -> float:
+    runs = []
+    for _ in range(repeats):
+        if cold:
+            clear_flyweights()
+        start = time.perf_counter()
+        _parse(payload, lazy)
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=25, help="Times the recording is repeated as new trips")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = hub_payload(args.copies)
+    print(f"{len(payload['departures'])} departures ({args.copies} x {RECORDING.name})")
+    for mode, lazy in (("eager", False), ("lazy", True)):
+        for poll, cold in (("cold (first poll)", True), ("warm (repeat poll)", False)):
+            clear_flyweights()
+            if not cold:
+                _parse(payload, lazy)
+            blocks, size = _retained(payload, lazy)
+            parse_ms = _parse_ms(payload, args.repeats, cold, lazy)
+            label = f"{mode}, {poll}"
+            print(f"  {label:<26} {parse_ms:7.2f} ms   {blocks:7d} blocks   {size / 1024:7.1f} KB retained")
+
+
+if __name__ == "__main__":
+    main()
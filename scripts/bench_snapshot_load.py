@@ -0,0 +1,83 @@
+"""Compare cold-start cost of the JSON and the memory-mapped binary stop snapshot.
+
+Each format is loaded in a fresh interpreter, the way `vbb_api` loads it at import, and the
+script reports load time, resident-memory growth and the first nearest-stop query:
+    python scripts/bench_snapshot_load.py
+    python scripts/bench_snapshot_load.py --runs 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+JSON_PATH = ROOT / "assets" / "vbb_stations.json"
+BINARY_PATH = JSON_PATH.with_suffix(".bin")
+QUERY = (52.552045, 13.399863)
+
+
+def _rss_kb() -> int:
+    """Current resident set size from /proc (Linux, including the Pi)."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return 0
+
+
+def _child(fmt: str) -> None:
+    # Import the heavy modules first so only the snapshot itself is measured.
+    from src.stop_snapshot import BinarySnapshot
+    from src.stop_snapshot import source_digest
+    from src.stop_table import StopTable
+
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    if fmt == "json":
+        table = StopTable(json.loads(JSON_PATH.read_text(encoding="utf-8")))
+    else:
+        snapshot = BinarySnapshot(BINARY_PATH, expected_sha256=source_digest(JSON_PATH.read_bytes()))
+        table = StopTable.from_records(snapshot, snapshot.ids, snapshot.names, snapshot.records)
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_kb = _rss_kb() - rss_before
+
+    start = time.perf_counter()
+    table.nearest(*QUERY, 20, 1500)
+    query_ms = (time.perf_counter() - start) * 1000
+    print(json.dumps({"load_ms": load_ms, "rss_kb": rss_kb, "query_ms": query_ms}))
+
+
+def _measure(fmt: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", fmt], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=["json", "binary"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        sys.path.insert(0, str(ROOT))
+        _child(args.child)
+        return
+
+    if not BINARY_PATH.exists():
+        raise SystemExit(f"{BINARY_PATH} missing: run `python scripts/fetch_stations.py --binary-only`")
+    print(f"JSON {JSON_PATH.stat().st_size / 1024:.0f} KB, binary {BINARY_PATH.stat().st_size / 1024:.0f} KB")
+    print(f"median of {args.runs} fresh interpreters:")
+    for fmt in ("json", "binary"):
+        runs = [_measure(fmt) for _ in range(args.runs)]
+        load_ms = statistics.median(r["load_ms"] for r in runs)
+        rss_kb = statistics.median(r["rss_kb"] for r in runs)
+        query_ms = statistics.median(r["query_ms"] for r in runs)
+        print(f"  {fmt:<7} load {load_ms:6.1f} ms   RSS +{rss_kb / 1024:5.1f} MB   first query {query_ms:5.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
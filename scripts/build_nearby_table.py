@@ -0,0 +1,91 @@
+"""Precompute the nearest stops for every ~100 m cell of the service area.
+
+Writes assets/vbb_nearby.bin (see src/nearby_table.py) from the current stop snapshot, over the
+bounding box fetch_stations.py sweeps, with the configured `max_nearby_straightline_m`. The server
+memory-maps it and answers nearby-stop queries with one lookup; queries outside the box, or with a
+stale table, fall back to runtime ranking.
+
+Run after fetch_stations.py or after changing `max_nearby_straightline_m`:
+    python scripts/build_nearby_table.py
+Check an existing table against the exact haversine full scan (random cells, or every cell):
+    python scripts/build_nearby_table.py --verify
+    python scripts/build_nearby_table.py --verify --sample 0
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from fetch_stations import MAX_LAT
+from fetch_stations import MAX_LON
+from fetch_stations import MIN_LAT
+from fetch_stations import MIN_LON
+from fetch_stations import OUTPUT_PATH
+
+from src.nearby_table import NearbyTable
+from src.nearby_table import cell_center
+from src.nearby_table import cell_index
+from src.nearby_table import encode_nearby_table
+from src.stop_snapshot import source_digest
+from src.vbb_api import MAX_NEARBY_STATIONS
+from src.vbb_api import NEARBY_TABLE_PATH
+from src.vbb_api import _all_stations
+from src.vbb_api import _max_straightline_m
+from src.vbb_api import _rank_stops_by_distance
+from src.vbb_api import _stop_table
+
+BBOX = (MIN_LAT, MAX_LAT, MIN_LON, MAX_LON)
+
+
+def build() -> None:
+    digest = source_digest(OUTPUT_PATH.read_bytes())
+    start = time.perf_counter()
+    data = encode_nearby_table(_stop_table(), BBOX, MAX_NEARBY_STATIONS, _max_straightline_m(), digest)
+    NEARBY_TABLE_PATH.write_bytes(data)
+    table = NearbyTable(NEARBY_TABLE_PATH, expected_sha256=digest)
+    print(
+        f"Wrote {len(table)} cells for {table.stop_count} stops to {NEARBY_TABLE_PATH}"
+        f" ({len(data) / 1024:.0f} KB, {time.perf_counter() - start:.1f} s)"
+    )
+
+
+def verify(sample: int) -> None:
+    """Compare table cells with `_rank_stops_by_distance` on the snapshot; exit 1 on any mismatch."""
+    table = NearbyTable(NEARBY_TABLE_PATH, expected_sha256=source_digest(OUTPUT_PATH.read_bytes()))
+    if not table.covers(MAX_NEARBY_STATIONS, _max_straightline_m()):
+        raise SystemExit(f"{NEARBY_TABLE_PATH} was built for another limit or radius; rebuild it")
+    stops = _all_stations()
+    lats = range(cell_index(MIN_LAT), cell_index(MAX_LAT) + 1)
+    lons = range(cell_index(MIN_LON), cell_index(MAX_LON) + 1)
+    cells = [(lat, lon) for lat in lats for lon in lons]
+    if sample:
+        cells = random.Random(0).sample(cells, min(sample, len(cells)))
+
+    mismatches = 0
+    for lat_index, lon_index in cells:
+        latitude, longitude = cell_center(lat_index), cell_center(lon_index)
+        positions, meters = table.lookup(latitude, longitude, MAX_NEARBY_STATIONS)
+        expected = _rank_stops_by_distance(stops, latitude, longitude, MAX_NEARBY_STATIONS, _max_straightline_m())
+        got = [(int(m), stops[int(p)]["id"]) for p, m in zip(positions, meters)]
+        if got != [(int(round(m)), stop["id"]) for m, stop in expected]:
+            mismatches += 1
+            print(f"  mismatch at ({latitude}, {longitude})", file=sys.stderr)
+    print(f"Checked {len(cells)} of {len(table)} cells against the full scan: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verify", action="store_true", help="Check the existing table instead of building it")
+    parser.add_argument("--sample", type=int, default=5000, help="Cells to verify; 0 checks every cell")
+    args = parser.parse_args()
+    if args.verify:
+        verify(args.sample)
+    else:
+        build()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,70 @@
 """Download VBB station data and save as a local JSON snapshot.
 
-Uses GET /locations/nearby on a dense grid over Berlin–Brandenburg. The API
-returns a small number of stops per call; wide geographic coverage is required
-so North/Wedding stops (e.g. Bornholmerstraße) are not missing from the file.
+Uses GET /locations/nearby over an adaptive quadtree covering Berlin–Brandenburg. Each query
+asks for every stop within the circle around a cell; a response that hits RESULTS_PER_POINT
+may be missing stops (as happened to Bornholmer Straße with a fixed grid), so that cell is
+split into four and queried again. Empty and sparse cells cost one request. A coverage report
+lists requests and splits per depth and any cell still saturated at the minimum size.
 
-Run after changing grid constants, or when VBB adds or moves stops:
+Cells are fetched concurrently behind a token bucket (default ~90 req/min for the public
+mirror's ~100 req/min limit; raise --rate-per-min for a self-hosted instance). Each finished
+cell is appended to a checkpoint file, so an interrupted or partly failed run resumes with
+the cells still missing. The new snapshot is compared with the current one; the added,
+removed and changed stops are printed and written to vbb_stations.diff.json.
+
+Also writes assets/vbb_stations.bin, the compact memory-mapped snapshot loaded at runtime
+(see src/stop_snapshot.py). The JSON stays the human-readable source.
+
+Run after changing the bounding box or cell sizes, or when VBB adds or moves stops:
     python scripts/fetch_stations.py
+    python scripts/fetch_stations.py --workers 16 --rate-per-min 0  # self-hosted, unthrottled
+    python scripts/fetch_stations.py --dry-run  # write only the diff
+Rebuild only the binary snapshot after editing the JSON by hand:
+    python scripts/fetch_stations.py --binary-only
 """
 
+import argparse
 import json
+import math
 import sys
-import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
 from pathlib import Path
+from typing import NamedTuple
 
 import requests
 
 from src.config import VBB_API_BASE
+from src.rate_limit import TokenBucket
+from src.stop_index import haversine_meters
+from src.stop_snapshot import write_binary_snapshot
 
 OUTPUT_PATH = Path(__file__).resolve().parent.parent / "assets" / "vbb_stations.json"
+BINARY_OUTPUT_PATH = OUTPUT_PATH.with_suffix(".bin")
+CHECKPOINT_PATH = OUTPUT_PATH.with_name("vbb_stations.checkpoint.jsonl")
+DIFF_PATH = OUTPUT_PATH.with_name("vbb_stations.diff.json")
 
-# Bounding box ~greater Berlin; step ~6–7 km so each /nearby call discovers local stops.
+# Bounding box ~greater Berlin.
 MIN_LAT = 52.38
 MAX_LAT = 52.68
 MIN_LON = 13.05
 MAX_LON = 13.65
-GRID_STEP = 0.06
-# v6.vbb.transport.rest: ~100 req/min — stay under with pause between grid calls.
-REQUEST_PAUSE_S = 0.65
+# Quadtree sweep: root cells of ROOT_CELL_DEG (~13 × 8 km) are split into four while a query saturates
+# RESULTS_PER_POINT, down to MIN_CELL_DEG (~830 × 510 m).
+ROOT_CELL_DEG = 0.12
+MIN_CELL_DEG = 0.0075
+# The sweep reaches past the box: stops just outside it are still within max_nearby_straightline_m of its edge.
+SWEEP_MARGIN_DEG = 0.025
+# v6.vbb.transport.rest: ~100 req/min — stay under it by default.
+DEFAULT_RATE_PER_MIN = 90
+DEFAULT_WORKERS = 4
+# Refuse to drop more than this share of the current snapshot's stops without --force.
+MAX_REMOVED_FRACTION = 0.05
 
 RESULTS_PER_POINT = 500
 TIMEOUT = 15
@@ -34,24 +72,50 @@ TIMEOUT = 15
 _SNAPSHOT_FIELDS = frozenset({"type", "id", "name", "location", "products", "stationDHID"})
 
 
-def _grid_axis(min_v: float, max_v: float, step: float) -> list[float]:
-    """Inclusive axis from min_v to max_v in step increments (both ends on-grid)."""
-    n = int(round((max_v - min_v) / step))
-    return [round(min_v + i * step, 5) for i in range(n + 1)]
+class Cell(NamedTuple):
+    """Square sweep cell: south-west corner and edge length in degrees."""
+
+    lat: float
+    lon: float
+    size: float
+
+    @property
+    def center(self) -> tuple[float, float]:
+        return round(self.lat + self.size / 2, 6), round(self.lon + self.size / 2, 6)
+
+    @property
+    def depth(self) -> int:
+        return round(math.log2(ROOT_CELL_DEG / self.size))
 
+    def radius_m(self) -> int:
+        """Radius of a circle around the center that covers the whole cell (its southern corners are farthest)."""
+        lat, lon = self.center
+        return math.ceil(haversine_meters(lat, lon, self.lat, self.lon)) + 1
 
-def berlin_grid_anchor_points() -> list[tuple[float, float]]:
-    """Lat/lon anchors for staggered /locations/nearby calls."""
-    lats = _grid_axis(MIN_LAT, MAX_LAT, GRID_STEP)
-    lons = _grid_axis(MIN_LON, MAX_LON, GRID_STEP)
-    return [(lat, lon) for lat in lats for lon in lons]
+    def children(self) -> list["Cell"]:
+        half = self.size / 2
+        return [
+            Cell(round(self.lat + dlat, 6), round(self.lon + dlon, 6), half) for dlat in (0, half) for dlon in (0, half)
+        ]
 
 
-def fetch_nearby(lat: float, lon: float) -> list[dict]:
-    """GET /locations/nearby for one anchor point."""
+def root_cells() -> list[Cell]:
+    """ROOT_CELL_DEG cells tiling the bounding box plus SWEEP_MARGIN_DEG (the last row and column may overhang)."""
+    min_lat, min_lon = MIN_LAT - SWEEP_MARGIN_DEG, MIN_LON - SWEEP_MARGIN_DEG
+    rows = math.ceil(round((MAX_LAT + SWEEP_MARGIN_DEG - min_lat) / ROOT_CELL_DEG, 6))
+    cols = math.ceil(round((MAX_LON + SWEEP_MARGIN_DEG - min_lon) / ROOT_CELL_DEG, 6))
+    return [
+        Cell(round(min_lat + row * ROOT_CELL_DEG, 6), round(min_lon + col * ROOT_CELL_DEG, 6), ROOT_CELL_DEG)
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+
+def fetch_nearby(lat: float, lon: float, distance_m: int) -> list[dict]:
+    """GET /locations/nearby: up to RESULTS_PER_POINT stops within `distance_m` of the point."""
     resp = requests.get(
         f"{VBB_API_BASE}/locations/nearby",
-        params={"latitude": lat, "longitude": lon, "results": RESULTS_PER_POINT},
+        params={"latitude": lat, "longitude": lon, "results": RESULTS_PER_POINT, "distance": distance_m},
         timeout=TIMEOUT,
     )
     resp.raise_for_status()
@@ -68,46 +132,232 @@ def _trim_stop_for_snapshot(stop: dict) -> dict | None:
     return row
 
 
-def _collect_unique_stops() -> list[dict]:
-    """Merge grid fetches; first-seen id wins (order follows `berlin_grid_anchor_points`)."""
-    seen_ids: set[str] = set()
-    stations: list[dict] = []
-    grid = berlin_grid_anchor_points()
-    total = len(grid)
+@dataclass
+class CellResult:
+    stops: list[dict]
+    # Locations in the raw response; RESULTS_PER_POINT means the query was capped and the cell is split.
+    returned: int
+
+    @property
+    def saturated(self) -> bool:
+        return self.returned >= RESULTS_PER_POINT
+
+
+@dataclass
+class SweepStats:
+    requests: int = 0
+    resumed: int = 0
+    failed: int = 0
+    cells_by_depth: Counter = field(default_factory=Counter)
+    split_by_depth: Counter = field(default_factory=Counter)
+    empty: int = 0
+    # Saturated at MIN_CELL_DEG: stops there may still be missing.
+    unresolved: list[Cell] = field(default_factory=list)
 
-    for i, (lat, lon) in enumerate(grid):
-        print(f"[{i + 1}/{total}] Fetching near ({lat}, {lon})...")
+    def report(self) -> list[str]:
+        lines = [f"Sweep: {self.requests} requests, {self.resumed} resumed from checkpoint, {self.failed} failed"]
+        for depth in sorted(self.cells_by_depth):
+            size = ROOT_CELL_DEG / 2**depth
+            lines.append(
+                f"  depth {depth} ({size:g}°, ~{size * 111:.1f} km): {self.cells_by_depth[depth]} cells,"
+                f" {self.split_by_depth[depth]} saturated and split"
+            )
+        lines.append(f"  {self.empty} cells without stops (no further queries)")
+        lines.append(f"  {len(self.unresolved)} cells still saturated at {MIN_CELL_DEG}° (coverage may be incomplete)")
+        for cell in self.unresolved:
+            lines.append(f"    ⚠️  {cell}")
+        return lines
+
+
+def _checkpoint_header() -> dict:
+    """Identifies the sweep; a checkpoint from a different sweep or API is not resumed."""
+    return {
+        "sweep": "quadtree",
+        "bbox": [MIN_LAT, MAX_LAT, MIN_LON, MAX_LON, SWEEP_MARGIN_DEG],
+        "cells": [ROOT_CELL_DEG, MIN_CELL_DEG],
+        "results": RESULTS_PER_POINT,
+        "api": VBB_API_BASE,
+    }
+
+
+def _load_checkpoint() -> dict[Cell, CellResult]:
+    """Results per queried cell from an earlier run, or {} if there is none to resume."""
+    if not CHECKPOINT_PATH.exists():
+        return {}
+    lines = CHECKPOINT_PATH.read_text(encoding="utf-8").splitlines()
+    if not lines or json.loads(lines[0]) != _checkpoint_header():
+        print(f"⚠️  Ignoring {CHECKPOINT_PATH.name}: written for another sweep or API", file=sys.stderr)
+        return {}
+    done: dict[Cell, CellResult] = {}
+    for line in lines[1:]:
         try:
-            raw = fetch_nearby(lat, lon)
-        except requests.RequestException as exc:
-            print(f"  ⚠️  Failed: {exc}", file=sys.stderr)
-            continue
-
-        added = 0
-        for stop in raw:
-            trimmed = _trim_stop_for_snapshot(stop)
-            if trimmed is None:
-                continue
-            stop_id = trimmed["id"]
-            if stop_id in seen_ids:
-                continue
-            seen_ids.add(stop_id)
-            stations.append(trimmed)
-            added += 1
-        print(f"  +{added} new (total {len(stations)})")
-
-        if i < total - 1:
-            time.sleep(REQUEST_PAUSE_S)
-
-    stations.sort(key=lambda s: s["id"])
-    return stations
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            break  # last line cut off by an interrupt
+        done[Cell(*entry["cell"])] = CellResult(entry["stops"], entry["returned"])
+    return done
+
+
+def _fetch_cell(cell: Cell, bucket: TokenBucket | None) -> CellResult:
+    if bucket is not None:
+        bucket.acquire()
+    raw = fetch_nearby(*cell.center, cell.radius_m())
+    trimmed = (_trim_stop_for_snapshot(stop) for stop in raw)
+    return CellResult([stop for stop in trimmed if stop is not None], len(raw))
+
+
+def _sweep(workers: int, bucket: TokenBucket | None) -> tuple[dict[Cell, CellResult], SweepStats]:
+    """Query root cells, splitting saturated ones, concurrently; cells in the checkpoint are not re-queried."""
+    done = _load_checkpoint()
+    if done:
+        print(f"Resuming: {len(done)} cells already queried")
+    else:
+        CHECKPOINT_PATH.write_text(json.dumps(_checkpoint_header()) + "\n", encoding="utf-8")
+    stats = SweepStats()
+
+    with CHECKPOINT_PATH.open("a", encoding="utf-8") as checkpoint, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures: dict[Future, Cell] = {}
+
+        def visit(cell: Cell) -> None:
+            if cell in done:
+                stats.resumed += 1
+                settle(cell, done[cell])
+            else:
+                futures[pool.submit(_fetch_cell, cell, bucket)] = cell
+
+        def settle(cell: Cell, result: CellResult) -> None:
+            stats.cells_by_depth[cell.depth] += 1
+            if not result.stops:
+                stats.empty += 1
+            if not result.saturated:
+                return
+            if cell.size / 2 < MIN_CELL_DEG:
+                stats.unresolved.append(cell)
+                return
+            stats.split_by_depth[cell.depth] += 1
+            for child in cell.children():
+                visit(child)
+
+        try:
+            for cell in root_cells():
+                visit(cell)
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    cell = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except requests.RequestException as exc:
+                        stats.failed += 1
+                        print(f"  ⚠️  {cell} failed: {exc}", file=sys.stderr)
+                        continue
+                    stats.requests += 1
+                    done[cell] = result
+                    entry = {"cell": cell, "stops": result.stops, "returned": result.returned}
+                    checkpoint.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+                    split = " (saturated, splitting)" if result.saturated else ""
+                    print(f"[{stats.requests}] {cell.center} r={cell.radius_m()} m: {len(result.stops)} stops{split}")
+                    settle(cell, result)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise SystemExit(f"\nInterrupted: {len(done)} cells checkpointed; rerun to resume")
+    return done, stats
+
+
+def _collect_unique_stops(done: dict[Cell, CellResult]) -> list[dict]:
+    """Merge per-cell stops; first-seen id wins (cells in coordinate order, so the result is reproducible)."""
+    stations: dict[str, dict] = {}
+    for cell in sorted(done):
+        for stop in done[cell].stops:
+            stations.setdefault(stop["id"], stop)
+    return sorted(stations.values(), key=lambda s: s["id"])
+
+
+def diff_snapshots(old: list[dict], new: list[dict]) -> dict:
+    """Stops added, removed and changed (with the fields that differ) between two snapshots."""
+    old_by_id = {stop["id"]: stop for stop in old}
+    new_by_id = {stop["id"]: stop for stop in new}
+    changed = []
+    for stop_id in sorted(old_by_id.keys() & new_by_id.keys()):
+        before, after = old_by_id[stop_id], new_by_id[stop_id]
+        fields = sorted(key for key in before.keys() | after.keys() if before.get(key) != after.get(key))
+        if fields:
+            changed.append(
+                {"id": stop_id, "name": after["name"], "fields": {f: [before.get(f), after.get(f)] for f in fields}}
+            )
+    return {
+        "added": [new_by_id[stop_id] for stop_id in sorted(new_by_id.keys() - old_by_id.keys())],
+        "removed": [old_by_id[stop_id] for stop_id in sorted(old_by_id.keys() - new_by_id.keys())],
+        "changed": changed,
+    }
+
+
+def _print_diff(diff: dict) -> None:
+    print(f"\n+{len(diff['added'])} added, -{len(diff['removed'])} removed, ~{len(diff['changed'])} changed")
+    for stop in diff["added"]:
+        print(f"  + {stop['id']} {stop['name']}")
+    for stop in diff["removed"]:
+        print(f"  - {stop['id']} {stop['name']}")
+    for change in diff["changed"]:
+        print(f"  ~ {change['id']} {change['name']}: {', '.join(change['fields'])}")
+
+
+def write_binary_from_json() -> None:
+    """Rebuild the binary snapshot from the JSON on disk (hash-linked, so it is only used while they match)."""
+    source = OUTPUT_PATH.read_bytes()
+    stations = json.loads(source)
+    write_binary_snapshot(stations, BINARY_OUTPUT_PATH, source)
+    size_kb = BINARY_OUTPUT_PATH.stat().st_size / 1024
+    print(f"✅ Saved binary snapshot ({size_kb:.0f} KB) → {BINARY_OUTPUT_PATH}")
 
 
 def main() -> None:
-    stations = _collect_unique_stops()
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text(json.dumps(stations, indent=2, ensure_ascii=False) + "\n")
-    print(f"\n✅ Saved {len(stations)} stations → {OUTPUT_PATH}")
+    parser = argparse.ArgumentParser(description="Download VBB stops into the local snapshot.")
+    parser.add_argument("--binary-only", action="store_true", help="Only rebuild vbb_stations.bin from the JSON")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent /locations/nearby calls")
+    parser.add_argument(
+        "--rate-per-min", type=float, default=DEFAULT_RATE_PER_MIN, help="Request budget per minute (0: unthrottled)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Write the diff but keep the current snapshot")
+    parser.add_argument(
+        "--force", action="store_true", help=f"Save even if over {MAX_REMOVED_FRACTION:.0%} of stops vanish"
+    )
+    args = parser.parse_args()
+
+    if args.binary_only:
+        write_binary_from_json()
+        return
+
+    bucket = TokenBucket(args.rate_per_min / 60, burst=1) if args.rate_per_min > 0 else None
+    done, stats = _sweep(args.workers, bucket)
+    print("\n" + "\n".join(stats.report()))
+    if stats.failed:
+        raise SystemExit(f"\n{stats.failed} cells failed; rerun to retry them (finished cells are checkpointed)")
+
+    stations = _collect_unique_stops(done)
+    print(f"{len(stations)} unique stops")
+    previous = json.loads(OUTPUT_PATH.read_text(encoding="utf-8")) if OUTPUT_PATH.exists() else []
+    diff = diff_snapshots(previous, stations)
+    _print_diff(diff)
+    DIFF_PATH.write_text(json.dumps(diff, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"Diff → {DIFF_PATH}")
+
+    if args.dry_run:
+        return
+    if previous and len(diff["removed"]) > MAX_REMOVED_FRACTION * len(previous) and not args.force:
+        raise SystemExit(
+            f"Refusing to drop {len(diff['removed'])} of {len(previous)} stops; check the diff, then --force"
+        )
+    if diff["added"] or diff["removed"] or diff["changed"]:
+        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        OUTPUT_PATH.write_text(json.dumps(stations, indent=2, ensure_ascii=False) + "\n")
+        print(f"\n✅ Saved {len(stations)} stations → {OUTPUT_PATH}")
+        print("Rebuild the nearby-stops table next: python scripts/build_nearby_table.py")
+    else:
+        print("Snapshot unchanged")
+    write_binary_from_json()
+    CHECKPOINT_PATH.unlink()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+"""Seed .cache/directions.json so a fresh server resolves directions without any bearing math.
+
+Resolves every departure in the recorded responses (assets/vbb_recordings/departures), and with
+`--stop` also the live departures of those stop IDs. The table is saved with the current stop
+snapshot's sha256, so rerun after fetch_stations.py:
+    python scripts/seed_directions.py
+    python scripts/seed_directions.py --stop 900110011 --stop 900007102
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from src.datamodels import parse_departures
+from src.direction_table import DIRECTIONS_PATH
+from src.direction_table import DirectionTable
+from src.direction_table import snapshot_sha256
+from src.vbb_api import STATIONS_PATH
+from src.vbb_api import get_departures
+
+RECORDINGS = Path(__file__).resolve().parent.parent / "assets" / "vbb_recordings" / "departures"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stop", action="append", default=[], help="Also resolve live departures of this stop ID")
+    args = parser.parse_args()
+
+    table = DirectionTable.load(DIRECTIONS_PATH, snapshot_sha256(STATIONS_PATH))
+    before = len(table)
+    departures = []
+    for recording in sorted(RECORDINGS.glob("*.json")):
+        departures += parse_departures(json.loads(recording.read_text())["payload"])
+    for stop_id in args.stop:
+        departures += get_departures(stop_id)
+    for departure in departures:
+        table.resolve(departure)
+    table.save()
+    print(f"{len(table)} directions ({len(table) - before} new from {len(departures)} departures) in {DIRECTIONS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Local stand-in for the VBB transport.rest API, for load and latency testing.
+
+Replays recorded `/stops/{id}/departures` and `/locations/nearby` responses from
+assets/vbb_recordings/, with departure times shifted so a recording always looks like
+"now". Latency, injected errors (500/502/503/504, hanging requests) and a throughput cap
+are configurable, so the retry, deadline and circuit-breaker paths in `vbb_api` can be
+exercised without the real mirror.
+
+Serve (then set `vbb_api_base = "http://localhost:3001"` in pyproject.toml):
+    python scripts/vbb_standin.py --port 3001 --latency lognormal:150,0.5 --error 503=0.05 --max-rps 20
+
+Record real responses to replay later:
+    python scripts/vbb_standin.py record --stop 900110011 --nearby 52.5547,13.3980
+
+Stops without a recording are served from another stop's recording (re-labelled), so a
+dashboard anywhere in Berlin gets a full board; pass --strict to 404 them instead.
+`GET /__standin/stats` returns request and outcome counters.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+
+import requests
+from flask import Flask
+from flask import jsonify
+from flask import request
+
+from src.rate_limit import TokenBucket
+from src.stop_index import haversine_meters
+
+ROOT = Path(__file__).resolve().parent.parent
+RECORDINGS_DIR = ROOT / "assets" / "vbb_recordings"
+SNAPSHOT_PATH = ROOT / "assets" / "vbb_stations.json"
+
+ERROR_KINDS = ("500", "502", "503", "504", "timeout")
+# ISO timestamps in a departures payload that move with the time shift.
+_SHIFTED_FIELDS = frozenset({"when", "plannedWhen", "prognosedWhen"})
+NEARBY_DEFAULT_RESULTS = 8
+NEARBY_DEFAULT_DISTANCE_M = 1000
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Latency sampler in seconds from "const:MS", "uniform:LO,HI", "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA".
+
+    All values are milliseconds except the lognormal shape parameter SIGMA. "0" disables latency.
+    """
+    if spec in ("", "0", "none"):
+        return lambda: 0.0
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "const" and len(values) == 1:
+        return lambda: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "normal" and len(values) == 2:
+        return lambda: max(0.0, random.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Unsupported latency spec {spec!r}")
+
+
+def parse_error_rates(specs: list[str]) -> dict[str, float]:
+    """{"503": 0.05, "timeout": 0.01} from ["503=0.05", "timeout=0.01"]; rates must sum to <= 1."""
+    rates: dict[str, float] = {}
+    for spec in specs:
+        kind, _, rate = spec.partition("=")
+        if kind not in ERROR_KINDS:
+            raise ValueError(f"Unknown error kind {kind!r}; expected one of {', '.join(ERROR_KINDS)}")
+        rates[kind] = float(rate)
+    if sum(rates.values()) > 1:
+        raise ValueError("Error rates sum to more than 1")
+    return rates
+
+
+def pick_error(rates: dict[str, float], roll: float) -> str | None:
+    """The injected error kind for a uniform `roll` in [0, 1), or None to serve normally."""
+    threshold = 0.0
+    for kind, rate in rates.items():
+        threshold += rate
+        if roll < threshold:
+            return kind
+    return None
+
+
+def shift_times(value, offset: timedelta):
+    """Copy of a recorded payload with every departure timestamp moved by `offset`."""
+    if isinstance(value, dict):
+        shifted = {}
+        for key, item in value.items():
+            if key in _SHIFTED_FIELDS and isinstance(item, str):
+                shifted[key] = (datetime.fromisoformat(item) + offset).isoformat()
+            elif key == "realtimeDataUpdatedAt" and isinstance(item, (int, float)):
+                shifted[key] = int(item + offset.total_seconds())
+            else:
+                shifted[key] = shift_times(item, offset)
+        return shifted
+    if isinstance(value, list):
+        return [shift_times(item, offset) for item in value]
+    return value
+
+
+def relabel_stop(payload: dict, stop: dict | None) -> dict:
+    """Point every departure of a borrowed recording at `stop` (the requested stop's snapshot entry)."""
+    if stop is None:
+        return payload
+    return {**payload, "departures": [{**d, "stop": stop} for d in payload.get("departures", [])]}
+
+
+def nearby_from_snapshot(stops: list[dict], lat: float, lon: float, results: int, distance_m: float) -> list[dict]:
+    """/locations/nearby answer computed from the stop snapshot when no recording matches."""
+    ranked = []
+    for stop in stops:
+        meters = haversine_meters(lat, lon, stop["location"]["latitude"], stop["location"]["longitude"])
+        if meters <= distance_m:
+            ranked.append((meters, stop))
+    ranked.sort(key=lambda pair: pair[0])
+    return [{**stop, "distance": int(round(meters))} for meters, stop in ranked[:results]]
+
+
+def _nearby_key(lat: float, lon: float) -> str:
+    return f"{lat:.4f}_{lon:.4f}"
+
+
+class Recordings:
+    """Recorded payloads on disk: departures/<stop id>.json and nearby/<lat>_<lon>.json.
+
+    Each file is {"recorded_at": ISO timestamp, "payload": <upstream JSON>}.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.departures = self._load(directory / "departures")
+        self.nearby = self._load(directory / "nearby")
+        self._fallback_ids = sorted(self.departures)
+
+    @staticmethod
+    def _load(directory: Path) -> dict[str, dict]:
+        if not directory.is_dir():
+            return {}
+        return {path.stem: json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))}
+
+    def departures_for(self, stop_id: str, strict: bool) -> tuple[dict, bool] | None:
+        """(recording, borrowed) for a stop; borrowed recordings come from another stop, picked by stop id."""
+        if stop_id in self.departures:
+            return self.departures[stop_id], False
+        if strict or not self._fallback_ids:
+            return None
+        donor = self._fallback_ids[sum(map(ord, stop_id)) % len(self._fallback_ids)]
+        return self.departures[donor], True
+
+
+def _recorded_offset(recording: dict, now: datetime) -> timedelta:
+    return now - datetime.fromisoformat(recording["recorded_at"])
+
+
+def create_app(
+    recordings: Recordings,
+    snapshot: list[dict],
+    latency: Callable[[], float],
+    error_rates: dict[str, float],
+    bucket: TokenBucket | None = None,
+    hang_s: float = 30.0,
+    strict: bool = False,
+) -> Flask:
+    """Flask app serving the recordings with the configured latency, errors and throughput cap."""
+    app = Flask(__name__)
+    stats: Counter = Counter()
+    stats_lock = threading.Lock()
+    snapshot_by_id = {stop["id"]: stop for stop in snapshot}
+
+    def count(*keys: str) -> None:
+        with stats_lock:
+            stats.update(keys)
+
+    def upstream_conditions(endpoint: str):
+        """Apply throughput cap, latency and error injection; returns an error response or None."""
+        count(f"requests.{endpoint}")
+        if bucket is not None and bucket.acquire() > 0:
+            count("throttled")
+        time.sleep(latency())
+        kind = pick_error(error_rates, random.random())
+        if kind is None:
+            return None
+        count(f"injected.{kind}")
+        if kind == "timeout":
+            time.sleep(hang_s)
+            kind = "504"
+        return jsonify({"message": f"stand-in injected HTTP {kind}", "isHafasError": True}), int(kind)
+
+    @app.route("/stops/<stop_id>/departures")
+    def departures(stop_id: str):
+        error = upstream_conditions("departures")
+        if error is not None:
+            return error
+        found = recordings.departures_for(stop_id, strict)
+        if found is None:
+            count("not_found")
+            return jsonify({"message": f"no recording for stop {stop_id}"}), 404
+        recording, borrowed = found
+        payload = shift_times(recording["payload"], _recorded_offset(recording, datetime.now(timezone.utc)))
+        if borrowed:
+            count("borrowed")
+            payload = relabel_stop(payload, snapshot_by_id.get(stop_id))
+        duration_min = request.args.get("duration", type=int)
+        if duration_min is not None:
+            horizon = datetime.now(timezone.utc) + timedelta(minutes=duration_min)
+            payload["departures"] = [
+                d for d in payload["departures"] if d.get("when") and datetime.fromisoformat(d["when"]) <= horizon
+            ]
+        return jsonify(payload)
+
+    @app.route("/locations/nearby")
+    def nearby():
+        error = upstream_conditions("nearby")
+        if error is not None:
+            return error
+        lat = request.args.get("latitude", type=float)
+        lon = request.args.get("longitude", type=float)
+        if lat is None or lon is None:
+            return jsonify({"message": "latitude and longitude are required"}), 400
+        recording = recordings.nearby.get(_nearby_key(lat, lon))
+        if recording is not None:
+            return jsonify(recording["payload"])
+        results = request.args.get("results", NEARBY_DEFAULT_RESULTS, type=int)
+        distance_m = request.args.get("distance", NEARBY_DEFAULT_DISTANCE_M, type=float)
+        return jsonify(nearby_from_snapshot(snapshot, lat, lon, results, distance_m))
+
+    @app.route("/__standin/stats")
+    def standin_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    return app
+
+
+def record(upstream: str, stop_ids: list[str], nearby_points: list[str], directory: Path, duration_min: int) -> None:
+    """Fetch live responses from `upstream` and store them as recordings."""
+    recorded_at = datetime.now(timezone.utc).isoformat()
+    targets = [
+        (
+            directory / "departures" / f"{stop_id}.json",
+            f"{upstream}/stops/{stop_id}/departures",
+            {"duration": duration_min, "linesOfStops": False, "remarks": False, "language": "en"},
+        )
+        for stop_id in stop_ids
+    ]
+    for point in nearby_points:
+        lat, lon = (float(v) for v in point.split(","))
+        targets.append(
+            (
+                directory / "nearby" / f"{_nearby_key(lat, lon)}.json",
+                f"{upstream}/locations/nearby",
+                {"latitude": lat, "longitude": lon, "results": NEARBY_DEFAULT_RESULTS},
+            )
+        )
+    for path, url, params in targets:
+        resp = requests.get(url, params=params, timeout=15)
+        resp.raise_for_status()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        recording = {"recorded_at": recorded_at, "source": upstream, "payload": resp.json()}
+        path.write_text(json.dumps(recording, indent=2, ensure_ascii=False) + "\n")
+        print(f"✅ {url} → {path.relative_to(ROOT)}")
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recordings", type=Path, default=RECORDINGS_DIR)
+    sub = parser.add_subparsers(dest="command")
+
+    rec = sub.add_parser("record", help="Save live upstream responses as recordings")
+    rec.add_argument("--upstream", default="https://v6.vbb.transport.rest")
+    rec.add_argument("--stop", action="append", default=[], help="Stop id to record (repeatable)")
+    rec.add_argument("--nearby", action="append", default=[], help="LAT,LON to record (repeatable)")
+    rec.add_argument("--duration", type=int, default=60, help="Departure window in minutes")
+
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument(
+        "--latency", default="0", help="const:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA"
+    )
+    parser.add_argument("--error", action="append", default=[], help="KIND=RATE, KIND in 500/502/503/504/timeout")
+    parser.add_argument("--hang-s", type=float, default=30.0, help="How long a 'timeout' error stalls before 504")
+    parser.add_argument("--max-rps", type=float, default=0, help="Throughput cap; excess requests queue (0 = off)")
+    parser.add_argument("--burst", type=int, default=5, help="Requests allowed at once above --max-rps")
+    parser.add_argument("--strict", action="store_true", help="404 stops without their own recording")
+    parser.add_argument("--seed", type=int, default=None, help="Seed latency and error sampling")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == "record":
+        record(args.upstream.rstrip("/"), args.stop, args.nearby, args.recordings, args.duration)
+        return
+
+    random.seed(args.seed)
+    recordings = Recordings(args.recordings)
+    snapshot = json.loads(SNAPSHOT_PATH.read_text())
+    bucket = TokenBucket(args.max_rps, args.burst) if args.max_rps > 0 else None
+    app = create_app(
+        recordings,
+        snapshot,
+        latency=parse_latency(args.latency),
+        error_rates=parse_error_rates(args.error),
+        bucket=bucket,
+        hang_s=args.hang_s,
+        strict=args.strict,
+    )
+    print(
+        f"VBB stand-in on http://{args.host}:{args.port} "
+        f"({len(recordings.departures)} departure recordings, {len(snapshot)} snapshot stops)"
+    )
+    app.run(host=args.host, port=args.port, threaded=True, debug=False)
+
+
+if __name__ == "__main__":
+    main()
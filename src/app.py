@@ -1,11 +1,11 @@
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from datetime import timezone
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 from flask import Flask
+from flask import g
 from flask import jsonify
 from flask import make_response
 from flask import redirect
@@ -14,20 +14,41 @@ from flask import request
 from spyglass import MetricsCollector
 from spyglass import configure_logging
 
+from .client_sessions import SESSION_COOKIE
+from .client_sessions import ClientSession
+from .client_sessions import ClientSessionStore
 from .config import FLASK_PORT
 from .config import PROJECT_NAME
 from .config import SPYGLASS_HOST
+from .config import thaw
+from .datamodels import Departure
+from .datamodels import NearbyStation
 from .datamodels import Station
+from .display_feed import DepartureFeed
+from .generation import ReloadWatcher
+from .generation import config
+from .generation import current
+from .generation import pin
+from .generation import register_part
+from .generation import restart_only
+from .generation import unpin
+from .lazy import Lazy
+from .quadrants import QuadrantRoutes
 from .quadrants import filter_and_group
-from .utils import config
 from .utils import get_configured_walk_time
 from .utils import get_thresholds
 from .utils import get_walk_time
+from .utils import prefetch_walk_times
 from .utils import process_station_departures
+from .vbb_api import LAST_GOOD_MAX_AGE_S
+from .vbb_api import DepartureFetch
 from .vbb_api import VBBAPIError
+from .vbb_api import deadline_budget_s
+from .vbb_api import departures_or_last_good
 from .vbb_api import get_departures
 from .vbb_api import get_inbound_trains
 from .vbb_api import get_nearby_stations
+from .worker_pool import BoundedExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -38,17 +59,136 @@ basedir = Path(__file__).parent.parent
 app = Flask(__name__, template_folder=str(basedir / "templates"), static_folder=str(basedir / "static"))
 logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
-# Global state
-browser_coordinates = None
-cached_stations = None
 COORDINATE_ACCURACY_DECIMALS = 3
+# Each browser (cookie) keeps its own coordinates and stop list, so devices never overwrite each other.
+client_sessions = ClientSessionStore(
+    ttl_s=config.get("client_session_ttl_s", 86400),
+    max_entries=config.get("client_session_max_entries", 256),
+)
+# "async" fans out VBB requests on one event-loop thread (vbb_async) instead of the board pool.
+USE_ASYNC_VBB = config.get("vbb_client", "threads") == "async"
 
 
-def _station_board_row(station: Station, user_coords: tuple[float, float] | None) -> dict:
-    """One station's departures and timing metadata for the dashboard JSON."""
+def _create_async_vbb_client():
+    # aiohttp is the single most expensive import; only pay for it when the async client is used.
+    from .vbb_async import client
+
+    return client
+
+
+async_vbb_client = Lazy("async VBB client (aiohttp)", _create_async_vbb_client)
+
+# One pool for every /api/stations request, so thread count stays flat as polling clients are added.
+board_pool = BoundedExecutor(
+    max_workers=config.get("board_pool_max_workers", 8),
+    max_queue=config.get("board_pool_max_queue", 32),
+    metrics=metrics,
+    name="board_pool",
+)
+
+
+def _fetch_display_departures() -> DepartureFetch:
+    """Departures for the fixed display station via the configured VBB client, with when VBB sent them."""
+    station_id = config["display"]["station_id"]
+    deadline_s = deadline_budget_s("display")
+    if USE_ASYNC_VBB:
+        departures = async_vbb_client.get().fetch(station_id, deadline_s)
+    else:
+        departures = get_departures(station_id, deadline_s)
+    # Never a fallback here (the fetch succeeded); it only looks up the fetch time behind a cache hit.
+    return departures_or_last_good(station_id, departures)
+
+
+display_feed = DepartureFeed(
+    fetch=_fetch_display_departures,
+    interval_s=config["display"].get("refresh_interval_s", 20),
+    # Same limit as the dashboard's last-known-good fallback.
+    max_stale_s=LAST_GOOD_MAX_AGE_S,
+)
+
+# Read once above; everything else in config.json is re-read per request and follows reloads.
+restart_only(
+    "client_session_ttl_s",
+    "client_session_max_entries",
+    "vbb_client",
+    "board_pool_max_workers",
+    "board_pool_max_queue",
+    "display.refresh_interval_s",
+    "reload_poll_interval_s",
+)
+register_part(
+    "quadrant routes",
+    lambda app_config: QuadrantRoutes.from_config(app_config["display"]["quadrants"]),
+    config_keys=("display",),
+)
+reload_watcher = ReloadWatcher(interval_s=config.get("reload_poll_interval_s", 5))
+
+
+@app.before_request
+def _pin_generation():
+    # The whole request, including its board-pool tasks, sees one config and snapshot even if a reload lands.
+    g.generation_token = pin()
+
+
+@app.teardown_request
+def _unpin_generation(exc):
+    token = g.pop("generation_token", None)
+    if token is not None:
+        unpin(token)
+
+
+def _client_session() -> ClientSession:
+    """The calling browser's session; the cookie is (re)issued in `_set_client_cookie`."""
+    session_id, session = client_sessions.get(request.cookies.get(SESSION_COOKIE))
+    g.client_session_id = session_id
+    return session
+
+
+@app.after_request
+def _set_client_cookie(response):
+    session_id = g.get("client_session_id")
+    if session_id is not None:
+        response.set_cookie(
+            SESSION_COOKIE, session_id, max_age=int(client_sessions.ttl_s), httponly=True, samesite="Lax"
+        )
+    return response
+
+
+def _resolve_dashboard_stations(coordinates: tuple[float, float] | None) -> list[NearbyStation]:
+    max_stations = config.get("max_dashboard_stations")
+    nearby = get_nearby_stations(coordinates)
+    return nearby[:max_stations] if max_stations else nearby
+
+
+def _fetch_station_departures(station: Station) -> DepartureFetch:
+    """Live departures for a dashboard stop, or its last-known-good set while VBB is failing."""
+    try:
+        result: list[Departure] | VBBAPIError = get_inbound_trains(station, deadline_budget_s("dashboard"))
+    except VBBAPIError as error:
+        result = error
+    return departures_or_last_good(station.id, result)
+
+
+def _station_board_row(
+    station: Station,
+    user_coords: tuple[float, float] | None,
+    fetch: DepartureFetch | None = None,
+) -> dict:
+    """One station's departures and timing metadata for the dashboard JSON.
+
+    Fetches departures itself unless the caller already has them (async fan-out).
+    """
     walk_time = get_walk_time(station, user_coords)
-    departures = get_inbound_trains(station)
-    processed = process_station_departures(station, departures, user_coords)
+    if fetch is None:
+        fetch = _fetch_station_departures(station)
+    if config.get("columnar_departures", False):
+        from .departure_table import DepartureTable
+        from .departure_table import process_station_table
+
+        table = DepartureTable.from_departures(fetch.departures)
+        processed = process_station_table(station, table, user_coords, walk_time)
+    else:
+        processed = process_station_departures(station, fetch.departures, user_coords, walk_time)
     station_departures = [{k: v for k, v in row.items() if k != "departure"} for row in processed]
     red_threshold, yellow_threshold = get_thresholds(walk_time) if walk_time is not None else (None, None)
     return {
@@ -57,6 +197,8 @@ def _station_board_row(station: Station, user_coords: tuple[float, float] | None
         "walkTime": walk_time,
         "departures": station_departures,
         "timeConfig": {"buffer": red_threshold, "yellowThreshold": yellow_threshold},
+        "stale": fetch.stale,
+        "dataAge": int(fetch.age_seconds(datetime.now(timezone.utc))),
     }
 
 
@@ -64,11 +206,21 @@ def _build_station_board_rows(
     stations: list[Station],
     user_coords: tuple[float, float] | None,
 ) -> list[dict]:
-    """Fetch departures for all stations in parallel and build dashboard rows."""
+    """Fetch departures for all stations in parallel and build dashboard rows.
+
+    Uses the async client's event loop when `vbb_client` is "async", otherwise the shared board pool.
+    Walk times missing for the user's cell are looked up for all stations at once beforehand.
+    """
     if not stations:
         return []
-    with ThreadPoolExecutor(max_workers=len(stations)) as executor:
-        return list(executor.map(lambda s: _station_board_row(s, user_coords), stations))
+    prefetch_walk_times(stations, user_coords)
+    if USE_ASYNC_VBB:
+        results = async_vbb_client.get().fetch_many(
+            [station.id for station in stations], deadline_budget_s("dashboard")
+        )
+        fetches = [departures_or_last_good(s.id, result) for s, result in zip(stations, results)]
+        return [_station_board_row(s, user_coords, fetch) for s, fetch in zip(stations, fetches)]
+    return board_pool.map(lambda s: _station_board_row(s, user_coords), stations)
 
 
 @app.route("/")
@@ -94,36 +246,33 @@ def observability():
 
 @app.route("/api/location", methods=["POST"])
 def api_location():
-    """Receive and log location data from browser."""
-    global browser_coordinates
+    """Store the browser's location in its session; its stop list is re-ranked only if the location moved."""
     location_data = request.get_json()
     latitude = location_data.get("latitude")
     longitude = location_data.get("longitude")
-    browser_coordinates = (
+    coordinates = (
         round(latitude, COORDINATE_ACCURACY_DECIMALS),
         round(longitude, COORDINATE_ACCURACY_DECIMALS),
     )
-    logger.info("Received coordinates %s", browser_coordinates)
+    changed = _client_session().set_coordinates(coordinates)
+    logger.info("Received coordinates %s%s", coordinates, "" if changed else " (unchanged)")
     return jsonify({"status": "success"})
 
 
 @app.route("/api/stations")
 @metrics.timed("stations")
 def api_stations():
-    """Return station and train data as JSON."""
-    global browser_coordinates, cached_stations
+    """Return station and train data for the calling browser as JSON."""
     refresh = request.args.get("refresh", "false").lower() == "true"
-    max_stations = config.get("max_dashboard_stations")
-
-    if cached_stations is None or refresh:
-        nearby = get_nearby_stations(browser_coordinates)
-        cached_stations = nearby[:max_stations] if max_stations else nearby
-        logger.info("%s %d stations", "Refreshed" if refresh else "Fetched", len(cached_stations))
+    session = _client_session()
+    stations, coordinates, resolved = session.resolve_stations(_resolve_dashboard_stations, refresh)
+    if resolved:
+        logger.info("%s %d stations", "Refreshed" if refresh else "Fetched", len(stations))
     else:
-        logger.info("Using %d cached stations", len(cached_stations))
+        logger.info("Using %d cached stations", len(stations))
 
-    station_data = _build_station_board_rows(cached_stations, browser_coordinates)
-    return jsonify({"stations": station_data, "config": config})
+    station_data = _build_station_board_rows(stations, coordinates)
+    return jsonify({"stations": station_data, "config": thaw(config)})
 
 
 @app.route("/api/display/data")
@@ -135,7 +284,7 @@ def api_display_data():
     now = datetime.now(timezone.utc)
 
     try:
-        departures = get_departures(station_id)
+        snapshot = display_feed.latest()
     except VBBAPIError as error:
         logger.warning("VBB API error [%s]: %s", error.kind, error)
         diagnostics = {"station_id": station_id, **error.to_diagnostics()}
@@ -154,12 +303,25 @@ def api_display_data():
     try:
         # No cap: return every matching departure. The display shows 3 per quadrant
         # and reveals the rest via horizontal scroll (see .departures-row in display.css).
-        quadrants_data = filter_and_group(
-            departures,
-            now,
-            quadrants_config=display_config["quadrants"],
-            min_minutes=config["min_departure_time_min"],
-        )
+        # Minutes are recomputed against `now`, so a snapshot from the background refresher stays accurate.
+        if config.get("columnar_departures", False):
+            from .departure_table import filter_and_group_table
+
+            quadrants_data = filter_and_group_table(
+                snapshot.table,
+                now,
+                quadrants_config=display_config["quadrants"],
+                min_minutes=config["min_departure_time_min"],
+                routes=current().part("quadrant routes"),
+            )
+        else:
+            quadrants_data = filter_and_group(
+                snapshot.departures,
+                now,
+                quadrants_config=display_config["quadrants"],
+                min_minutes=config["min_departure_time_min"],
+                routes=current().part("quadrant routes"),
+            )
 
         walk_time = get_configured_walk_time(display_config["station_name"])
 
@@ -169,6 +331,8 @@ def api_display_data():
                 "station_name": display_config["station_name"],
                 "walk_time": walk_time,
                 "timestamp": timestamp.isoformat(),
+                "data_age_s": int(snapshot.age_seconds(now)),
+                "stale": snapshot.error is not None,
                 "min_departure_min": config["min_departure_time_min"],
                 "quadrants": [
                     {
@@ -197,6 +361,8 @@ def api_display_data():
 
 def main():
     logger.info("Starting server at http://localhost:%s", FLASK_PORT)
+    display_feed.start()
+    reload_watcher.start()
     app.run(host="0.0.0.0", port=FLASK_PORT, debug=False)
 
 
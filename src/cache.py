@@ -0,0 +1,102 @@
+"""Thread-safe in-process caches shared by the server, display and CLI."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Hashable
+from concurrent.futures import Future
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Bounded LRU cache whose entries expire `ttl_s` seconds after they were stored.
+
+    `get_or_load` coalesces concurrent misses for the same key: the first caller runs the loader,
+    later callers block on that result instead of each issuing their own upstream request.
+    Loader errors are handed to every waiting caller and are never cached.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._in_flight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _fresh_value(self, key: Hashable) -> tuple[bool, V | None]:
+        """Return (found, value) for a non-expired entry; caller must hold the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        stored_at, value = entry
+        if self._clock() - stored_at >= self.ttl_s:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: Hashable, value: V) -> None:
+        """Insert or refresh an entry and evict the least recently used overflow; caller must hold the lock."""
+        self._entries[key] = (self._clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable, default: Any = None) -> V | Any:
+        """Return the cached value for `key`, or `default` if it is missing or expired."""
+        with self._lock:
+            found, value = self._fresh_value(key)
+            return value if found else default
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Store `value` under `key`, evicting the least recently used entry when full."""
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], V], timeout: float | None = None) -> tuple[V, str]:
+        """Return (value, outcome) where outcome is "hit", "miss" or "coalesced".
+
+        On a miss the loader runs in the calling thread. Callers arriving while a load for the
+        same key is in flight wait up to `timeout` seconds for it (TimeoutError if exceeded).
+        """
+        with self._lock:
+            found, value = self._fresh_value(key)
+            if found:
+                return value, "hit"
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_leader:
+            return future.result(timeout=timeout), "coalesced"
+
+        try:
+            value = loader()
+        except BaseException as exc:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._store(key, value)
+            self._in_flight.pop(key, None)
+        future.set_result(value)
+        return value, "miss"
+
+    def clear(self) -> None:
+        """Drop every cached entry (in-flight loads are left to finish)."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,79 @@
+"""Consecutive-failure circuit breaker for upstream calls."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast while open.
+
+    After `reset_timeout_s` one trial call is let through (half-open): success closes the circuit,
+    failure re-opens it for another `reset_timeout_s`. Other callers keep failing fast meanwhile.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go upstream now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            # A half-open trial that never reported back (e.g. cancelled) is retried after another timeout.
+            if self._clock() - self._opened_at >= self.reset_timeout_s:
+                self._state = HALF_OPEN
+                self._opened_at = self._clock()
+                logger.info("Circuit %s half-open: sending trial request", self.name)
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.warning("Circuit %s closed: upstream recovered", self.name)
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                logger.warning(
+                    "Circuit %s open after %d consecutive failures; failing fast for %.0fs",
+                    self.name,
+                    self._failures,
+                    self.reset_timeout_s,
+                )
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def reset(self) -> None:
+        """Close the circuit and forget past failures."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
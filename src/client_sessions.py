@@ -0,0 +1,83 @@
+"""Per-client dashboard state, keyed by a cookie so each browser gets its own board."""
+
+import secrets
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+
+from .cache import TTLCache
+from .datamodels import Station
+
+SESSION_COOKIE = "trainspotter_client"
+_MAX_SESSION_ID_LENGTH = 64
+
+Coordinates = tuple[float, float]
+
+
+@dataclass
+class ClientSession:
+    """One browser's coordinates and the stops resolved for them.
+
+    `lock` serialises concurrent polls from the same client so the stop list is ranked once.
+    """
+
+    coordinates: Coordinates | None = None
+    stations: list[Station] | None = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def set_coordinates(self, coordinates: Coordinates) -> bool:
+        """Store new coordinates; returns True (and drops the resolved stops) only if they changed."""
+        with self.lock:
+            if coordinates == self.coordinates:
+                return False
+            self.coordinates = coordinates
+            self.stations = None
+            return True
+
+    def resolve_stations(
+        self,
+        resolve: Callable[[Coordinates | None], list[Station]],
+        refresh: bool = False,
+    ) -> tuple[list[Station], Coordinates | None, bool]:
+        """Return (stations, coordinates, resolved) where `resolved` is True if `resolve` ran for this call."""
+        with self.lock:
+            resolved = self.stations is None or refresh
+            if resolved:
+                self.stations = resolve(self.coordinates)
+            return self.stations, self.coordinates, resolved
+
+
+class ClientSessionStore:
+    """Bounded, thread-safe map of session id -> ClientSession.
+
+    Sessions expire `ttl_s` after the client's last request and the least recently used one is
+    evicted beyond `max_entries`, so abandoned browsers do not accumulate.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_s = ttl_s
+        self._sessions: TTLCache[ClientSession] = TTLCache(ttl_s=ttl_s, max_entries=max_entries, clock=clock)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str | None) -> tuple[str, ClientSession]:
+        """Return (session_id, session) for the client, starting a new session if it is unknown or expired.
+
+        A well-formed id from an expired cookie is kept so the browser does not need a new cookie.
+        """
+        if not session_id or len(session_id) > _MAX_SESSION_ID_LENGTH:
+            session_id = secrets.token_urlsafe(16)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ClientSession()
+            # Re-storing refreshes both recency and expiry: the TTL runs from the last request.
+            self._sessions.put(session_id, session)
+        return session_id, session
+
+    def clear(self) -> None:
+        self._sessions.clear()
@@ -1,6 +1,9 @@
 import json
 import tomllib
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any
 
 import typer
 
@@ -18,15 +21,43 @@ FLASK_PORT = _tool_config["flask_port"]
 SPYGLASS_HOST = _tool_config["spyglass_host"]
 VBB_API_BASE = _tool_config["vbb_api_base"].rstrip("/")
 
-_json_config_file = Path(__file__).parent.parent / "config.json"
-with _json_config_file.open("r") as f:
-    _json_config = json.load(f)
 
-stations = _json_config["stations"]
-walk_time_buffer = _json_config["walk_time_buffer"]
-location = _json_config["location"]
-update_interval_min = _json_config["update_interval_min"]
-min_departure_time_min = _json_config["min_departure_time_min"]
+def _freeze(value: Any) -> Any:
+    """Read-only view of parsed JSON: dicts become mappingproxies, lists become tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Plain dict/list copy of a frozen config value, e.g. for `jsonify`."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+CONFIG_PATH = Path(__file__).parent.parent / "config.json"
+
+
+def load_app_config(path: Path = CONFIG_PATH) -> Mapping[str, Any]:
+    """Parse config.json into a read-only mapping."""
+    with path.open("r") as f:
+        return _freeze(json.load(f))
+
+
+# Parsed once at startup; immutable so no caller can change it for others. Request-path code reads
+# `generation.config`, which follows hot reloads of config.json.
+app_config = load_app_config()
+
+stations = app_config["stations"]
+walk_time_buffer = app_config["walk_time_buffer"]
+location = app_config["location"]
+update_interval_min = app_config["update_interval_min"]
+min_departure_time_min = app_config["min_departure_time_min"]
 gmaps_api_key = GMAPS_API_KEY
 
 
@@ -38,8 +69,17 @@ def config_cli(
     flask_port: bool = typer.Option(False, "--flask-port", help=str(FLASK_PORT)),
     spyglass_host: bool = typer.Option(False, "--spyglass-host", help=SPYGLASS_HOST),
     vbb_api_base: bool = typer.Option(False, "--vbb-api-base", help=VBB_API_BASE),
+    startup: bool = typer.Option(False, "--startup", help="Import-time breakdown of the Flask app (fresh interpreter)"),
 ) -> None:
 # fmt: on
+    if startup:
+        from .startup_profile import format_profile
+        from .startup_profile import profile_startup
+
+        for line in format_profile(profile_startup()):
+            typer.echo(line)
+        return
+
     if all:
         typer.echo(f"project_name={PROJECT_NAME}")
         typer.echo(f"project_version={_project_config['version']}")
@@ -1,11 +1,18 @@
 import logging
+import sys
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+T = TypeVar("T")
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Location:
     """Represents a geographic location."""
 
@@ -15,7 +22,7 @@ class Location:
     longitude: float
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Products:
     """Represents available transport products at a station."""
 
@@ -28,7 +35,7 @@ class Products:
     regional: bool
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Station:
     """Represents a public transport station."""
 
@@ -41,7 +48,25 @@ class Station:
     distance: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class NearbyStation:
+    """A shared snapshot `Station` and its distance in meters from one query point.
+
+    The station object is reused across queries; only this small wrapper is created per result.
+    Other attributes (`id`, `name`, `location`, ...) are read from the station.
+    """
+
+    station: Station
+    distance: int
+
+    def __getattr__(self, name: str):
+        # Dunder lookups (copy, pickle) must not recurse into a half-built instance.
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.station, name)
+
+
+@dataclass(frozen=True, slots=True)
 class Color:
     """Represents line color information."""
 
@@ -49,7 +74,7 @@ class Color:
     bg: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Operator:
     """Represents a transport operator."""
 
@@ -58,7 +83,7 @@ class Operator:
     name: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Line:
     """Represents a transport line."""
 
@@ -75,7 +100,7 @@ class Line:
     color: Color | None
 
 
-@dataclass
+@dataclass(slots=True)
 class Departure:
     """Represents an departure at a station."""
 
@@ -109,6 +134,73 @@ def _parse_station(station_dict: dict) -> Station:
     )
 
 
+class _Flyweights(Generic[T]):
+    """Shared immutable instances by key, reused across parses; cleared when full so memory stays bounded."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._items: dict = {}
+
+    def get(self, key, build: Callable[[], T]) -> T:
+        item = self._items.get(key)
+        if item is None:
+            if len(self._items) >= self.max_entries:
+                self._items.clear()
+            # setdefault keeps the first instance if two threads build the same key.
+            item = self._items.setdefault(key, build())
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+# Departures at a hub repeat the same stops, lines and operators, within one response and across the
+# display's polls; they are parsed once and shared. Lines are per trip (fahrtNr), hence the larger bound.
+_stations: _Flyweights[Station] = _Flyweights(4096)
+_lines: _Flyweights[Line] = _Flyweights(8192)
+_operators: _Flyweights[Operator] = _Flyweights(256)
+_colors: _Flyweights[Color] = _Flyweights(256)
+_timestamps: _Flyweights[datetime] = _Flyweights(8192)
+
+
+def clear_flyweights() -> None:
+    """Drop every shared instance (benchmarks, tests)."""
+    for registry in (_stations, _lines, _operators, _colors, _timestamps):
+        registry.clear()
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _shared_station(station_dict: dict | None) -> Station | None:
+    if not station_dict:
+        return None
+    return _stations.get(station_dict["id"], lambda: _parse_station(station_dict))
+
+
+def _shared_line(line_dict: dict) -> Line:
+    def build() -> Line:
+        operator_dict = line_dict.get("operator")
+        color_dict = line_dict.get("color")
+        operator = _operators.get(operator_dict["id"], lambda: Operator(**operator_dict)) if operator_dict else None
+        color = _colors.get((color_dict["fg"], color_dict["bg"]), lambda: Color(**color_dict)) if color_dict else None
+        return Line(
+            **{k: _intern(v) for k, v in line_dict.items() if k not in ["operator", "color"]},
+            operator=operator,
+            color=color,
+        )
+
+    return _lines.get((line_dict["id"], line_dict["fahrtNr"]), build)
+
+
+def _parse_time(text: str) -> datetime:
+    return _timestamps.get(text, lambda: datetime.fromisoformat(text))
+
+
 def _parse_location(location_dict: dict | None) -> Location | None:
     """Helper function to parse a location dictionary into a Location object."""
     if not location_dict:
@@ -128,53 +220,101 @@ def parse_stations(stations_data: list[dict]) -> list[Station]:
     return stations
 
 
-def parse_departures(departures_data: dict) -> list[Departure]:
-    """Parses departures data into Departure dataclasses."""
+# How each Departure field is decoded from its raw VBB dict; shared by the eager and the lazy parse.
+_DEPARTURE_DECODERS: dict[str, Callable[[dict], Any]] = {
+    "tripId": lambda raw: raw["tripId"],
+    "stop": lambda raw: _shared_station(raw["stop"]),
+    "when": lambda raw: _parse_time(raw["when"]),
+    "plannedWhen": lambda raw: _parse_time(raw["plannedWhen"]),
+    "delay": lambda raw: raw["delay"],
+    "platform": lambda raw: _intern(raw["platform"]),
+    "plannedPlatform": lambda raw: _intern(raw["plannedPlatform"]),
+    "prognosisType": lambda raw: _intern(raw["prognosisType"]),
+    "direction": lambda raw: _intern(raw["direction"]),
+    "provenance": lambda raw: _intern(raw["provenance"]),
+    "line": lambda raw: _shared_line(raw["line"]),
+    "remarks": lambda raw: raw["remarks"],
+    "origin": lambda raw: _shared_station(raw["origin"]),
+    "destination": lambda raw: _shared_station(raw["destination"]),
+    "currentTripPosition": lambda raw: _parse_location(raw.get("currentTripPosition")),
+}
+
+
+class LazyDeparture(Departure):
+    """A `Departure` view over the raw VBB dict; each field is decoded on first access, then cached.
+
+    Attribute access, isinstance checks and repr behave like `Departure`. Unread fields cost nothing,
+    but the raw dict stays alive as long as the view does.
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw: dict) -> None:
+        self._raw = raw
+        # Plain values are cheaper to copy now than to decode on access; objects and timestamps wait.
+        self.tripId = raw["tripId"]
+        self.delay = raw["delay"]
+        self.platform = _intern(raw["platform"])
+        self.plannedPlatform = _intern(raw["plannedPlatform"])
+        self.prognosisType = _intern(raw["prognosisType"])
+        self.direction = _intern(raw["direction"])
+        self.provenance = _intern(raw["provenance"])
+        self.remarks = raw["remarks"]
+
+    def __getattr__(self, name: str):
+        # Only reached while the field's slot is unset. Decoding is idempotent, so a racing thread at
+        # worst decodes twice; afterwards reads are plain slot reads.
+        decode = _DEPARTURE_DECODERS.get(name)
+        if decode is None:
+            raise AttributeError(name)
+        value = decode(self._raw)
+        setattr(self, name, value)
+        return value
+
+    # Equality follows the decoded fields, so a view equals its eagerly parsed Departure.
+    def __eq__(self, other):
+        if not isinstance(other, Departure):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in _DEPARTURE_DECODERS)
+
+    __hash__ = None
+
+
+def parse_departures(departures_data: dict, lazy: bool = False) -> list[Departure]:
+    """Parses departures data into Departure dataclasses.
+
+    Stations, lines, operators, colors and timestamps are shared flyweights (see `_Flyweights`), so
+    callers must not mutate them; repeated short strings are interned. With `lazy`, returns
+    `LazyDeparture` views that decode each field on first access.
+    """
     departures: list[Departure] = []
     for departure_dict in departures_data["departures"]:
-        # Parse nested objects
-        stop = _parse_station(departure_dict["stop"]) if departure_dict["stop"] else None
-        origin = _parse_station(departure_dict["origin"]) if departure_dict["origin"] else None
-        destination = _parse_station(departure_dict["destination"]) if departure_dict["destination"] else None
-        current_trip_position = _parse_location(departure_dict.get("currentTripPosition"))
-
-        # Parse line and its nested objects
-        line_dict = departure_dict["line"]
-        operator = Operator(**line_dict["operator"]) if "operator" in line_dict else None
-        color = Color(**line_dict["color"]) if "color" in line_dict else None
-
-        line = Line(
-            **{k: v for k, v in line_dict.items() if k not in ["operator", "color"]},
-            operator=operator,
-            color=color,
-        )
-
         # Defensive: check 'when' and 'plannedWhen' are strings
         when_str = departure_dict["when"]
         planned_when_str = departure_dict["plannedWhen"]
         if not isinstance(when_str, str) or not isinstance(planned_when_str, str):
             logger.debug(f"Skipping departure with invalid 'when': {when_str} or 'plannedWhen': {planned_when_str}")
             continue
-        when = datetime.fromisoformat(when_str)
-        planned_when = datetime.fromisoformat(planned_when_str)
+        if lazy:
+            departures.append(LazyDeparture(departure_dict))
+            continue
 
-        # Create departure object
         departure = Departure(
             tripId=departure_dict["tripId"],
-            stop=stop,
-            when=when,
-            plannedWhen=planned_when,
+            stop=_shared_station(departure_dict["stop"]),
+            when=_parse_time(when_str),
+            plannedWhen=_parse_time(planned_when_str),
             delay=departure_dict["delay"],
-            platform=departure_dict["platform"],
-            plannedPlatform=departure_dict["plannedPlatform"],
-            prognosisType=departure_dict["prognosisType"],
-            direction=departure_dict["direction"],
-            provenance=departure_dict["provenance"],
-            line=line,
+            platform=_intern(departure_dict["platform"]),
+            plannedPlatform=_intern(departure_dict["plannedPlatform"]),
+            prognosisType=_intern(departure_dict["prognosisType"]),
+            direction=_intern(departure_dict["direction"]),
+            provenance=_intern(departure_dict["provenance"]),
+            line=_shared_line(departure_dict["line"]),
             remarks=departure_dict["remarks"],
-            origin=origin,
-            destination=destination,
-            currentTripPosition=current_trip_position,
+            origin=_shared_station(departure_dict["origin"]),
+            destination=_shared_station(departure_dict["destination"]),
+            currentTripPosition=_parse_location(departure_dict.get("currentTripPosition")),
         )
         departures.append(departure)
 
@@ -0,0 +1,42 @@
+"""End-to-end time budgets for upstream requests and their retries."""
+
+import time
+from collections.abc import Callable
+
+# An attempt shorter than this cannot realistically complete a VBB round trip.
+MIN_ATTEMPT_S = 0.5
+
+
+class Deadline:
+    """Fixed time budget shared by every attempt (and backoff pause) of one logical request."""
+
+    def __init__(self, budget_s: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.budget_s = budget_s
+        self._clock = clock
+        self._expires_at = clock() + budget_s
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)."""
+        return max(0.0, self._expires_at - self._clock())
+
+    def can_wait(self, seconds: float) -> bool:
+        """True if pausing `seconds` still leaves room for one more attempt."""
+        return self.remaining() - seconds >= MIN_ATTEMPT_S
+
+    def attempt_timeout(self, attempts_left: int, max_timeout_s: float) -> float | None:
+        """Timeout for the next attempt, splitting what is left evenly over the attempts that still fit.
+
+        Capped at `max_timeout_s`. Returns None when not even one `MIN_ATTEMPT_S` attempt fits.
+        """
+        remaining = self.remaining()
+        if remaining < MIN_ATTEMPT_S:
+            return None
+        fitting_attempts = max(1, min(attempts_left, int(remaining // MIN_ATTEMPT_S)))
+        return min(max_timeout_s, remaining / fitting_attempts)
+
+
+def backoff_s(retry_number: int, factor: float) -> float:
+    """urllib3-style exponential backoff: no pause before the first retry, then factor * 2**(n - 1)."""
+    if retry_number <= 1:
+        return 0.0
+    return factor * 2 ** (retry_number - 1)
@@ -0,0 +1,157 @@
+"""Struct-of-arrays departures: NumPy columns for what the display and dashboard compute per row.
+
+Built once per departure list (`DepartureTable.from_departures`). Direction symbols are read
+through the shared `direction_table` at build time; minutes-until and the min-minutes filter are
+one array operation per request. Lines and products are small integer codes into tuples of their
+distinct values, so quadrant routing runs once per line.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
+
+import numpy as np
+
+from .datamodels import Departure
+from .datamodels import Station
+from .direction_table import resolve_direction
+from .provenance import provenance_normaliser
+from .quadrants import DepartureSlot
+from .quadrants import QuadrantData
+from .quadrants import QuadrantRoutes
+from .utils import MISSING
+from .utils import Missing
+from .utils import get_walk_time
+from .utils import product_transport_type
+
+# Every symbol `utils.get_direction` can return; `direction_codes` index into this.
+SYMBOLS = ("↑", "→", "↓", "←", "↻", "↺")
+
+
+def _codes(values: list[str]) -> tuple[np.ndarray, tuple[str, ...]]:
+    index: dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32, count=len(values))
+    return codes, tuple(index)
+
+
+@dataclass(frozen=True, eq=False)
+class DepartureTable:
+    """Departures that have stop and destination coordinates, in input order, as columns."""
+
+    departures: tuple[Departure, ...]
+    when_s: np.ndarray  # float64 epoch seconds
+    line_codes: np.ndarray  # index into `lines`
+    lines: tuple[str, ...]
+    product_codes: np.ndarray  # index into `products`
+    products: tuple[str, ...]
+    direction_codes: np.ndarray  # index into SYMBOLS: `direction_table.resolve_direction` per row
+    has_trip_id: np.ndarray  # bool
+
+    @classmethod
+    def from_departures(cls, departures: Sequence[Departure]) -> "DepartureTable":
+        rows = tuple(d for d in departures if d.stop and d.stop.location and d.destination and d.destination.location)
+        count = len(rows)
+        line_codes, lines = _codes([d.line.name for d in rows])
+        product_codes, products = _codes([d.line.product for d in rows])
+        return cls(
+            departures=rows,
+            when_s=np.fromiter((d.when.timestamp() for d in rows), dtype=np.float64, count=count),
+            line_codes=line_codes,
+            lines=lines,
+            product_codes=product_codes,
+            products=products,
+            # Same memoised symbols as the per-departure path; every row has coordinates, so never None.
+            direction_codes=np.fromiter(
+                (SYMBOLS.index(resolve_direction(d)) for d in rows), dtype=np.int8, count=count
+            ),
+            has_trip_id=np.fromiter((bool(d.tripId) for d in rows), dtype=bool, count=count),
+        )
+
+    def __len__(self) -> int:
+        return len(self.departures)
+
+    def minutes_until(self, now: datetime) -> np.ndarray:
+        """Whole minutes from `now` to each departure, truncated toward zero like `int()`."""
+        return np.trunc((self.when_s - now.timestamp()) / 60).astype(np.int64)
+
+
+def filter_and_group_table(
+    table: DepartureTable,
+    now: datetime,
+    quadrants_config: list[dict],
+    min_minutes: int = 5,
+    max_per_quadrant: int | None = None,
+    routes: QuadrantRoutes | None = None,
+) -> list[QuadrantData]:
+    """Columnar `quadrants.filter_and_group`: same arguments and result, over a `DepartureTable`."""
+    if routes is None:
+        routes = QuadrantRoutes.from_config(quadrants_config)
+    keys = [q["key"] for q in quadrants_config]
+    key_index = {key: i for i, key in reversed(list(enumerate(keys)))}
+    # Quadrant index per (line code, direction code); -1 where no quadrant takes the pair.
+    route_matrix = np.array(
+        [[key_index.get(routes.route(line, symbol), -1) for symbol in SYMBOLS] for line in table.lines],
+        dtype=np.int64,
+    ).reshape(len(table.lines), len(SYMBOLS))
+
+    minutes = table.minutes_until(now)
+    eligible = minutes >= min_minutes
+    missing = np.flatnonzero(eligible & ~table.has_trip_id)
+    if len(missing):
+        raise ValueError(f"Departure missing tripId for line {table.lines[table.line_codes[missing[0]]]!r}")
+
+    quadrant = route_matrix[table.line_codes, table.direction_codes]
+    routed = np.flatnonzero(eligible & (quadrant >= 0))
+    # Stable sort: equal minutes keep feed order, as in the per-departure path.
+    routed = routed[np.argsort(minutes[routed], kind="stable")]
+
+    cleanse = provenance_normaliser()
+    groups: dict[str, list[DepartureSlot]] = {key: [] for key in keys}
+    for i in routed.tolist():
+        group = groups[keys[quadrant[i]]]
+        if max_per_quadrant is not None and len(group) >= max_per_quadrant:
+            continue
+        dep = table.departures[i]
+        provenance = cleanse(dep.provenance) if dep.provenance else dep.provenance
+        group.append(
+            DepartureSlot(tripId=dep.tripId, minutes=int(minutes[i]), line=dep.line.name, provenance=provenance)
+        )
+
+    return [
+        QuadrantData(key=q["key"], label=q["label"], arrow=q["direction"], departures=groups[q["key"]])
+        for q in quadrants_config
+    ]
+
+
+def process_station_table(
+    station: Station,
+    table: DepartureTable,
+    browser_coordinates: tuple[float, float] | None = None,
+    walk_time: int | None | Missing = MISSING,
+    now: datetime | None = None,
+) -> list[dict]:
+    """Columnar `utils.process_station_departures`: same rows, sorted by departure time."""
+    if walk_time is MISSING:
+        walk_time = get_walk_time(station, browser_coordinates)
+    if now is None:
+        now = datetime.now(timezone.utc)
+    wait_times = (table.minutes_until(now) - (walk_time or 0)).tolist()
+    transport_types = [product_transport_type(product) for product in table.products]
+    cleanse = provenance_normaliser()
+
+    rows = []
+    for i in np.argsort(table.when_s, kind="stable").tolist():
+        departure = table.departures[i]
+        rows.append(
+            {
+                "transport_type": transport_types[table.product_codes[i]],
+                "line": departure.line.name,
+                "when": departure.when.isoformat(),
+                "direction_symbol": SYMBOLS[table.direction_codes[i]],
+                "provenance": cleanse(departure.destination.name),
+                "wait_time": wait_times[i],
+                "departure": departure,
+            }
+        )
+    return rows
@@ -0,0 +1,159 @@
+"""Direction symbol per (stop ID, destination ID, line), computed once and kept across polls and restarts.
+
+The first time a triple is seen, `DirectionTable.resolve` runs the bearing math and the
+`utils.LINE_DIRECTIONS` overrides; after that it is one dict lookup. The table is a generation part
+tied to the stop snapshot. It is saved to `.cache/directions.json` together with the snapshot's
+sha256. On load, a file saved for another snapshot is discarded, and a reload that picks up a new
+snapshot starts a fresh table. `scripts/seed_directions.py` fills the table offline.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from .datamodels import Departure
+from .generation import current
+from .generation import register_part
+from .utils import basedir
+from .utils import bearing_to_cardinal
+from .utils import get_direction
+from .utils import get_initial_bearing
+from .vbb_api import STATIONS_PATH
+
+logger = logging.getLogger(__name__)
+
+# None keeps the table in memory only.
+DIRECTIONS_PATH: Path | None = basedir / ".cache" / "directions.json"
+
+DirectionKey = tuple[str, str, str]
+
+
+def _compute_direction(departure: Departure) -> str:
+    start = departure.stop.location
+    end = departure.destination.location
+    bearing = get_initial_bearing(start.latitude, start.longitude, end.latitude, end.longitude)
+    return get_direction(departure.line.name, bearing_to_cardinal(bearing))
+
+
+class DirectionTable:
+    """Direction symbols for one stop snapshot, written to `path` at most every `save_interval_s`.
+
+    Departures whose stop or destination has no ID are computed every time and not stored. A full
+    table is cleared rather than evicted entry by entry, as a station's triples rarely change.
+    """
+
+    def __init__(
+        self,
+        snapshot_sha256: str,
+        path: Path | None = None,
+        entries: Mapping[DirectionKey, str] | None = None,
+        max_entries: int = 4096,
+        save_interval_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.snapshot_sha256 = snapshot_sha256
+        self.path = path
+        self.max_entries = max_entries
+        self.save_interval_s = save_interval_s
+        self._clock = clock
+        self._directions: dict[DirectionKey, str] = dict(entries or {})
+        self._dirty = False
+        self._last_save = -math.inf
+        self._save_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._directions)
+
+    @classmethod
+    def load(cls, path: Path, snapshot_sha256: str, **kwargs: Any) -> "DirectionTable":
+        """The table saved at `path` if it was saved for this snapshot, otherwise an empty one."""
+        entries: dict[DirectionKey, str] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data["snapshot_sha256"] != snapshot_sha256:
+                logger.info("Discarding %s: saved for another stop snapshot", path.name)
+            else:
+                entries = {(stop, destination, line): symbol for stop, destination, line, symbol in data["directions"]}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, KeyError) as error:
+            logger.warning("Ignoring unreadable direction table %s: %s", path, error)
+        return cls(snapshot_sha256, path, entries, **kwargs)
+
+    def clear(self) -> None:
+        self._directions.clear()
+
+    def resolve(self, departure: Departure) -> str | None:
+        """Direction symbol (↑ ↓ ↻ ↺ ← →) for the departure, or None without stop/destination coordinates."""
+        stop, destination = departure.stop, departure.destination
+        if not stop or not stop.location or not destination or not destination.location:
+            return None
+        key = (stop.id, destination.id, departure.line.name)
+        symbol = self._directions.get(key)
+        if symbol is None:
+            symbol = _compute_direction(departure)
+            if stop.id and destination.id:
+                if len(self._directions) >= self.max_entries:
+                    self._directions.clear()
+                self._directions[key] = symbol
+                self._dirty = True
+                if self.path is not None and self._clock() - self._last_save >= self.save_interval_s:
+                    self.save()
+        return symbol
+
+    def save(self) -> bool:
+        """Write the table to `path` if it changed since the last save; returns whether it wrote."""
+        if self.path is None:
+            return False
+        with self._save_lock:
+            if not self._dirty:
+                return False
+            self._dirty = False
+            self._last_save = self._clock()
+            directions = [[*key, symbol] for key, symbol in self._directions.copy().items()]
+            payload = {"snapshot_sha256": self.snapshot_sha256, "directions": directions}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                partial = self.path.with_suffix(".partial")
+                partial.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+                partial.replace(self.path)
+            except OSError as error:
+                logger.warning("Could not save direction table to %s: %s", self.path, error)
+                return False
+        logger.debug("Saved %d directions to %s", len(directions), self.path)
+        return True
+
+
+def snapshot_sha256(path: Path) -> str:
+    """Hex sha256 of the stop snapshot JSON, or "" when it is missing."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return ""
+
+
+def _load_direction_table(app_config: Mapping[str, Any]) -> DirectionTable:
+    if DIRECTIONS_PATH is None:
+        return DirectionTable(snapshot_sha256(STATIONS_PATH))
+    return DirectionTable.load(DIRECTIONS_PATH, snapshot_sha256(STATIONS_PATH))
+
+
+# A new snapshot (scripts/fetch_stations.py) drops the table on the next reload.
+register_part("direction table", _load_direction_table, files=(STATIONS_PATH,), config_keys=())
+
+
+def resolve_direction(departure: Departure) -> str | None:
+    """Direction symbol for the departure from the current generation's table."""
+    return current().part("direction table").resolve(departure)
+
+
+def clear_directions() -> None:
+    """Forget the current generation's memoised directions."""
+    current().part("direction table").clear()
@@ -0,0 +1,129 @@
+"""Background stale-while-revalidate refresher for the fixed display station."""
+
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from .datamodels import Departure
+from .vbb_api import DepartureFetch
+from .vbb_api import VBBAPIError
+
+if TYPE_CHECKING:
+    from .departure_table import DepartureTable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FeedSnapshot:
+    """Last successfully fetched departures plus the error from any later failed refresh."""
+
+    departures: list[Departure]
+    fetched_at: datetime
+    error: VBBAPIError | None = None
+
+    def age_seconds(self, now: datetime) -> float:
+        """Seconds between the fetch and `now` (never negative)."""
+        return max(0.0, (now - self.fetched_at).total_seconds())
+
+    @cached_property
+    def table(self) -> "DepartureTable":
+        """Columnar view of `departures`, built on first use and shared by every request on this snapshot."""
+        from .departure_table import DepartureTable
+
+        return DepartureTable.from_departures(self.departures)
+
+
+class DepartureFeed:
+    """Keeps one stop's departures warm in memory, refreshed on its own schedule.
+
+    `latest()` answers from memory. Without a running background thread (tests, CLI) it falls back
+    to refreshing inline once the data is older than `interval_s`, so callers never see data that
+    is older than they would without the feed. Departures older than `max_stale_s` are not served
+    from a failed refresh; None keeps them indefinitely.
+    """
+
+    def __init__(
+        self, fetch: Callable[[], DepartureFetch], interval_s: float, max_stale_s: float | None = None
+    ) -> None:
+        self._fetch = fetch
+        self.interval_s = interval_s
+        self.max_stale_s = max_stale_s
+        self._snapshot: FeedSnapshot | None = None
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh(self) -> FeedSnapshot:
+        """Fetch now and swap in the result.
+
+        A failed refresh keeps the previous departures and records the error on the snapshot.
+        Raises VBBAPIError when there is nothing to fall back to, or the previous departures are
+        older than `max_stale_s` (they are then dropped).
+        """
+        with self._refresh_lock:
+            try:
+                fetch = self._fetch()
+            except VBBAPIError as error:
+                if self._snapshot is None:
+                    raise
+                if self.max_stale_s is not None:
+                    age_s = self._snapshot.age_seconds(datetime.now(timezone.utc))
+                    if age_s > self.max_stale_s:
+                        logger.warning("Display departures are %.0fs old, dropping them", age_s)
+                        self._snapshot = None
+                        raise
+                logger.warning("Display refresh failed [%s], keeping previous departures: %s", error.kind, error)
+                self._snapshot = FeedSnapshot(self._snapshot.departures, self._snapshot.fetched_at, error)
+                return self._snapshot
+            # The fetch's own time: a departure-cache hit can be older than this refresh.
+            self._snapshot = FeedSnapshot(fetch.departures, fetch.fetched_at)
+            return self._snapshot
+
+    def latest(self) -> FeedSnapshot:
+        """Return the in-memory snapshot, refreshing inline only when there is no background thread."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.refresh()
+        if not self.is_running and snapshot.age_seconds(datetime.now(timezone.utc)) >= self.interval_s:
+            return self.refresh()
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except VBBAPIError as error:
+                logger.warning("Display refresh failed [%s] with no cached departures: %s", error.kind, error)
+            except Exception:
+                logger.exception("Unexpected error refreshing display departures")
+            self._stop_event.wait(self.interval_s)
+
+    def start(self) -> None:
+        """Start the background refresher thread (idempotent)."""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="display-feed", daemon=True)
+        self._thread.start()
+        logger.info("Started display refresher (every %.0fs)", self.interval_s)
+
+    def stop(self) -> None:
+        """Stop the background thread and wait for it to exit."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s)
+        self._thread = None
+
+    def reset(self) -> None:
+        """Forget the cached snapshot so the next `latest()` fetches again."""
+        self._snapshot = None
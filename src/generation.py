@@ -0,0 +1,278 @@
+"""Hot reload of config.json and the data files derived structures are built from.
+
+A `Generation` is one parsed config plus the parts built from it and from data files (stop
+snapshot and indexes, walk-time matcher, quadrant routes). Modules register the parts they own;
+each is built on first use. `reload` builds the next generation off the request path, rebuilding
+only parts whose files or config keys changed, and swaps it in with a single assignment. Requests
+pin the generation that was current when they started (`pin`), so one request never mixes two.
+"""
+
+import contextvars
+import logging
+import signal
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from spyglass import MetricsCollector
+
+from .config import CONFIG_PATH
+from .config import PROJECT_NAME
+from .config import SPYGLASS_HOST
+from .config import app_config
+from .config import load_app_config
+from .lazy import Lazy
+
+metrics = MetricsCollector(host=SPYGLASS_HOST, project=PROJECT_NAME)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Part:
+    """A structure built from the config and/or data `files`.
+
+    It is rebuilt when one of the files changes, or when one of `config_keys` changes (any key if None).
+    """
+
+    name: str
+    build: Callable[[Mapping[str, Any]], Any]
+    files: tuple[Path, ...] = ()
+    config_keys: tuple[str, ...] | None = None
+
+
+@dataclass(frozen=True)
+class _BuiltPart:
+    lazy: Lazy
+    # Modification times of the part's files when it was created; None for a missing file.
+    mtimes: tuple[int | None, ...]
+
+
+_parts: dict[str, Part] = {}
+_restart_only: set[str] = set()
+
+
+def _mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _lookup(config: Mapping[str, Any], dotted_key: str) -> Any:
+    value: Any = config
+    for key in dotted_key.split("."):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(key)
+    return value
+
+
+class Generation:
+    """One immutable config and the parts built from it; each part is built at most once, on first use."""
+
+    def __init__(
+        self,
+        number: int,
+        config: Mapping[str, Any],
+        config_mtime: int | None,
+        inherited: Mapping[str, _BuiltPart] | None = None,
+    ) -> None:
+        self.number = number
+        self.config = config
+        self.config_mtime = config_mtime
+        self._built: dict[str, _BuiltPart] = dict(inherited or {})
+        self._lock = threading.Lock()
+
+    def _create(self, part: Part) -> _BuiltPart:
+        mtimes = tuple(_mtime(path) for path in part.files)
+        # Only the startup generation's parts are tracked, so `config --startup` lists each once.
+        lazy = Lazy(part.name, lambda: part.build(self.config), track=self.number == 1)
+        return _BuiltPart(lazy, mtimes)
+
+    def _built_part(self, name: str) -> _BuiltPart:
+        built = self._built.get(name)
+        if built is None:
+            with self._lock:
+                built = self._built.get(name)
+                if built is None:
+                    built = self._built[name] = self._create(_parts[name])
+        return built
+
+    def part(self, name: str) -> Any:
+        """The part registered as `name`, built for this generation on first use."""
+        return self._built_part(name).lazy.get()
+
+    def built_parts(self) -> dict[str, _BuiltPart]:
+        with self._lock:
+            return {name: built for name, built in self._built.items() if built.lazy.loaded}
+
+
+_current = Generation(1, app_config, _mtime(CONFIG_PATH))
+_pinned: contextvars.ContextVar[Generation | None] = contextvars.ContextVar("generation", default=None)
+_reload_lock = threading.Lock()
+
+
+def register_part(
+    name: str,
+    build: Callable[[Mapping[str, Any]], Any],
+    files: tuple[Path, ...] = (),
+    config_keys: tuple[str, ...] | None = None,
+) -> None:
+    """Declare a part; it is built lazily in every generation that uses it."""
+    _parts[name] = Part(name, build, tuple(files), config_keys)
+    _current._built_part(name)
+
+
+def restart_only(*keys: str) -> None:
+    """Declare config keys (dotted for nested ones) read once at startup; reloading a change logs a warning."""
+    _restart_only.update(keys)
+
+
+def current() -> Generation:
+    """The generation pinned for this request, or the latest one outside a request."""
+    return _pinned.get() or _current
+
+
+def pin() -> contextvars.Token:
+    """Pin the latest generation for the current context (request); pair with `unpin`."""
+    return _pinned.set(_current)
+
+
+def unpin(token: contextvars.Token) -> None:
+    _pinned.reset(token)
+
+
+class LiveConfig(Mapping):
+    """Read-only view of `current().config`, for modules that read config on the request path."""
+
+    def __getitem__(self, key: str) -> Any:
+        return current().config[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(current().config)
+
+    def __len__(self) -> int:
+        return len(current().config)
+
+
+config = LiveConfig()
+
+
+def _stale_parts(generation: Generation, old_config: Mapping[str, Any], new_config: Mapping[str, Any]) -> list[str]:
+    stale = []
+    for name, built in generation.built_parts().items():
+        part = _parts[name]
+        if part.config_keys is None:
+            config_changed = new_config != old_config
+        else:
+            config_changed = any(new_config.get(key) != old_config.get(key) for key in part.config_keys)
+        if config_changed or built.mtimes != tuple(_mtime(path) for path in part.files):
+            stale.append(name)
+    return stale
+
+
+def needs_reload() -> bool:
+    """Whether config.json or a file behind a built part changed since the latest generation."""
+    generation = _current
+    if _mtime(CONFIG_PATH) != generation.config_mtime:
+        return True
+    return bool(_stale_parts(generation, generation.config, generation.config))
+
+
+def reload(trigger: str = "manual", force: bool = False) -> Generation | None:
+    """Build the next generation and swap it in; returns None if nothing changed or the build failed.
+
+    `force` re-reads config.json and rebuilds every built part regardless of modification times.
+    Parts the latest generation never built are left to be built on first use.
+    """
+    global _current
+    with _reload_lock:
+        old = _current
+        start = time.perf_counter()
+        try:
+            config_mtime = _mtime(CONFIG_PATH)
+            new_config = load_app_config(CONFIG_PATH) if force or config_mtime != old.config_mtime else old.config
+            built = old.built_parts()
+            stale = list(built) if force else _stale_parts(old, old.config, new_config)
+            if not stale and new_config == old.config:
+                # Touched but unchanged: remember the new mtime so the watcher stops reporting it.
+                old.config_mtime = config_mtime
+                return None
+            inherited = {name: part for name, part in built.items() if name not in stale}
+            new = Generation(old.number + 1, new_config, config_mtime, inherited)
+            for name in stale:
+                new.part(name)
+        except Exception:
+            logger.exception("Reload (%s) failed; keeping generation %d", trigger, old.number)
+            metrics.increment("reload", tags={"outcome": "failed", "trigger": trigger})
+            return None
+        _current = new
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    changed_keys = sorted(
+        key for key in new_config.keys() | old.config.keys() if new_config.get(key) != old.config.get(key)
+    )
+    logger.info(
+        "Reloaded generation %d (%s) in %.0f ms: config keys changed %s, rebuilt %s",
+        new.number,
+        trigger,
+        elapsed_ms,
+        changed_keys or "none",
+        stale or "nothing",
+    )
+    needs_restart = sorted(key for key in _restart_only if _lookup(new_config, key) != _lookup(old.config, key))
+    if needs_restart:
+        logger.warning("Config keys %s changed but only take effect after a restart", needs_restart)
+    metrics.increment("reload", tags={"outcome": "ok", "trigger": trigger})
+    metrics.timing("reload.duration_ms", elapsed_ms)
+    metrics.gauge("reload.generation", new.number)
+    return new
+
+
+class ReloadWatcher:
+    """Background thread reloading when watched files change (polled every `interval_s`) or on SIGHUP.
+
+    `interval_s` of 0 disables polling; SIGHUP (`systemctl reload`) always forces a full reload.
+    """
+
+    def __init__(self, interval_s: float) -> None:
+        self.interval_s = interval_s
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._sighup = False
+        self._thread: threading.Thread | None = None
+
+    def start(self, handle_sighup: bool = True) -> None:
+        if handle_sighup and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, self._on_sighup)
+        self._thread = threading.Thread(target=self._run, name="reload-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _on_sighup(self, signum, frame) -> None:
+        # Signal handlers run on the main thread; the rebuild happens on the watcher thread.
+        self._sighup = True
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake.wait(self.interval_s or None)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                return
+            if self._sighup:
+                self._sighup = False
+                reload("sighup", force=True)
+            elif self.interval_s and needs_reload():
+                reload("mtime")
@@ -0,0 +1,60 @@
+"""Deferred one-time initialisation, so importing the app does not pay for work a request may never need."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Generic
+from typing import TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_registry: list["Lazy"] = []
+
+
+class Lazy(Generic[T]):
+    """Runs `factory` on the first `get()` and returns the same object afterwards.
+
+    Thread-safe: concurrent first callers wait for one factory run. A failing factory is retried on
+    the next `get()`. Instances are registered (unless `track=False`), so `config --startup` can
+    report what was deferred and what initialising it costs.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T], track: bool = True) -> None:
+        self.name = name
+        self._factory = factory
+        self._value: T | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.init_seconds: float | None = None
+        if track:
+            _registry.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                self._value = self._factory()
+                self.init_seconds = time.perf_counter() - start
+                self._loaded = True
+                logger.info("Initialised %s in %.0f ms", self.name, self.init_seconds * 1000)
+        return self._value
+
+    def reset(self) -> None:
+        """Drop the value; the next `get()` runs the factory again."""
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+
+def registered() -> list[Lazy]:
+    """Every Lazy created so far, in creation order."""
+    return list(_registry)
@@ -0,0 +1,132 @@
+"""Precomputed nearest stops for every ~100 m cell of the service area, memory-mapped at runtime.
+
+Built offline by scripts/build_nearby_table.py from the stop snapshot. Layout (little-endian):
+
+    header     magic "VBBN", version, sha256 of the source JSON, stop count, limit, radius,
+               first cell (lat, lon) and grid shape (rows, cols), total entries
+    offsets    uint32 per cell + 1: cell i's stops are entries offsets[i]..offsets[i + 1]
+    positions  uint16 snapshot position per entry, nearest first (ties in snapshot order)
+    meters     uint16 rounded distance per entry
+
+Cells are the coordinates rounded to `CELL_DECIMALS`, the same cells `vbb_api.NearbyStops` memoises;
+each list is the `StopTable.nearest_positions` ranking from the cell's rounded coordinates.
+"""
+
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from .stop_snapshot import SnapshotFormatError
+from .stop_table import StopTable
+
+MAGIC = b"VBBN"
+VERSION = 1
+CELL_DECIMALS = 3
+_CELL_SCALE = 10**CELL_DECIMALS
+_HEADER = struct.Struct("<4sH32sIHdiiIII")
+HEADER_SIZE = _HEADER.size
+_MAX_UINT16 = np.iinfo(np.uint16).max
+
+
+def cell_index(value: float) -> int:
+    """Integer cell coordinate of a latitude or longitude (rounded like `round(value, CELL_DECIMALS)`)."""
+    return int(round(round(value, CELL_DECIMALS) * _CELL_SCALE))
+
+
+def cell_center(index: int) -> float:
+    """The rounded coordinate of a cell; equal to `round(value, CELL_DECIMALS)` for any value in it."""
+    return index / _CELL_SCALE
+
+
+def encode_nearby_table(
+    table: StopTable,
+    bbox: tuple[float, float, float, float],
+    limit: int,
+    radius_m: float,
+    source_sha256: bytes,
+) -> bytes:
+    """Rank every cell in `bbox` (min_lat, max_lat, min_lon, max_lon) and serialise the result."""
+    if len(table) > _MAX_UINT16 or radius_m >= _MAX_UINT16:
+        raise ValueError("stop positions and distances must fit in uint16")
+    min_lat, max_lat, min_lon, max_lon = bbox
+    lat0, lon0 = cell_index(min_lat), cell_index(min_lon)
+    rows, cols = cell_index(max_lat) - lat0 + 1, cell_index(max_lon) - lon0 + 1
+
+    offsets = np.zeros(rows * cols + 1, dtype=np.uint32)
+    positions: list[np.ndarray] = []
+    meters: list[np.ndarray] = []
+    for row in range(rows):
+        latitude = cell_center(lat0 + row)
+        for col in range(cols):
+            cell_positions, cell_meters = table.nearest_positions(latitude, cell_center(lon0 + col), limit, radius_m)
+            positions.append(cell_positions.astype(np.uint16))
+            meters.append(np.round(cell_meters).astype(np.uint16))
+            offsets[row * cols + col + 1] = offsets[row * cols + col] + len(cell_positions)
+
+    all_positions = np.concatenate(positions) if positions else np.zeros(0, dtype=np.uint16)
+    all_meters = np.concatenate(meters) if meters else np.zeros(0, dtype=np.uint16)
+    header = _HEADER.pack(
+        MAGIC, VERSION, source_sha256, len(table), limit, radius_m, lat0, lon0, rows, cols, len(all_positions)
+    )
+    return (
+        header
+        + offsets.astype("<u4").tobytes()
+        + all_positions.astype("<u2").tobytes()
+        + all_meters.astype("<u2").tobytes()
+    )
+
+
+class NearbyTable:
+    """Memory-mapped precomputed table; `lookup` is one offsets read and two slices."""
+
+    def __init__(self, path: Path, expected_sha256: bytes | None = None) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+                raise SnapshotFormatError(f"{path} is truncated")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.source_sha256,
+            self.stop_count,
+            self.limit,
+            self.radius_m,
+            self._lat0,
+            self._lon0,
+            self._rows,
+            self._cols,
+            entries,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotFormatError(f"{path} is not a version {VERSION} nearby-stops table")
+        if expected_sha256 is not None and self.source_sha256 != expected_sha256:
+            raise SnapshotFormatError(f"{path} was built from a different vbb_stations.json")
+        cells = self._rows * self._cols
+        if HEADER_SIZE + (cells + 1) * 4 + entries * 4 != len(self._mmap):
+            raise SnapshotFormatError(f"{path} is corrupt")
+        self._offsets = np.frombuffer(self._mmap, dtype="<u4", count=cells + 1, offset=HEADER_SIZE)
+        positions_offset = HEADER_SIZE + (cells + 1) * 4
+        self._positions = np.frombuffer(self._mmap, dtype="<u2", count=entries, offset=positions_offset)
+        self._meters = np.frombuffer(self._mmap, dtype="<u2", count=entries, offset=positions_offset + entries * 2)
+
+    def __len__(self) -> int:
+        """Number of cells."""
+        return self._rows * self._cols
+
+    def covers(self, limit: int, radius_m: float) -> bool:
+        """Whether the stored lists answer queries with this limit and radius."""
+        return limit <= self.limit and radius_m == self.radius_m
+
+    def lookup(self, latitude: float, longitude: float, limit: int) -> tuple[np.ndarray, np.ndarray] | None:
+        """(positions, meters) of the point's cell, nearest first; None outside the table's area."""
+        row, col = cell_index(latitude) - self._lat0, cell_index(longitude) - self._lon0
+        if not (0 <= row < self._rows and 0 <= col < self._cols):
+            return None
+        cell = row * self._cols + col
+        start, end = int(self._offsets[cell]), int(self._offsets[cell + 1])
+        end = min(end, start + limit)
+        return self._positions[start:end].astype(np.intp), self._meters[start:end].astype(np.float64)
@@ -0,0 +1,138 @@
+"""Destination-name cleansing: rewrite rules as data, compiled into regexes, results memoised per name.
+
+Rules come in two stages, applied in order:
+- `alternatives`: only the highest-priority rule whose text occurs is applied (station suffixes);
+- `always`: every rule is applied, in one left-to-right pass (line prefixes, noise).
+Rules from `provenance_rules` in config.json run before the built-in ones of the same stage. The
+normaliser is a generation part, so one memo is shared by every caller in the process. A config
+change rebuilds it with a fresh memo.
+"""
+
+import logging
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from spyglass import MetricsCollector
+
+from .config import PROJECT_NAME
+from .config import SPYGLASS_HOST
+from .generation import current
+from .generation import register_part
+
+metrics = MetricsCollector(host=SPYGLASS_HOST, project=PROJECT_NAME)
+
+logger = logging.getLogger(__name__)
+
+Rule = tuple[str, str]  # (text to find, replacement)
+
+
+@dataclass(frozen=True)
+class ProvenanceRules:
+    alternatives: tuple[Rule, ...]
+    always: tuple[Rule, ...]
+
+    @classmethod
+    def from_config(cls, app_config: Mapping[str, Any]) -> "ProvenanceRules":
+        """Config rules (`{"alternatives": [[find, replace], ...], "always": [...]}`) followed by the built-ins."""
+        extra = app_config.get("provenance_rules", {})
+        return cls(
+            alternatives=tuple((find, replace) for find, replace in extra.get("alternatives", ()))
+            + BUILTIN_RULES.alternatives,
+            always=tuple((find, replace) for find, replace in extra.get("always", ())) + BUILTIN_RULES.always,
+        )
+
+
+BUILTIN_RULES = ProvenanceRules(
+    alternatives=(("Hauptbahnhof", "HBF"), (", Bahnhof", ""), ("(Berlin)", ""), ("Bhf", "")),
+    always=(("S+U", ""), ("(TF)", ""), ("S ", ""), ("U ", ""), ("[Gleis 1-8]", "")),
+)
+
+
+def _alternation(rules: tuple[Rule, ...]) -> re.Pattern | None:
+    # Listed order doubles as priority where two rules match at the same position.
+    return re.compile("|".join(re.escape(find) for find, _ in rules)) if rules else None
+
+
+class ProvenanceNormaliser:
+    """Compiled `ProvenanceRules` with a bounded memo of cleansed names.
+
+    A full memo is cleared rather than evicted entry by entry; the network's destination names
+    are a small, stable set. `hits` and `misses` count memo lookups (approximately, under
+    concurrent callers). Every `report_every` lookups the hit ratio since the previous report is
+    sent as a gauge.
+    """
+
+    def __init__(self, rules: ProvenanceRules, max_entries: int = 4096, report_every: int = 1000) -> None:
+        self.rules = rules
+        self.max_entries = max_entries
+        self.report_every = report_every
+        self._alternatives_re = _alternation(rules.alternatives)
+        self._always_re = _alternation(rules.always)
+        # First listing of a text wins: its priority and replacement.
+        self._alternatives: dict[str, tuple[int, str]] = {}
+        for rank, (find, replace) in enumerate(rules.alternatives):
+            self._alternatives.setdefault(find, (rank, replace))
+        self._always: dict[str, str] = {}
+        for find, replace in rules.always:
+            self._always.setdefault(find, replace)
+        self._memo: dict[tuple[str, int], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._reported = (0, 0)
+        self._until_report = report_every
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def rewrite(self, name: str) -> str:
+        """Apply the rules to `name`, without memo or truncation."""
+        if self._alternatives_re is not None:
+            found = self._alternatives_re.findall(name)
+            if found:
+                find = min(found, key=lambda text: self._alternatives[text][0])
+                name = name.replace(find, self._alternatives[find][1])
+        if self._always_re is not None:
+            name = self._always_re.sub(lambda match: self._always[match.group()], name)
+        return name
+
+    def __call__(self, name: str, max_length: int = 28) -> str:
+        cleansed = self._memo.get((name, max_length))
+        if cleansed is None:
+            self.misses += 1
+            cleansed = self.rewrite(name)[:max_length].strip()
+            if len(self._memo) >= self.max_entries:
+                self._memo.clear()
+            self._memo[name, max_length] = cleansed
+        else:
+            self.hits += 1
+        self._until_report -= 1
+        if not self._until_report:
+            self._report()
+        return cleansed
+
+    def _report(self) -> None:
+        self._until_report = self.report_every
+        hits, misses = self.hits - self._reported[0], self.misses - self._reported[1]
+        self._reported = (self.hits, self.misses)
+        if hits + misses:
+            metrics.gauge("provenance_cache.hit_ratio", hits / (hits + misses))
+            metrics.gauge("provenance_cache.entries", len(self._memo))
+
+
+def _build_normaliser(app_config: Mapping[str, Any]) -> ProvenanceNormaliser:
+    rules = ProvenanceRules.from_config(app_config)
+    normaliser = ProvenanceNormaliser(rules, max_entries=int(app_config.get("provenance_cache_max_entries", 4096)))
+    logger.debug("Compiled %d provenance rules", len(rules.alternatives) + len(rules.always))
+    return normaliser
+
+
+register_part(
+    "provenance normaliser", _build_normaliser, config_keys=("provenance_rules", "provenance_cache_max_entries")
+)
+
+
+def provenance_normaliser() -> ProvenanceNormaliser:
+    """The current generation's normaliser; loops fetch it once rather than per name."""
+    return current().part("provenance normaliser")
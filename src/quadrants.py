@@ -1,12 +1,13 @@
 """Departure grouping logic for the quadrant-based display."""
 
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
+from types import MappingProxyType
 
 from .datamodels import Departure
-from .utils import bearing_to_cardinal
-from .utils import get_direction
-from .utils import get_initial_bearing
+from .direction_table import resolve_direction
+from .provenance import provenance_normaliser
 
 
 @dataclass(frozen=True)
@@ -29,14 +30,27 @@ class QuadrantData:
     departures: list[DepartureSlot]
 
 
+@dataclass(frozen=True)
+class QuadrantRoutes:
+    """Quadrant key per (line, direction), compiled from the quadrants config; the first listed quadrant wins."""
+
+    by_line_direction: Mapping[tuple[str, str], str]
+
+    @classmethod
+    def from_config(cls, quadrants_config: list[dict]) -> "QuadrantRoutes":
+        routes: dict[tuple[str, str], str] = {}
+        for q in quadrants_config:
+            for line in q["lines"]:
+                routes.setdefault((line, q["direction"]), q["key"])
+        return cls(MappingProxyType(routes))
+
+    def route(self, line: str, direction: str) -> str | None:
+        return self.by_line_direction.get((line, direction))
+
+
 def compute_direction(dep: Departure) -> str | None:
     """Return direction symbol (↑ ↓ ↻ ↺ ← →) from departure bearing and line, or None if unknown."""
-    if not dep.stop or not dep.stop.location or not dep.destination or not dep.destination.location:
-        return None
-    start = dep.stop.location
-    end = dep.destination.location
-    bearing = get_initial_bearing(start.latitude, start.longitude, end.latitude, end.longitude)
-    return get_direction(dep.line.name, bearing_to_cardinal(bearing))
+    return resolve_direction(dep)
 
 
 def filter_and_group(
@@ -45,6 +59,7 @@ def filter_and_group(
     quadrants_config: list[dict],
     min_minutes: int = 5,
     max_per_quadrant: int | None = None,
+    routes: QuadrantRoutes | None = None,
 ) -> list[QuadrantData]:
     """Filter departures by min_minutes and group into quadrants per config.
 
@@ -55,12 +70,15 @@ def filter_and_group(
         min_minutes: Departures with fewer remaining minutes are excluded.
         max_per_quadrant: Maximum departures kept per quadrant (sorted by soonest first).
             None keeps every matching departure.
+        routes: `QuadrantRoutes` compiled from quadrants_config; compiled per call when None.
 
     Returns:
-        One QuadrantData per config entry, in the same order as quadrants_config.
+        One QuadrantData per config entry, in the same order as quadrants_config. Slot provenances
+        are cleansed by the shared `provenance_normaliser` (None when VBB sends none).
     """
-    lines_by_key = {q["key"]: set(q["lines"]) for q in quadrants_config}
-    direction_by_key = {q["key"]: q["direction"] for q in quadrants_config}
+    if routes is None:
+        routes = QuadrantRoutes.from_config(quadrants_config)
+    cleanse = provenance_normaliser()
     groups: dict[str, list[DepartureSlot]] = {q["key"]: [] for q in quadrants_config}
 
     for dep in departures:
@@ -76,17 +94,16 @@ def filter_and_group(
         if not dep.tripId:
             raise ValueError(f"Departure missing tripId for line {line!r}")
 
-        for key, lines in lines_by_key.items():
-            if line in lines and direction_by_key[key] == direction:
-                groups[key].append(
-                    DepartureSlot(
-                        tripId=dep.tripId,
-                        minutes=minutes,
-                        line=line,
-                        provenance=dep.provenance,
-                    )
+        key = routes.route(line, direction)
+        if key is not None:
+            groups[key].append(
+                DepartureSlot(
+                    tripId=dep.tripId,
+                    minutes=minutes,
+                    line=line,
+                    provenance=cleanse(dep.provenance) if dep.provenance else dep.provenance,
                 )
-                break
+            )
 
     for key in groups:
         ordered = sorted(groups[key], key=lambda s: s.minutes)
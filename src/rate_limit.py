@@ -0,0 +1,37 @@
+"""Token-bucket rate limiting for callers that share one upstream budget across threads."""
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class TokenBucket:
+    """Blocking rate limiter: callers queue for tokens, like requests backing up at a saturated upstream."""
+
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_s)
+            self._updated_at = now
+            # Reserve the token now (possibly going negative) so queued callers are served in order.
+            self._tokens -= 1
+            wait_s = -self._tokens / self.rate_per_s if self._tokens < 0 else 0.0
+        if wait_s:
+            self._sleep(wait_s)
+        return wait_s
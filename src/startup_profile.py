@@ -0,0 +1,90 @@
+"""Import-time breakdown of the Flask app, to track systemd restart → first-response time on the Pi.
+
+Runs `python -X importtime` in a fresh interpreter (imports are cached per process, so the current
+one cannot be measured), then forces every deferred `Lazy` to report what first use costs.
+"""
+
+import json
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import {module}
+import_ms = (time.perf_counter() - start) * 1000
+from src.lazy import registered
+deferred = []
+for lazy in registered():
+    try:
+        lazy.get()
+    except Exception as error:
+        deferred.append({{"name": lazy.name, "error": f"{{type(error).__name__}}: {{error}}"}})
+    else:
+        deferred.append({{"name": lazy.name, "ms": lazy.init_seconds * 1000}})
+print(json.dumps({{"import_ms": import_ms, "deferred": deferred}}))
+"""
+
+# "import time:       412 |       1234 |   flask.app"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass(frozen=True)
+class StartupProfile:
+    module: str
+    import_ms: float
+    # Modules imported directly by `module`, with cumulative milliseconds, slowest first.
+    imports: list[tuple[str, float]]
+    # One dict per registered Lazy: {"name", "ms"} or {"name", "error"}.
+    deferred: list[dict]
+
+
+def parse_importtime(stderr: str, module: str) -> list[tuple[str, float]]:
+    """Direct imports of `module` from `-X importtime` output as (name, cumulative ms), slowest first.
+
+    Children are printed before their parent, one indent level deeper, so the direct imports are
+    the lines at the module's depth + 1 that precede it since the previous line at its depth.
+    """
+    children: list[tuple[int, str, float]] = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_us, indent, name = int(match.group(2)), len(match.group(3)) - 1, match.group(4)
+        depth = indent // 2
+        if name == module:
+            direct = [(child, ms) for child_depth, child, ms in children if child_depth == depth + 1]
+            return sorted(direct, key=lambda item: item[1], reverse=True)
+        if depth == 0:
+            children = []
+        else:
+            children.append((depth, name, cumulative_us / 1000))
+    return []
+
+
+def profile_startup(module: str = "src.app") -> StartupProfile:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        cwd=_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    return StartupProfile(module, summary["import_ms"], parse_importtime(result.stderr, module), summary["deferred"])
+
+
+def format_profile(profile: StartupProfile, top: int = 15) -> list[str]:
+    lines = [f"import {profile.module}: {profile.import_ms:.0f} ms"]
+    for name, ms in profile.imports[:top]:
+        lines.append(f"  {name:<40} {ms:7.1f} ms")
+    lines.append("deferred until first use:")
+    for entry in profile.deferred:
+        cost = f"{entry['ms']:7.1f} ms" if "ms" in entry else f"failed ({entry['error']})"
+        lines.append(f"  {entry['name']:<40} {cost}")
+    return lines
@@ -0,0 +1,83 @@
+"""Uniform lat/lon grid over the stop snapshot for radius + top-k nearest-stop queries."""
+
+import heapq
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+from collections.abc import Sequence
+
+EARTH_RADIUS_M = 6_371_000
+# ~1.1 km north-south, ~0.7 km east-west at Berlin's latitude: a 1.5 km radius touches ~20 cells.
+DEFAULT_CELL_DEG = 0.01
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two WGS84 points in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlam = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class StopGridIndex:
+    """Buckets snapshot stops into `cell_deg` grid cells once, at load time.
+
+    `nearest` only measures stops in cells that can hold a point within the radius, then keeps the
+    closest `limit` with a bounded heap. Ties keep snapshot order, so results match a full stable
+    sort by distance exactly.
+    """
+
+    def __init__(
+        self,
+        stops: Sequence[dict],
+        cell_deg: float = DEFAULT_CELL_DEG,
+        coordinates: Iterable[tuple[float, float]] | None = None,
+    ) -> None:
+        """`coordinates` (latitude, longitude per stop) avoids reading each stop dict when already columnar."""
+        self.stops = stops
+        self.cell_deg = cell_deg
+        if coordinates is None:
+            coordinates = ((stop["location"]["latitude"], stop["location"]["longitude"]) for stop in stops)
+        self._cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for position, (latitude, longitude) in enumerate(coordinates):
+            self._cells[self._cell(latitude, longitude)].append(position)
+
+    def __len__(self) -> int:
+        return len(self.stops)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    def candidates(self, latitude: float, longitude: float, radius_m: float) -> list[int] | None:
+        """Snapshot positions of every stop that may lie within `radius_m`; None when that is every stop."""
+        angular = radius_m / EARTH_RADIUS_M
+        dlat = math.degrees(angular)
+        # Widest longitude span of a spherical cap (exact, not the small-angle approximation).
+        cos_lat = math.cos(math.radians(latitude))
+        if angular >= math.pi / 2 or abs(latitude) + dlat >= 90 or math.sin(angular) >= cos_lat:
+            return None
+        dlon = math.degrees(math.asin(math.sin(angular) / cos_lat))
+
+        row_lo, col_lo = self._cell(latitude - dlat, longitude - dlon)
+        row_hi, col_hi = self._cell(latitude + dlat, longitude + dlon)
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) >= len(self._cells):
+            return None
+        return [
+            position
+            for row in range(row_lo, row_hi + 1)
+            for col in range(col_lo, col_hi + 1)
+            for position in self._cells.get((row, col), ())
+        ]
+
+    def nearest(self, latitude: float, longitude: float, limit: int, radius_m: float) -> list[tuple[float, dict]]:
+        """Closest `limit` stops within `radius_m` as (meters, stop), nearest first."""
+        # (meters, position) tuples: equal distances fall back to snapshot order, as in a stable sort.
+        ranked = []
+        positions = self.candidates(latitude, longitude, radius_m)
+        for position in range(len(self.stops)) if positions is None else positions:
+            loc = self.stops[position]["location"]
+            meters = haversine_meters(latitude, longitude, loc["latitude"], loc["longitude"])
+            if meters <= radius_m:
+                ranked.append((meters, position))
+        return [(meters, self.stops[position]) for meters, position in heapq.nsmallest(limit, ranked)]
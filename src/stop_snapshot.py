@@ -0,0 +1,160 @@
+"""Compact binary stop snapshot, memory-mapped at runtime and decoded one stop at a time.
+
+Layout (little-endian), written by scripts/fetch_stations.py next to vbb_stations.json:
+
+    header   magic "VBBS", version, stop count, sha256 of the source JSON, string table offset
+    records  one fixed-width `RECORD_DTYPE` row per stop: coordinates, product bitmask, type code,
+             and (offset, length) references into the string table for id, name, DHID, location id
+    strings  UTF-8 string table (deduplicated)
+
+The JSON stays the human-readable source of truth; the header hash ties a binary file to the
+exact JSON it was built from, so a stale .bin is ignored rather than served.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+from .stop_table import PRODUCT_BITS
+from .stop_table import product_mask
+
+MAGIC = b"VBBS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHI32sQ")
+HEADER_SIZE = _HEADER.size
+STOP_TYPES = ("stop", "station")
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("latitude", "<f8"),
+        ("longitude", "<f8"),
+        ("products", "u1"),
+        ("type", "u1"),
+        ("id_offset", "<u4"),
+        ("id_length", "<u2"),
+        ("name_offset", "<u4"),
+        ("name_length", "<u2"),
+        ("dhid_offset", "<u4"),
+        ("dhid_length", "<u2"),
+        ("location_id_offset", "<u4"),
+        ("location_id_length", "<u2"),
+    ]
+)
+
+
+class SnapshotFormatError(ValueError):
+    """The binary snapshot is missing, corrupt, from another format version or built from different JSON."""
+
+
+def source_digest(json_bytes: bytes) -> bytes:
+    return hashlib.sha256(json_bytes).digest()
+
+
+def encode_snapshot(stops: list[dict], source_sha256: bytes) -> bytes:
+    """Serialise snapshot stop dicts (as produced by fetch_stations.py) into the binary format."""
+    strings = bytearray()
+    string_refs: dict[str, tuple[int, int]] = {}
+
+    def ref(value: str) -> tuple[int, int]:
+        if value not in string_refs:
+            encoded = value.encode("utf-8")
+            string_refs[value] = (len(strings), len(encoded))
+            strings.extend(encoded)
+        return string_refs[value]
+
+    records = np.zeros(len(stops), dtype=RECORD_DTYPE)
+    for row, stop in zip(records, stops):
+        location = stop["location"]
+        row["latitude"] = location["latitude"]
+        row["longitude"] = location["longitude"]
+        row["products"] = product_mask(stop["products"])
+        row["type"] = STOP_TYPES.index(stop["type"])
+        row["id_offset"], row["id_length"] = ref(stop["id"])
+        row["name_offset"], row["name_length"] = ref(stop["name"])
+        row["dhid_offset"], row["dhid_length"] = ref(stop.get("stationDHID", ""))
+        row["location_id_offset"], row["location_id_length"] = ref(location.get("id", ""))
+
+    strings_offset = HEADER_SIZE + records.nbytes
+    header = _HEADER.pack(MAGIC, VERSION, len(stops), source_sha256, strings_offset)
+    return header + records.tobytes() + bytes(strings)
+
+
+def write_binary_snapshot(stops: list[dict], path: Path, source_json: bytes) -> None:
+    path.write_bytes(encode_snapshot(stops, source_digest(source_json)))
+
+
+class _StringColumn(Sequence):
+    """Read-only sequence of one string field, decoded from the string table on access."""
+
+    def __init__(self, snapshot: "BinarySnapshot", field: str) -> None:
+        self._snapshot = snapshot
+        self._offsets = snapshot.records[f"{field}_offset"]
+        self._lengths = snapshot.records[f"{field}_length"]
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        return self._snapshot._string(int(self._offsets[position]), int(self._lengths[position]))
+
+
+class BinarySnapshot(Sequence):
+    """Memory-mapped binary snapshot behaving as a read-only sequence of stop dicts.
+
+    Coordinates and product bitmasks are exposed as NumPy views over the mapping (`records`);
+    a stop's dict is only built when it is indexed.
+    """
+
+    def __init__(self, path: Path, expected_sha256: bytes | None = None) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+                raise SnapshotFormatError(f"{path} is truncated")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, self.source_sha256, strings_offset = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotFormatError(f"{path} is not a version {VERSION} stop snapshot")
+        if expected_sha256 is not None and self.source_sha256 != expected_sha256:
+            raise SnapshotFormatError(f"{path} was built from a different vbb_stations.json")
+        if strings_offset != HEADER_SIZE + count * RECORD_DTYPE.itemsize or strings_offset > len(self._mmap):
+            raise SnapshotFormatError(f"{path} is corrupt")
+        self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+        self._strings = memoryview(self._mmap)[strings_offset:]
+        self.ids = _StringColumn(self, "id")
+        self.names = _StringColumn(self, "name")
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _string(self, offset: int, length: int) -> str:
+        return str(self._strings[offset : offset + length], "utf-8")
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        row = self.records[position]
+        mask = int(row["products"])
+        return {
+            "type": STOP_TYPES[row["type"]],
+            "id": self._string(int(row["id_offset"]), int(row["id_length"])),
+            "name": self._string(int(row["name_offset"]), int(row["name_length"])),
+            "location": {
+                "type": "location",
+                "id": self._string(int(row["location_id_offset"]), int(row["location_id_length"])),
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+            },
+            "products": {name: bool(mask & bit) for name, bit in PRODUCT_BITS.items()},
+            "stationDHID": self._string(int(row["dhid_offset"]), int(row["dhid_length"])),
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self[i] for i in range(len(self)))
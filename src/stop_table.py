@@ -0,0 +1,129 @@
+"""Columnar NumPy view of the stop snapshot for vectorised distance ranking."""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from .stop_index import DEFAULT_CELL_DEG
+from .stop_index import EARTH_RADIUS_M
+from .stop_index import StopGridIndex
+
+# Bit per `Products` field, in dataclass order.
+PRODUCT_BITS = {
+    "suburban": 1 << 0,
+    "subway": 1 << 1,
+    "tram": 1 << 2,
+    "bus": 1 << 3,
+    "ferry": 1 << 4,
+    "express": 1 << 5,
+    "regional": 1 << 6,
+}
+
+
+def product_mask(products: dict) -> int:
+    """Bitmask of the products a stop is served by."""
+    return sum(bit for name, bit in PRODUCT_BITS.items() if products.get(name))
+
+
+class StopTable:
+    """Snapshot stops as parallel arrays: coordinates and product bitmasks in NumPy, ids and names as sequences.
+
+    `nearest` takes the candidate cells from a `StopGridIndex`, computes their distances in one
+    vectorised haversine and selects the top `limit` with `argpartition`, instead of building a
+    (meters, dict) tuple per stop.
+    """
+
+    def __init__(self, stops: Sequence[dict], cell_deg: float = DEFAULT_CELL_DEG) -> None:
+        self._set_columns(
+            stops,
+            ids=[stop["id"] for stop in stops],
+            names=[stop["name"] for stop in stops],
+            latitudes=np.array([stop["location"]["latitude"] for stop in stops], dtype=np.float64),
+            longitudes=np.array([stop["location"]["longitude"] for stop in stops], dtype=np.float64),
+            products=np.array([product_mask(stop["products"]) for stop in stops], dtype=np.uint8),
+            cell_deg=cell_deg,
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        stops: Sequence[dict],
+        ids: Sequence[str],
+        names: Sequence[str],
+        records: np.ndarray,
+        cell_deg: float = DEFAULT_CELL_DEG,
+    ) -> "StopTable":
+        """Build from ready-made columns (a memory-mapped `BinarySnapshot`) without materialising stop dicts."""
+        table = cls.__new__(cls)
+        table._set_columns(stops, ids, names, records["latitude"], records["longitude"], records["products"], cell_deg)
+        return table
+
+    def _set_columns(
+        self,
+        stops: Sequence[dict],
+        ids: Sequence[str],
+        names: Sequence[str],
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        products: np.ndarray,
+        cell_deg: float,
+    ) -> None:
+        self.stops = stops
+        self.ids = ids
+        self.names = names
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.products = products
+        self.index = StopGridIndex(stops, cell_deg, coordinates=zip(latitudes.tolist(), longitudes.tolist()))
+        self._phi = np.radians(latitudes)
+        self._cos_phi = np.cos(self._phi)
+        self._lam = np.radians(longitudes)
+
+    def __len__(self) -> int:
+        return len(self.stops)
+
+    def distances(self, latitude: float, longitude: float, positions: np.ndarray | None = None) -> np.ndarray:
+        """Haversine meters from the point to the stops at `positions` (default: every stop, in snapshot order)."""
+        stop_phi, cos_stop_phi, stop_lam = self._phi, self._cos_phi, self._lam
+        if positions is not None:
+            stop_phi, cos_stop_phi, stop_lam = stop_phi[positions], cos_stop_phi[positions], stop_lam[positions]
+        phi = np.radians(latitude)
+        a = (
+            np.sin((stop_phi - phi) / 2) ** 2
+            + np.cos(phi) * cos_stop_phi * np.sin((stop_lam - np.radians(longitude)) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+    def nearest_positions(
+        self, latitude: float, longitude: float, limit: int, radius_m: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(positions, meters) of the closest `limit` stops within `radius_m`, nearest first.
+
+        Equal distances keep snapshot order, like a stable sort.
+        """
+        candidates = self.index.candidates(latitude, longitude, radius_m)
+        if candidates is None:
+            positions = np.arange(len(self.stops))
+        else:
+            # Cells are visited in grid order; sorting restores snapshot order for the tie-break below.
+            positions = np.sort(np.asarray(candidates, dtype=np.intp))
+        meters = self.distances(latitude, longitude, positions)
+        keep = meters <= radius_m
+        positions, meters = positions[keep], meters[keep]
+        if len(positions) > limit:
+            kth = meters[np.argpartition(meters, limit - 1)[:limit]].max()
+            # The partition may split a run of equal distances; keep every stop tied with the k-th.
+            keep = meters <= kth
+            positions, meters = positions[keep], meters[keep]
+        order = np.lexsort((positions, meters))[:limit]
+        return positions[order], meters[order]
+
+    def suburban_first(self, positions: np.ndarray, meters: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Reorder a ranking so S-Bahn stops come first; the stable sort keeps distance order within each group."""
+        order = np.argsort((self.products[positions] & PRODUCT_BITS["suburban"]) == 0, kind="stable")
+        return positions[order], meters[order]
+
+    def nearest(self, latitude: float, longitude: float, limit: int, radius_m: float) -> list[tuple[float, dict]]:
+        """Closest `limit` stops within `radius_m` as (meters, stop), nearest first."""
+        positions, meters = self.nearest_positions(latitude, longitude, limit, radius_m)
+        return [(float(m), self.stops[p]) for m, p in zip(meters, positions)]
@@ -5,6 +5,7 @@ from datetime import timezone
 from tabulate import tabulate
 
 from .datamodels import Departure
+from .utils import cleanse_provenance
 from .utils import cleanse_transport_type
 from .utils import get_direction
 from .utils import get_platform_group
@@ -101,7 +102,8 @@ def main() -> None:
                     color = get_time_color(minutes_away, walk_time)
                     time_str = f"{departure.when.strftime('%H:%M')} ({minutes_away}m)"
 
-                    rows.append([f"{color}{time_str}\033[0m", departure.line.name, departure.provenance])
+                    destination = cleanse_provenance(departure.destination.name) if departure.destination else ""
+                    rows.append([f"{color}{time_str}\033[0m", departure.line.name, destination])
 
                 print(tabulate(rows, headers=headers, tablefmt="simple"))
 
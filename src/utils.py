@@ -1,71 +1,216 @@
 """Shared utility functions for trainspotter."""
 
-import json
 import logging
 import math
+import re
+import threading
+from collections.abc import Mapping
+from collections.abc import Sequence
 from datetime import datetime
 from datetime import timezone
+from enum import Enum
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any
 
-import googlemaps
-from joblib import Memory
+from spyglass import MetricsCollector
 
+from .cache import TTLCache
+from .config import PROJECT_NAME
+from .config import SPYGLASS_HOST
 from .datamodels import Departure
 from .datamodels import Station
-from .values import GMAPS_API_KEY
+from .generation import config
+from .generation import current
+from .generation import register_part
+from .provenance import provenance_normaliser
+from .walk_time_store import DEFAULT_GRID_DEG
+from .walk_time_store import DEFAULT_MAX_ENTRIES
+from .walk_time_store import DEFAULT_TTL_S
+from .walk_time_store import Cell
+from .walk_time_store import DistanceMatrixClient
+from .walk_time_store import WalkTimeClient
+from .walk_time_store import WalkTimeStore
+from .walk_time_store import cell_centre
+from .walk_time_store import origin_cell
+from .walk_time_store import walk_time_client
+
+metrics = MetricsCollector(host=SPYGLASS_HOST, project=PROJECT_NAME)
 
 logger = logging.getLogger(__name__)
 
+CARDINALS = ("↑", "→", "↓", "←")
+# Per-line direction symbol by cardinal; cardinals a line does not list are shown as they are.
+LINE_DIRECTIONS: Mapping[str, Mapping[str, str]] = MappingProxyType(
+    {
+        "S41": MappingProxyType(dict.fromkeys(CARDINALS, "↻")),
+        "S42": MappingProxyType(dict.fromkeys(CARDINALS, "↺")),
+        "S8": MappingProxyType({"→": "↻", "↓": "↻"}),
+        "S85": MappingProxyType({"→": "↻", "↓": "↻"}),
+        "S1": MappingProxyType({"←": "↓"}),
+    }
+)
+
 # Cache in parent directory
 basedir = Path(__file__).parent.parent
-disk_cache = Memory(str(basedir / ".cache"), verbose=0)
 
-# Load config from parent directory (secrets from git-ignored values.py)
-config_path = basedir / "config.json"
-with open(config_path, "r") as f:
-    config = json.load(f)
 
+# None keeps stored walk times in memory only.
+WALK_TIMES_PATH: Path | None = basedir / ".cache" / "walk_times.sqlite3"
+
+
+class Missing(Enum):
+    """Type of `MISSING`, the default of arguments for which None is a meaningful value."""
+
+    MISSING = "missing"
 
-config["gmaps_api_key"] = GMAPS_API_KEY
 
+MISSING = Missing.MISSING
+
+
+class WalkTimeResolver:
+    """Walk minutes to a station: configured by name, else Google Maps per (station ID, origin cell).
+
+    Config station keys are matched as substrings of the lower-cased stop name, the first key in
+    config order winning. The keys compile into one regex of lookaheads tried in that order, and
+    the outcome is memoised per name. Google Maps walk times come from an in-memory memo, then the
+    `WalkTimeStore`; stops neither has are sent to the client together, in one batched lookup.
+    Lookups hold a lock per origin cell, so concurrent misses for the same cell share one request
+    while other cells are looked up in parallel. A stop without a walking route resolves to None
+    until the memo entry expires.
+    """
 
-@disk_cache.cache
-def _get_walk_time_gmaps(origin: tuple[float, float], destination: tuple[float, float], station_name: str) -> int:
-    gmaps = googlemaps.Client(key=config["gmaps_api_key"])
-    result = gmaps.directions(origin=origin, destination=destination, mode="walking")
-    duration_sec = result[0]["legs"][0]["duration"]["value"]
-    duration_min = duration_sec / 60
-    logger.info(
-        "Google Maps walking time for %s: %.1f minutes between %s and %s",
-        station_name,
-        duration_min,
-        origin,
-        destination,
+    def __init__(
+        self,
+        configured: Mapping[str, Mapping[str, Any]],
+        store: WalkTimeStore | None = None,
+        client: WalkTimeClient | None = None,
+        max_entries: int = 1024,
+    ) -> None:
+        self._minutes = tuple(station["walk_time"] for station in configured.values())
+        lookaheads = "|".join(f"(?=.*?({re.escape(key)}))" for key in configured)
+        self._matcher = re.compile(lookaheads, re.DOTALL) if configured else None
+        # Unbounded: keys are stop names, a fixed set per snapshot.
+        self._by_name: dict[str, int | None] = {}
+        self.store = store if store is not None else WalkTimeStore()
+        self.client = client if client is not None else DistanceMatrixClient()
+        self.grid_deg = self.store.grid_deg
+        self._memo: TTLCache[int | None] = TTLCache(ttl_s=self.store.ttl_s, max_entries=max_entries)
+        self._cell_locks: dict[Cell, threading.Lock] = {}
+        self._cell_locks_guard = threading.Lock()
+
+    def configured_minutes(self, station_name: str) -> int | None:
+        try:
+            return self._by_name[station_name]
+        except KeyError:
+            pass
+        match = self._matcher.match(station_name.lower()) if self._matcher is not None else None
+        minutes = self._by_name[station_name] = self._minutes[match.lastindex - 1] if match else None
+        return minutes
+
+    def resolve(self, station: Station, origin: tuple[float, float] | None) -> int | None:
+        walk_time = self.configured_minutes(station.name)
+        if walk_time is not None:
+            return walk_time
+        assert origin and station.location, f"{origin=} and a station location are required if Station not configured"
+        return self.resolve_many([station], origin)[station.id]
+
+    def resolve_many(self, stations: Sequence[Station], origin: tuple[float, float]) -> dict[str, int | None]:
+        """Google Maps walk minutes by station ID for the located stations without a configured walk time."""
+        cell = origin_cell(origin, self.grid_deg)
+        pending = {
+            station.id: station
+            for station in stations
+            if station.location and self.configured_minutes(station.name) is None
+        }
+        found, pending = self._from_memo(cell, pending, "hit")
+        if pending:
+            with self._cell_lock(cell):
+                coalesced, pending = self._from_memo(cell, pending, "coalesced")
+                found.update(coalesced)
+                if pending:
+                    found.update(self._look_up(cell, pending))
+        return found
+
+    def _cell_lock(self, cell: Cell) -> threading.Lock:
+        with self._cell_locks_guard:
+            lock = self._cell_locks.get(cell)
+            if lock is None:
+                # Cleared when full like the memo; a caller holding a dropped lock at worst repeats one lookup.
+                if len(self._cell_locks) >= self._memo.max_entries:
+                    self._cell_locks.clear()
+                lock = self._cell_locks[cell] = threading.Lock()
+            return lock
+
+    def _from_memo(
+        self, cell: Cell, stations: dict[str, Station], outcome: str
+    ) -> tuple[dict[str, int | None], dict[str, Station]]:
+        found: dict[str, int | None] = {}
+        missing: dict[str, Station] = {}
+        for station_id, station in stations.items():
+            walk_time = self._memo.get((station_id, cell), MISSING)
+            if walk_time is MISSING:
+                missing[station_id] = station
+            else:
+                found[station_id] = walk_time
+                metrics.increment(f"walk_time_cache.{outcome}")
+        return found, missing
+
+    def _look_up(self, cell: Cell, stations: dict[str, Station]) -> dict[str, int | None]:
+        stored = self.store.get_many(cell, list(stations))
+        found: dict[str, int | None] = dict(stored)
+        remaining = [station for station_id, station in stations.items() if station_id not in stored]
+        if remaining:
+            destinations = [(station.location.latitude, station.location.longitude) for station in remaining]
+            minutes = self.client.walk_minutes(cell_centre(cell, self.grid_deg), destinations)
+            fetched = {station.id: walk_time for station, walk_time in zip(remaining, minutes)}
+            self.store.put_many(cell, {key: walk_time for key, walk_time in fetched.items() if walk_time is not None})
+            found.update(fetched)
+        for station_id, walk_time in found.items():
+            self._memo.put((station_id, cell), walk_time)
+            metrics.increment("walk_time_cache.store" if station_id in stored else "walk_time_cache.miss")
+        return found
+
+
+def _build_walk_time_resolver(app_config: Mapping[str, Any]) -> WalkTimeResolver:
+    store = WalkTimeStore(
+        WALK_TIMES_PATH,
+        grid_deg=float(app_config.get("walk_time_grid_deg", DEFAULT_GRID_DEG)),
+        ttl_s=float(app_config.get("walk_time_ttl_s", DEFAULT_TTL_S)),
+        max_entries=int(app_config.get("walk_time_store_max_entries", DEFAULT_MAX_ENTRIES)),
     )
-    return math.ceil(duration_min)
+    return WalkTimeResolver(
+        app_config["stations"], store, walk_time_client(app_config.get("walk_time_client", "google"))
+    )
+
+
+register_part(
+    "walk times",
+    _build_walk_time_resolver,
+    config_keys=(
+        "stations",
+        "walk_time_grid_deg",
+        "walk_time_ttl_s",
+        "walk_time_store_max_entries",
+        "walk_time_client",
+    ),
+)
 
 
 def get_configured_walk_time(station_name: str) -> int | None:
     """Return configured walk time when a config station key matches the name."""
-    station_name_lower = station_name.lower()
-    station_key = next((k for k in config["stations"] if k in station_name_lower), None)
-    if station_key is None:
-        return None
-    return config["stations"][station_key]["walk_time"]
+    return current().part("walk times").configured_minutes(station_name)
 
 
 def get_walk_time(station: Station, current_coordinates: tuple[float, float] | None = None) -> int | None:
-    """Get configured walk time for a station."""
-    walk_time = get_configured_walk_time(station.name)
-    if walk_time is not None:
-        logger.debug("Station %s is configured with walk time %d minutes", station.name, walk_time)
-        return walk_time
-    else:
-        destination_coordinates = (round(station.location.latitude, 4), round(station.location.longitude, 4))
-        assert (
-            current_coordinates and destination_coordinates
-        ), f"{current_coordinates=} and {destination_coordinates=} are required if Station not configured"
-        return _get_walk_time_gmaps(current_coordinates, destination_coordinates, station.name)
+    """Get configured walk time for a station, else its Google Maps walk time from `current_coordinates`."""
+    return current().part("walk times").resolve(station, current_coordinates)
+
+
+def prefetch_walk_times(stations: Sequence[Station], current_coordinates: tuple[float, float] | None) -> None:
+    """Resolve the stations' Google Maps walk times from `current_coordinates` in one batched lookup."""
+    if current_coordinates is not None:
+        current().part("walk times").resolve_many(stations, current_coordinates)
 
 
 def get_thresholds(walk_time: int) -> tuple[int, int]:
@@ -82,7 +227,12 @@ def get_thresholds(walk_time: int) -> tuple[int, int]:
 
 def cleanse_transport_type(departure: Departure) -> str:
     """Get the transport type for an departure."""
-    product = departure.line.product.lower()
+    return product_transport_type(departure.line.product)
+
+
+def product_transport_type(product: str) -> str:
+    """Get the transport type for a VBB line product ("suburban", "bus", ...)."""
+    product = product.lower()
     if product == "suburban":
         return "S-Bahn"
     elif product == "subway":
@@ -107,26 +257,8 @@ def get_platform_group(station_name: str, platform: str, transport_type: str) ->
 
 
 def cleanse_provenance(provenance: str, max_length: int = 28) -> str:
-    """Cleanse the provenance string."""
-    if "Hauptbahnhof" in provenance:
-        provenance = provenance.replace("Hauptbahnhof", "HBF")
-    elif ", Bahnhof" in provenance:
-        provenance = provenance.replace(", Bahnhof", "")
-    elif "(Berlin)" in provenance:
-        provenance = provenance.replace("(Berlin)", "")
-    elif "Bhf" in provenance:
-        provenance = provenance.replace("Bhf", "")
-    if "S+U" in provenance:
-        provenance = provenance.replace("S+U", "")
-    if "(TF)" in provenance:
-        provenance = provenance.replace("(TF)", "")
-    if "S " in provenance:
-        provenance = provenance.replace("S ", "")
-    if "U " in provenance:
-        provenance = provenance.replace("U ", "")
-    if "[Gleis 1-8]" in provenance:
-        provenance = provenance.replace("[Gleis 1-8]", "")
-    return provenance[:max_length].strip()
+    """Cleanse the provenance string (rules in `provenance.py`, memoised per name)."""
+    return provenance_normaliser()(provenance, max_length)
 
 
 def get_initial_bearing(lat1, lon1, lat2, lon2):
@@ -143,35 +275,36 @@ def get_initial_bearing(lat1, lon1, lat2, lon2):
 
 
 def bearing_to_cardinal(bearing):
-    directions = ["↑", "→", "↓", "←"]
-    idx = round(bearing / 90) % len(directions)
-    return directions[idx]
+    idx = round(bearing / 90) % len(CARDINALS)
+    return CARDINALS[idx]
 
 
 def get_direction(line: str, direction: str) -> str:
     """Get the platform direction with emoji for specific stations."""
-    if line == "S41":
-        return "↻"
-    elif line == "S42":
-        return "↺"
-    elif direction in ["→", "↓"] and line in ["S8", "S85"]:
-        return "↻"
-    elif direction == "←" and line == "S1":
-        return "↓"
-    else:
-        return direction
+    overrides = LINE_DIRECTIONS.get(line)
+    return overrides.get(direction, direction) if overrides else direction
 
 
 def process_station_departures(
-    station: Station, departures: list[Departure], browser_coordinates: tuple[float, float] | None = None
+    station: Station,
+    departures: list[Departure],
+    browser_coordinates: tuple[float, float] | None = None,
+    walk_time: int | None | Missing = MISSING,
 ) -> list[dict]:
     """Process departures for a station, calculating directions and wait times.
 
+    `walk_time` is the caller's already resolved walk time (None if it has none); it is looked up
+    when not passed.
     Returns list of processed departure dicts with direction_symbol, wait_time, etc.
     """
 
-    walk_time = get_walk_time(station, browser_coordinates)
+    # direction_table imports this module.
+    from .direction_table import resolve_direction
+
+    if walk_time is MISSING:
+        walk_time = get_walk_time(station, browser_coordinates)
     now = datetime.now(timezone.utc)
+    cleanse = provenance_normaliser()
 
     processed = []
     for departure in departures:
@@ -180,11 +313,7 @@ def process_station_departures(
         if not departure.destination or not departure.destination.location:
             continue
 
-        start = departure.stop.location
-        stop = departure.destination.location
-        bearing = get_initial_bearing(start.latitude, start.longitude, stop.latitude, stop.longitude)
-        cardinal = bearing_to_cardinal(bearing)
-        direction_symbol = get_direction(departure.line.name, cardinal)
+        direction_symbol = resolve_direction(departure)
 
         minutes_until = int((departure.when - now).total_seconds() / 60)
         wait_time = minutes_until - (walk_time or 0)
@@ -195,7 +324,7 @@ def process_station_departures(
                 "line": departure.line.name,
                 "when": departure.when.isoformat(),
                 "direction_symbol": direction_symbol,
-                "provenance": cleanse_provenance(departure.destination.name),
+                "provenance": cleanse(departure.destination.name),
                 "wait_time": wait_time,
                 "departure": departure,  # Keep reference to original Departure object
             }
@@ -1,21 +1,43 @@
 import json
 import logging
 import math
+import time
+from collections.abc import Mapping
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
 from operator import itemgetter
 from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
 
 import requests
 from requests.adapters import HTTPAdapter
 from spyglass import MetricsCollector
-from urllib3.util import Retry
 
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker
 from .config import PROJECT_NAME
 from .config import SPYGLASS_HOST
 from .config import VBB_API_BASE
 from .datamodels import Departure
+from .datamodels import NearbyStation
 from .datamodels import Station
 from .datamodels import parse_departures
 from .datamodels import parse_stations
+from .deadline import Deadline
+from .deadline import backoff_s
+from .generation import config
+from .generation import current
+from .generation import register_part
+from .generation import restart_only
+from .lazy import Lazy
+from .stop_index import haversine_meters
+
+if TYPE_CHECKING:
+    from .nearby_table import NearbyTable
+    from .stop_table import StopTable
 
 metrics = MetricsCollector(host=SPYGLASS_HOST, project=PROJECT_NAME)
 
@@ -33,6 +55,9 @@ class VBBAPIError(Exception):
         "http_502": "VBB returned 502",
         "http_503": "VBB returned 503",
         "http_504": "VBB returned 504",
+        "circuit_open": "VBB unavailable (circuit open)",
+        "deadline_exceeded": "VBB too slow (deadline exceeded)",
+        "schema": "VBB response format changed",
     }
 
     def __init__(
@@ -104,11 +129,24 @@ def _classify_request_exception(exc: requests.RequestException) -> tuple[str, in
     return "unknown", None
 
 
-# Load configuration
-with open("config.json", "r") as f:
-    config = json.load(f)
+_DEPARTURE_CACHE_TTL_S = float(config.get("departure_cache_ttl_s", 15))
+_DEPARTURE_CACHE_MAX_ENTRIES = int(config.get("departure_cache_max_entries", 64))
+LAST_GOOD_MAX_AGE_S = float(config.get("vbb_last_good_max_age_s", 30 * 60))
+_BREAKER_FAILURE_THRESHOLD = int(config.get("vbb_breaker_failure_threshold", 3))
+_BREAKER_RESET_S = float(config.get("vbb_breaker_reset_s", 30))
+restart_only(
+    "departure_cache_ttl_s",
+    "departure_cache_max_entries",
+    "vbb_last_good_max_age_s",
+    "vbb_breaker_failure_threshold",
+    "vbb_breaker_reset_s",
+)
+# Overall time budget per departures request, by calling endpoint; the display polls on a tighter clock.
+_DEFAULT_DEADLINES_S = {"display": 8.0, "dashboard": 15.0, "default": 20.0}
 
-_MAX_STRAIGHTLINE_DISTANCE_M = float(config.get("max_nearby_straightline_m", 1500))
+
+def _max_straightline_m() -> float:
+    return float(config.get("max_nearby_straightline_m", 1500))
 
 
 def _load_station_snapshot(path: Path) -> list[dict]:
@@ -122,28 +160,151 @@ def _load_station_snapshot(path: Path) -> list[dict]:
     return data
 
 
-_STATIONS_PATH = Path(__file__).resolve().parent.parent / "assets" / "vbb_stations.json"
-_ALL_STATIONS: list[dict] = _load_station_snapshot(_STATIONS_PATH)
+def _load_stop_table(json_path: Path) -> tuple[Sequence[dict], "StopTable"]:
+    """Memory-map the binary snapshot built from `json_path` if it is current; otherwise parse the JSON."""
+    # NumPy is imported with the snapshot, on the first nearby-stops lookup rather than at app import.
+    from .stop_snapshot import BinarySnapshot
+    from .stop_snapshot import SnapshotFormatError
+    from .stop_snapshot import source_digest
+    from .stop_table import StopTable
+
+    binary_path = json_path.with_suffix(".bin")
+    if json_path.exists() and binary_path.exists():
+        try:
+            snapshot = BinarySnapshot(binary_path, expected_sha256=source_digest(json_path.read_bytes()))
+        except SnapshotFormatError as error:
+            logger.warning("Ignoring binary stop snapshot, falling back to JSON: %s", error)
+        else:
+            logger.debug("Memory-mapped %d stations from %s", len(snapshot), binary_path.name)
+            return snapshot, StopTable.from_records(snapshot, snapshot.ids, snapshot.names, snapshot.records)
+    stops = _load_station_snapshot(json_path)
+    return stops, StopTable(stops)
+
+
+STATIONS_PATH = Path(__file__).resolve().parent.parent / "assets" / "vbb_stations.json"
+NEARBY_TABLE_PATH = STATIONS_PATH.with_name("vbb_nearby.bin")
+# Nearby results are memoised per rounded coordinate cell; 3 decimals (~100 m) is what /api/location keeps.
+# Same cells as the precomputed table (nearby_table.CELL_DECIMALS).
+NEARBY_CELL_DECIMALS = 3
+
+
+class NearbyStops:
+    """Snapshot stops parsed once into shared `Station`s, with ranked results memoised per coordinate cell.
+
+    Queries are ranked from the cell's rounded coordinates, so every point in a cell gets the same
+    answer. A result is a list of `NearbyStation` wrappers around the shared stations. Cells covered
+    by a `precomputed` table are read from it instead of being ranked.
+    """
+
+    def __init__(self, table: "StopTable", memo_entries: int = 512, precomputed: "NearbyTable | None" = None) -> None:
+        self.table = table
+        self.precomputed = precomputed
+        self.stations = parse_stations(table.stops)
+        self._memo: TTLCache[tuple[NearbyStation, ...]] = TTLCache(ttl_s=math.inf, max_entries=memo_entries)
+
+    def lookup(self, latitude: float, longitude: float, limit: int, radius_m: float) -> list[NearbyStation]:
+        """Closest `limit` stops within `radius_m` of the point's cell, S-Bahn first, then by distance."""
+        cell = (round(latitude, NEARBY_CELL_DECIMALS), round(longitude, NEARBY_CELL_DECIMALS))
+        ranked, outcome = self._memo.get_or_load((*cell, limit, radius_m), lambda: self._rank(*cell, limit, radius_m))
+        metrics.increment(f"nearby_cache.{outcome}")
+        return list(ranked)
+
+    def _rank(self, latitude: float, longitude: float, limit: int, radius_m: float) -> tuple[NearbyStation, ...]:
+        ranked = None
+        if self.precomputed is not None and self.precomputed.covers(limit, radius_m):
+            ranked = self.precomputed.lookup(latitude, longitude, limit)
+        if ranked is None:
+            ranked = self.table.nearest_positions(latitude, longitude, limit, radius_m)
+        positions, meters = self.table.suburban_first(*ranked)
+        return tuple(NearbyStation(self.stations[p], int(round(m))) for p, m in zip(positions, meters))
+
+
+def _load_nearby_table(json_path: Path, table_path: Path, radius_m: float) -> "NearbyTable | None":
+    """The table from scripts/build_nearby_table.py, if present and built for this snapshot, limit and radius."""
+    from .nearby_table import NearbyTable
+    from .stop_snapshot import SnapshotFormatError
+    from .stop_snapshot import source_digest
+
+    if not table_path.exists():
+        return None
+    try:
+        nearby_table = NearbyTable(table_path, expected_sha256=source_digest(json_path.read_bytes()))
+    except SnapshotFormatError as error:
+        logger.warning("Ignoring precomputed nearby-stops table, ranking at runtime: %s", error)
+        return None
+    if not nearby_table.covers(MAX_NEARBY_STATIONS, radius_m):
+        logger.warning("Ignoring %s: built for another limit or radius, ranking at runtime", table_path.name)
+        return None
+    logger.debug("Memory-mapped nearby stops for %d cells from %s", len(nearby_table), table_path.name)
+    return nearby_table
+
+
+def _load_nearby_stops(app_config: Mapping[str, Any]) -> NearbyStops:
+    _, table = _load_stop_table(STATIONS_PATH)
+    radius_m = float(app_config.get("max_nearby_straightline_m", 1500))
+    precomputed = _load_nearby_table(STATIONS_PATH, NEARBY_TABLE_PATH, radius_m)
+    return NearbyStops(table, int(app_config.get("nearby_cache_max_entries", 512)), precomputed)
+
+
+# Rebuilt on reload when the snapshot files (scripts/fetch_stations.py, build_nearby_table.py) or these keys change.
+register_part(
+    "stop snapshot",
+    _load_nearby_stops,
+    files=(STATIONS_PATH, STATIONS_PATH.with_suffix(".bin"), NEARBY_TABLE_PATH),
+    config_keys=("max_nearby_straightline_m", "nearby_cache_max_entries"),
+)
+
+
+def _nearby_stops() -> NearbyStops:
+    return current().part("stop snapshot")
+
+
+def _all_stations() -> Sequence[dict]:
+    return _nearby_stops().table.stops
+
+
+def _stop_table() -> "StopTable":
+    return _nearby_stops().table
 
+
+# Retries are driven by `_get_with_retries` within a Deadline, not by urllib3.
 session = requests.Session()
-retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
-adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retries)
+adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
 session.mount("http://", adapter)
 session.mount("https://", adapter)
 
-TIMEOUT = 5
+TIMEOUT = 5  # cap per attempt
+MAX_ATTEMPTS = 4
+BACKOFF_FACTOR = 0.5
+RETRYABLE_KINDS = frozenset({"timeout", "connection", "http_500", "http_502", "http_503", "http_504"})
+# Kinds that say something about upstream health; others (e.g. http_404) mean VBB answered.
+_BREAKER_FAILURE_KINDS = RETRYABLE_KINDS | {"deadline_exceeded"}
+
+# Shared by every caller in the process (dashboard, display, CLI); keyed by (stop ID, query params).
+_departure_cache: TTLCache[list[Departure]] = TTLCache(
+    ttl_s=_DEPARTURE_CACHE_TTL_S, max_entries=_DEPARTURE_CACHE_MAX_ENTRIES
+)
+# Last successful (fetched_at, departures) per cache key, served while VBB is failing.
+_last_good: TTLCache[tuple[datetime, list[Departure]]] = TTLCache(
+    ttl_s=LAST_GOOD_MAX_AGE_S, max_entries=_DEPARTURE_CACHE_MAX_ENTRIES
+)
+circuit_breaker = CircuitBreaker("vbb", failure_threshold=_BREAKER_FAILURE_THRESHOLD, reset_timeout_s=_BREAKER_RESET_S)
 
-MAX_NEARBY_STATIONS = 20
-_EARTH_RADIUS_M = 6_371_000
 
+@dataclass(frozen=True)
+class DepartureFetch:
+    """Departures for one stop, when they were fetched, and whether they are a last-known-good fallback."""
 
-def _haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Great-circle distance between two WGS84 points in meters."""
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlam = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
-    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(a))
+    departures: list[Departure]
+    fetched_at: datetime
+    stale: bool = False
+
+    def age_seconds(self, now: datetime) -> float:
+        """Seconds between the fetch and `now` (never negative)."""
+        return max(0.0, (now - self.fetched_at).total_seconds())
+
+
+MAX_NEARBY_STATIONS = 20
 
 
 def _rank_stops_by_distance(
@@ -153,11 +314,14 @@ def _rank_stops_by_distance(
     limit: int,
     max_straightline_m: float,
 ) -> list[tuple[float, dict]]:
-    """Sort by geodesic distance; keep stops within `max_straightline_m`, then take the closest `limit`."""
+    """Sort by geodesic distance; keep stops within `max_straightline_m`, then take the closest `limit`.
+
+    Reference implementation for `StopTable.nearest`, which returns the same ranking.
+    """
     pairs: list[tuple[float, dict]] = []
     for stop in stops:
         loc = stop["location"]
-        meters = _haversine_meters(latitude, longitude, loc["latitude"], loc["longitude"])
+        meters = haversine_meters(latitude, longitude, loc["latitude"], loc["longitude"])
         if meters > max_straightline_m:
             continue
         pairs.append((meters, stop))
@@ -165,12 +329,7 @@ def _rank_stops_by_distance(
     return pairs[:limit]
 
 
-def _suburban_first_sort_key(station: Station) -> int:
-    """S-Bahn stops sort before others; stable sort keeps distance order within each group."""
-    return 0 if station.products.suburban else 1
-
-
-def get_nearby_stations(coordinates: tuple[float, float] | None = None) -> list[Station]:
+def get_nearby_stations(coordinates: tuple[float, float] | None = None) -> list[NearbyStation]:
     """Return the closest stops from the local snapshot within straight-line radius, S-Bahn first."""
     if coordinates is not None:
         lat, lon = coordinates
@@ -179,36 +338,215 @@ def get_nearby_stations(coordinates: tuple[float, float] | None = None) -> list[
         lat = config["location"]["latitude"]
         lon = config["location"]["longitude"]
         logger.debug("Using config coordinates: (%s, %s)", lat, lon)
-    nearest = _rank_stops_by_distance(_ALL_STATIONS, lat, lon, MAX_NEARBY_STATIONS, _MAX_STRAIGHTLINE_DISTANCE_M)
-    station_dicts = [{**stop, "distance": int(round(meters))} for meters, stop in nearest]
-    parsed = parse_stations(station_dicts)
-    parsed.sort(key=_suburban_first_sort_key)
-    logger.info("Found %d nearby stations", len(parsed))
-    return parsed
+    nearby = _nearby_stops().lookup(lat, lon, MAX_NEARBY_STATIONS, _max_straightline_m())
+    logger.info("Found %d nearby stations", len(nearby))
+    return nearby
+
+
+def departure_params() -> dict:
+    """Query params for /stops/{id}/departures, shared by the sync and async clients."""
+    return {
+        "duration": config["update_interval_min"],
+        "linesOfStops": False,
+        "remarks": False,
+        "language": "en",
+    }
 
 
-def get_departures(station_id: str) -> list[Departure]:
-    """Fetch departures from VBB for a stop ID."""
+def departure_cache_key(station_id: str, params: dict) -> tuple:
+    """Key for `_departure_cache`: stop ID plus the exact query params."""
+    return station_id, tuple(sorted(params.items()))
+
+
+def deadline_budget_s(endpoint: str) -> float:
+    """Configured overall VBB budget in seconds for "display", "dashboard" or anything else ("default")."""
+    deadlines = {**_DEFAULT_DEADLINES_S, **config.get("vbb_deadline_s", {})}
+    return float(deadlines.get(endpoint, deadlines["default"]))
+
+
+def _circuit_open_error() -> VBBAPIError:
+    return VBBAPIError("VBB API error: circuit open after repeated failures", kind="circuit_open")
+
+
+def _deadline_error(deadline: Deadline, last_error: VBBAPIError | None) -> VBBAPIError:
+    detail = f" (last attempt: {last_error})" if last_error is not None else ""
+    return VBBAPIError(f"VBB API error: {deadline.budget_s:.1f}s deadline exceeded{detail}", kind="deadline_exceeded")
+
+
+def _record_outcome(error: VBBAPIError | None) -> None:
+    """Feed the circuit breaker: upstream-health failures count, any answer from VBB resets it."""
+    if error is None or error.kind not in _BREAKER_FAILURE_KINDS:
+        circuit_breaker.record_success()
+    else:
+        circuit_breaker.record_failure()
+
+
+def _remember_last_good(cache_key: tuple, departures: list[Departure]) -> None:
+    _last_good.put(cache_key, (datetime.now(timezone.utc), departures))
+
+
+def _create_pydantic_decoder():
+    # pydantic is imported and the schema compiled (~60 ms) only when `vbb_decoder` selects it.
+    from .vbb_schema import create_departures_decoder
+
+    return create_departures_decoder()
+
+
+pydantic_departures_decoder = Lazy("pydantic departures decoder", _create_pydantic_decoder)
+
+
+def decode_departures(body: bytes) -> list[Departure]:
+    """Departures from a raw /departures response body, decoded as configured by `vbb_decoder`.
+
+    "json" (default) is `json.loads` plus the dict walk in `parse_departures`; "pydantic" validates
+    the bytes against `vbb_schema` in one pass first. A body that does not match what the parser
+    expects raises VBBAPIError kind "schema" rather than a KeyError or TypeError. `lazy_departures`
+    only applies to the pydantic decoder: after `json.loads` nothing has checked the nested objects,
+    and a view would raise the KeyError later, on first access.
+    """
+    decoder = config.get("vbb_decoder", "json")
+    lazy = decoder == "pydantic" and config.get("lazy_departures", False)
     try:
-        departures_resp = session.get(
-            f"{VBB_API_BASE}/stops/{station_id}/departures",
-            params={
-                "duration": config["update_interval_min"],
-                "linesOfStops": False,
-                "remarks": False,
-                "language": "en",
-            },
-            timeout=TIMEOUT,
+        data = pydantic_departures_decoder.get()(body) if decoder == "pydantic" else json.loads(body)
+        return parse_departures(data, lazy=lazy)
+    except (ValueError, KeyError, TypeError) as e:
+        # pydantic.ValidationError and json.JSONDecodeError are both ValueErrors.
+        metrics.increment("vbb.schema_error", tags={"decoder": decoder})
+        raise VBBAPIError(f"VBB API error: unexpected departures response: {e}", kind="schema") from e
+
+
+class RetryAttempts:
+    """Attempt bookkeeping for one request under a Deadline, shared by the sync and async clients.
+
+    Up to MAX_ATTEMPTS attempts; each one's timeout is the remaining budget split over the attempts
+    left (capped at `cap_s`), and backoff pauses come out of the same budget. Only RETRYABLE_KINDS
+    are retried. Once attempts stop, `final_error` is the last attempt's error if all were used,
+    otherwise kind "deadline_exceeded".
+    """
+
+    def __init__(self, deadline: Deadline, cap_s: float) -> None:
+        self.deadline = deadline
+        self.cap_s = cap_s
+        self.made = 0
+        self.last_error: VBBAPIError | None = None
+
+    def next_pause_s(self) -> float | None:
+        """Seconds to wait before the next attempt (0 for the first), or None when no attempt is left."""
+        if self.made >= MAX_ATTEMPTS:
+            return None
+        if not self.made:
+            return 0.0
+        pause = backoff_s(self.made, BACKOFF_FACTOR)
+        return pause if self.deadline.can_wait(pause) else None
+
+    def start(self) -> float | None:
+        """Timeout for the attempt about to be made, or None when the budget cannot fit it."""
+        timeout = self.deadline.attempt_timeout(MAX_ATTEMPTS - self.made, self.cap_s)
+        if timeout is not None:
+            self.made += 1
+        return timeout
+
+    def failed(self, exc: BaseException, kind: str, http_status: int | None) -> None:
+        """Record a failed attempt; raises its VBBAPIError straight away unless the kind is retryable."""
+        # aiohttp's timeouts have no message; fall back to the repr.
+        detail = str(exc) or repr(exc)
+        self.last_error = VBBAPIError(f"VBB API error: {detail}", kind=kind, http_status=http_status)
+        self.last_error.__cause__ = exc
+        if kind not in RETRYABLE_KINDS:
+            raise self.last_error from exc
+        logger.debug(
+            "VBB attempt %d/%d failed [%s], %.1fs left", self.made, MAX_ATTEMPTS, kind, self.deadline.remaining()
         )
-        departures_resp.raise_for_status()
-        departures_data = departures_resp.json()
-        return parse_departures(departures_data)
 
-    except requests.RequestException as e:
-        kind, http_status = _classify_request_exception(e)
-        raise VBBAPIError(f"VBB API error: {e}", kind=kind, http_status=http_status) from e
+    def final_error(self) -> VBBAPIError:
+        if self.made >= MAX_ATTEMPTS and self.last_error is not None:
+            return self.last_error
+        return _deadline_error(self.deadline, self.last_error)
+
+
+def _get_with_retries(url: str, params: dict, deadline: Deadline) -> bytes:
+    """GET `url` and return the body, retrying transient failures while the deadline still fits another attempt.
+
+    Raises VBBAPIError; see `RetryAttempts` for the policy.
+    """
+    attempts = RetryAttempts(deadline, TIMEOUT)
+    while (pause := attempts.next_pause_s()) is not None:
+        if attempts.made:
+            time.sleep(pause)
+        timeout = attempts.start()
+        if timeout is None:
+            break
+        try:
+            resp = session.get(url, params=params, timeout=timeout)
+            resp.raise_for_status()
+            return resp.content
+        except requests.RequestException as e:
+            attempts.failed(e, *_classify_request_exception(e))
+    raise attempts.final_error()
+
+
+def _fetch_departures(station_id: str, params: dict, deadline: Deadline) -> list[Departure]:
+    """GET /stops/{id}/departures from VBB, bypassing the cache; fails fast while the circuit is open."""
+    if not circuit_breaker.allow():
+        raise _circuit_open_error()
+    try:
+        body = _get_with_retries(f"{VBB_API_BASE}/stops/{station_id}/departures", params, deadline)
+        departures = decode_departures(body)
+    except VBBAPIError as error:
+        _record_outcome(error)
+        raise
+    _record_outcome(None)
+    _remember_last_good(departure_cache_key(station_id, params), departures)
+    return departures
+
+
+def get_departures(station_id: str, deadline_s: float | None = None) -> list[Departure]:
+    """Fetch departures from VBB for a stop ID within `deadline_s` (default budget if None).
+
+    Served from the shared TTL cache when fresh; concurrent misses for the same stop wait on one
+    in-flight upstream request, for at most their own deadline.
+    """
+    deadline = Deadline(deadline_s if deadline_s is not None else deadline_budget_s("default"))
+    params = departure_params()
+    cache_key = departure_cache_key(station_id, params)
+    try:
+        departures, outcome = _departure_cache.get_or_load(
+            cache_key, lambda: _fetch_departures(station_id, params, deadline), timeout=deadline.remaining()
+        )
+    except TimeoutError as e:
+        raise _deadline_error(deadline, None) from e
+    metrics.increment(f"departure_cache.{outcome}")
+    return departures
+
+
+def departures_or_last_good(station_id: str, result: list[Departure] | VBBAPIError) -> DepartureFetch:
+    """Wrap a fetch result; on VBBAPIError substitute the last successful departures for the stop.
+
+    Fallback departures that have already left are dropped (minutes are recomputed by callers).
+    Re-raises the error when nothing is remembered for the stop.
+    """
+    entry = _last_good.get(departure_cache_key(station_id, departure_params()))
+    now = datetime.now(timezone.utc)
+    if not isinstance(result, VBBAPIError):
+        fetched_at = entry[0] if entry is not None and entry[1] is result else now
+        return DepartureFetch(result, fetched_at)
+    if entry is None:
+        raise result
+    fetched_at, departures = entry
+    logger.warning("VBB API error [%s] for %s; serving departures from %s", result.kind, station_id, fetched_at)
+    metrics.increment("vbb.stale_served", tags={"kind": result.kind})
+    return DepartureFetch([d for d in departures if d.when >= now], fetched_at, stale=True)
+
+
+def get_departures_with_fallback(station_id: str, deadline_s: float | None = None) -> DepartureFetch:
+    """`get_departures`, falling back to last-known-good departures while VBB is failing."""
+    try:
+        result: list[Departure] | VBBAPIError = get_departures(station_id, deadline_s)
+    except VBBAPIError as error:
+        result = error
+    return departures_or_last_good(station_id, result)
 
 
-def get_inbound_trains(station: Station) -> list[Departure]:
+def get_inbound_trains(station: Station, deadline_s: float | None = None) -> list[Departure]:
     """Get inbound trains for a given station."""
-    return get_departures(station.id)
+    return get_departures(station.id, deadline_s)
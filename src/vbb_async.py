@@ -0,0 +1,213 @@
+"""Asyncio VBB departures client: fans out to many stops on one event-loop thread.
+
+Counterpart to `vbb_api.get_departures` for `"vbb_client": "async"` in config.json. Requests share one
+connection-limited aiohttp session; each stop gets its own deadline budget and per-attempt timeout.
+Responses go through the same `decode_departures`, `VBBAPIError` kinds, retry policy, circuit breaker and
+departure caches as the sync path.
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+from collections.abc import Coroutine
+from typing import Any
+
+import aiohttp
+
+from .config import VBB_API_BASE
+from .datamodels import Departure
+from .deadline import Deadline
+from .generation import config
+from .generation import restart_only
+from .vbb_api import TIMEOUT
+from .vbb_api import RetryAttempts
+from .vbb_api import VBBAPIError
+from .vbb_api import _circuit_open_error
+from .vbb_api import _deadline_error
+from .vbb_api import _departure_cache
+from .vbb_api import _record_outcome
+from .vbb_api import _remember_last_good
+from .vbb_api import circuit_breaker
+from .vbb_api import deadline_budget_s
+from .vbb_api import decode_departures
+from .vbb_api import departure_cache_key
+from .vbb_api import departure_params
+from .vbb_api import metrics
+
+logger = logging.getLogger(__name__)
+
+_MAX_CONNECTIONS = int(config.get("vbb_async_max_connections", 20))
+_STOP_TIMEOUT_S = float(config.get("vbb_async_stop_timeout_s", TIMEOUT))
+restart_only("vbb_async_max_connections", "vbb_async_stop_timeout_s")
+
+
+def _classify_aiohttp_exception(exc: BaseException) -> tuple[str, int | None]:
+    """Map a failed aiohttp request to the same error kinds as `vbb_api._classify_request_exception`."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return f"http_{exc.status}", exc.status
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, aiohttp.ServerTimeoutError)):
+        return "timeout", None
+    if isinstance(exc, aiohttp.ClientConnectionError):
+        return "connection", None
+    return "unknown", None
+
+
+def _query_params(params: dict) -> dict[str, str]:
+    """aiohttp rejects bools in query strings; stringify the way `requests` does ("False")."""
+    return {key: str(value) for key, value in params.items()}
+
+
+class AsyncVBBClient:
+    """aiohttp-based departures client with its own event-loop thread.
+
+    Sync callers (Flask views, the display refresher) use `fetch` / `fetch_many`, which schedule
+    coroutines onto the loop thread and block on the result, so N stops cost one thread, not N.
+    """
+
+    # How long past the deadline a sync caller waits on the loop thread before giving up on it.
+    wedged_loop_slack_s = 5.0
+
+    def __init__(self, base_url: str, max_connections: int, stop_timeout_s: float) -> None:
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.stop_timeout_s = stop_timeout_s
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._lock = threading.Lock()
+        # Loads in progress by departure cache key; only touched on the loop thread.
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="vbb-async", daemon=True).start()
+                logger.info("Started async VBB client (max %d connections)", self.max_connections)
+            return self._loop
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _get_with_retries(self, url: str, params: dict, deadline: Deadline) -> bytes:
+        """Async twin of `vbb_api._get_with_retries`, driven by the same `RetryAttempts` policy."""
+        session = await self._get_session()
+        attempts = RetryAttempts(deadline, self.stop_timeout_s)
+        while (pause := attempts.next_pause_s()) is not None:
+            if attempts.made:
+                await asyncio.sleep(pause)
+            timeout = attempts.start()
+            if timeout is None:
+                break
+            try:
+                async with asyncio.timeout(timeout):
+                    async with session.get(url, params=_query_params(params)) as resp:
+                        resp.raise_for_status()
+                        return await resp.read()
+            except (aiohttp.ClientError, TimeoutError) as e:
+                attempts.failed(e, *_classify_aiohttp_exception(e))
+        raise attempts.final_error()
+
+    async def get_departures(self, station_id: str, deadline_s: float | None = None) -> list[Departure]:
+        """Fetch departures for one stop within `deadline_s` (default budget if None); raises VBBAPIError.
+
+        Served from the shared departure cache when fresh. Concurrent misses for the same stop await
+        one in-flight upstream request, each for at most its own deadline, like `get_or_load` on the
+        sync path.
+        """
+        params = departure_params()
+        cache_key = departure_cache_key(station_id, params)
+        cached = _departure_cache.get(cache_key)
+        if cached is not None:
+            metrics.increment("departure_cache.hit")
+            return cached
+
+        deadline = Deadline(deadline_s if deadline_s is not None else deadline_budget_s("default"))
+        load = self._in_flight.get(cache_key)
+        if load is None:
+            metrics.increment("departure_cache.miss")
+            load = asyncio.ensure_future(self._load_departures(station_id, params, deadline))
+            self._in_flight[cache_key] = load
+            load.add_done_callback(lambda done: self._forget_load(cache_key, done))
+        else:
+            metrics.increment("departure_cache.coalesced")
+        try:
+            # Shielded: a caller that gives up must not cancel the load the others are waiting on.
+            return await asyncio.wait_for(asyncio.shield(load), deadline.remaining())
+        except TimeoutError as e:
+            raise _deadline_error(deadline, None) from e
+
+    async def _load_departures(self, station_id: str, params: dict, deadline: Deadline) -> list[Departure]:
+        if not circuit_breaker.allow():
+            raise _circuit_open_error()
+        try:
+            body = await self._get_with_retries(f"{self.base_url}/stops/{station_id}/departures", params, deadline)
+            departures = decode_departures(body)
+        except VBBAPIError as error:
+            _record_outcome(error)
+            raise
+        _record_outcome(None)
+        cache_key = departure_cache_key(station_id, params)
+        _departure_cache.put(cache_key, departures)
+        _remember_last_good(cache_key, departures)
+        return departures
+
+    def _forget_load(self, cache_key: tuple, load: asyncio.Future) -> None:
+        if self._in_flight.get(cache_key) is load:
+            del self._in_flight[cache_key]
+        # Mark the outcome as seen, in case every waiter had already given up.
+        if not load.cancelled():
+            load.exception()
+
+    async def get_departures_many(
+        self, station_ids: list[str], deadline_s: float | None = None
+    ) -> list[list[Departure] | VBBAPIError]:
+        """Fetch several stops concurrently; failed stops yield their VBBAPIError in place."""
+        results = await asyncio.gather(
+            *(self.get_departures(sid, deadline_s) for sid in station_ids), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, VBBAPIError):
+                raise result
+        return results
+
+    def _run(self, coro: Coroutine[Any, Any, Any], deadline_s: float | None) -> Any:
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        # Every stop enforces its own deadline inside the coroutine; this only guards against a wedged loop.
+        budget_s = deadline_s if deadline_s is not None else deadline_budget_s("default")
+        try:
+            return future.result(timeout=budget_s + self.wedged_loop_slack_s)
+        except TimeoutError as e:
+            future.cancel()
+            raise VBBAPIError(
+                f"VBB API error: async client gave no answer within {budget_s:.1f}s deadline",
+                kind="deadline_exceeded",
+            ) from e
+
+    def fetch(self, station_id: str, deadline_s: float | None = None) -> list[Departure]:
+        """Blocking wrapper around `get_departures` for sync callers."""
+        return self._run(self.get_departures(station_id, deadline_s), deadline_s)
+
+    def fetch_many(
+        self, station_ids: list[str], deadline_s: float | None = None
+    ) -> list[list[Departure] | VBBAPIError]:
+        """Blocking wrapper around `get_departures_many` for sync callers."""
+        return self._run(self.get_departures_many(station_ids, deadline_s), deadline_s)
+
+    def close(self) -> None:
+        """Close the HTTP session and stop the loop thread."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=5)
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+
+
+client = AsyncVBBClient(VBB_API_BASE, max_connections=_MAX_CONNECTIONS, stop_timeout_s=_STOP_TIMEOUT_S)
+atexit.register(client.close)
@@ -0,0 +1,94 @@
+"""Schema of the VBB `/stops/{id}/departures` response, validated in one pass by pydantic-core.
+
+Used when config.json sets `"vbb_decoder": "pydantic"`: the raw response bytes are parsed and
+checked against these TypedDicts in Rust, producing the same plain dicts `json.loads` would (minus
+undeclared keys), which `datamodels.parse_departures` then turns into departures. A response that
+drifts from the schema fails here as one `ValidationError` naming the offending path, instead of as
+a `KeyError` somewhere in the dict walk.
+"""
+
+from collections.abc import Callable
+from typing import NotRequired
+from typing import TypedDict
+
+from pydantic import TypeAdapter
+
+
+class LocationSchema(TypedDict):
+    type: str
+    id: NotRequired[str]
+    latitude: float
+    longitude: float
+
+
+class ProductsSchema(TypedDict):
+    suburban: bool
+    subway: bool
+    tram: bool
+    bus: bool
+    ferry: bool
+    express: bool
+    regional: bool
+
+
+class StopSchema(TypedDict):
+    type: str
+    id: str
+    name: str
+    location: LocationSchema
+    products: ProductsSchema
+    stationDHID: NotRequired[str]
+    distance: NotRequired[int]
+
+
+class OperatorSchema(TypedDict):
+    type: str
+    id: str
+    name: str
+
+
+class ColorSchema(TypedDict):
+    fg: str
+    bg: str
+
+
+class LineSchema(TypedDict):
+    type: str
+    id: str
+    fahrtNr: str
+    name: str
+    public: bool
+    adminCode: str
+    productName: str
+    mode: str
+    product: str
+    operator: NotRequired[OperatorSchema]
+    color: NotRequired[ColorSchema]
+
+
+class DepartureSchema(TypedDict):
+    tripId: str
+    stop: StopSchema | None
+    # Cancelled trips have no `when`; parse_departures skips them.
+    when: str | None
+    plannedWhen: str | None
+    delay: int | None
+    platform: str | None
+    plannedPlatform: str | None
+    prognosisType: str | None
+    direction: str | None
+    provenance: str | None
+    line: LineSchema
+    remarks: list
+    origin: StopSchema | None
+    destination: StopSchema | None
+    currentTripPosition: NotRequired[LocationSchema | None]
+
+
+class DeparturesResponseSchema(TypedDict):
+    departures: list[DepartureSchema]
+
+
+def create_departures_decoder() -> Callable[[bytes], DeparturesResponseSchema]:
+    """Compile the schema (a few ms) into a bytes -> validated dict function; raises pydantic.ValidationError."""
+    return TypeAdapter(DeparturesResponseSchema).validate_json
@@ -0,0 +1,190 @@
+"""Google Maps walk times: a SQLite store per (origin cell, stop ID) and batched Distance Matrix clients.
+
+Origins are snapped to a grid of `grid_deg` cells and every point in a cell is looked up from the
+cell's centre, so one stored answer serves the whole cell. Entries expire after `ttl_s` and the
+oldest are pruned beyond `max_entries`. `DistanceMatrixClient` asks for all of a cell's missing
+stops in one request (up to 25 destinations each); `StubWalkClient` estimates walk times offline
+from straight-line distance and needs neither network nor API key.
+"""
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Mapping
+from collections.abc import Sequence
+from pathlib import Path
+
+from .config import gmaps_api_key
+from .lazy import Lazy
+from .stop_index import haversine_meters
+
+logger = logging.getLogger(__name__)
+
+# ~220 m north-south, ~135 m east-west at Berlin's latitude; at most ~2 minutes of walking apart.
+DEFAULT_GRID_DEG = 0.002
+DEFAULT_TTL_S = 30 * 24 * 3600.0
+DEFAULT_MAX_ENTRIES = 10_000
+
+Cell = tuple[int, int]
+Coordinates = tuple[float, float]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS walk_times (
+    grid_udeg INTEGER NOT NULL,
+    cell_lat INTEGER NOT NULL,
+    cell_lon INTEGER NOT NULL,
+    station_id TEXT NOT NULL,
+    minutes INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (grid_udeg, cell_lat, cell_lon, station_id)
+);
+CREATE INDEX IF NOT EXISTS walk_times_fetched_at ON walk_times (fetched_at);
+"""
+
+
+def origin_cell(origin: Coordinates, grid_deg: float = DEFAULT_GRID_DEG) -> Cell:
+    return math.floor(origin[0] / grid_deg), math.floor(origin[1] / grid_deg)
+
+
+def cell_centre(cell: Cell, grid_deg: float = DEFAULT_GRID_DEG) -> Coordinates:
+    return round((cell[0] + 0.5) * grid_deg, 6), round((cell[1] + 0.5) * grid_deg, 6)
+
+
+class WalkTimeStore:
+    """Walk minutes per (origin cell, stop ID) in SQLite, shared across restarts.
+
+    `path=None` keeps the table in memory. The connection is opened on first use and shared by all
+    threads behind a lock. Cells are only comparable within one grid, so the grid size is part of
+    the key: rows of a previous `grid_deg` are never read and age out. A database that cannot be
+    read or written is logged and treated as empty.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        grid_deg: float = DEFAULT_GRID_DEG,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.grid_deg = grid_deg
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._grid_udeg = round(grid_deg * 1_000_000)
+        self._clock = clock
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path is None:
+                connection = sqlite3.connect(":memory:", check_same_thread=False)
+            else:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def __len__(self) -> int:
+        with self._lock:
+            try:
+                return self._connect().execute("SELECT COUNT(*) FROM walk_times").fetchone()[0]
+            except sqlite3.Error as error:
+                logger.warning("Could not read walk-time store %s: %s", self.path, error)
+                return 0
+
+    def get_many(self, cell: Cell, station_ids: Sequence[str]) -> dict[str, int]:
+        """Unexpired walk minutes from `cell` by stop ID; stops without one are left out."""
+        if not station_ids:
+            return {}
+        query = (
+            "SELECT station_id, minutes FROM walk_times"
+            " WHERE grid_udeg = ? AND cell_lat = ? AND cell_lon = ? AND fetched_at > ?"
+            f" AND station_id IN ({', '.join('?' * len(station_ids))})"
+        )
+        with self._lock:
+            try:
+                rows = self._connect().execute(
+                    query, (self._grid_udeg, *cell, self._clock() - self.ttl_s, *station_ids)
+                )
+                return dict(rows.fetchall())
+            except sqlite3.Error as error:
+                logger.warning("Could not read walk-time store %s: %s", self.path, error)
+                return {}
+
+    def put_many(self, cell: Cell, minutes: Mapping[str, int]) -> None:
+        """Store walk minutes from `cell` by stop ID, then drop expired rows and the oldest beyond the cap."""
+        if not minutes:
+            return
+        now = self._clock()
+        rows = [(self._grid_udeg, *cell, station_id, walk, now) for station_id, walk in minutes.items()]
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.executemany("INSERT OR REPLACE INTO walk_times VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    connection.execute("DELETE FROM walk_times WHERE fetched_at <= ?", (now - self.ttl_s,))
+                    connection.execute(
+                        "DELETE FROM walk_times WHERE rowid IN (SELECT rowid FROM walk_times ORDER BY fetched_at"
+                        " LIMIT MAX(0, (SELECT COUNT(*) FROM walk_times) - ?))",
+                        (self.max_entries,),
+                    )
+            except sqlite3.Error as error:
+                logger.warning("Could not write walk-time store %s: %s", self.path, error)
+
+
+def _create_gmaps_client():
+    # googlemaps is only needed for stations without a configured walk time; import it on first use.
+    import googlemaps
+
+    return googlemaps.Client(key=gmaps_api_key)
+
+
+gmaps_client = Lazy("Google Maps client", _create_gmaps_client)
+
+
+class DistanceMatrixClient:
+    """Walking times from one origin to many stops, one Distance Matrix request per 25 destinations."""
+
+    MAX_DESTINATIONS = 25
+
+    def walk_minutes(self, origin: Coordinates, destinations: Sequence[Coordinates]) -> list[int | None]:
+        """Minutes (rounded up) per destination, None where Google Maps found no walking route."""
+        minutes: list[int | None] = []
+        for start in range(0, len(destinations), self.MAX_DESTINATIONS):
+            batch = list(destinations[start : start + self.MAX_DESTINATIONS])
+            result = gmaps_client.get().distance_matrix(origins=[origin], destinations=batch, mode="walking")
+            for element in result["rows"][0]["elements"]:
+                if element.get("status") == "OK":
+                    minutes.append(math.ceil(element["duration"]["value"] / 60))
+                else:
+                    minutes.append(None)
+        logger.info("Google Maps walking times from %s to %d stops: %s", origin, len(destinations), minutes)
+        return minutes
+
+
+class StubWalkClient:
+    """Offline estimate: straight-line distance times `detour`, walked at `speed_m_per_min`."""
+
+    def __init__(self, speed_m_per_min: float = 80.0, detour: float = 1.3) -> None:
+        self.speed_m_per_min = speed_m_per_min
+        self.detour = detour
+
+    def walk_minutes(self, origin: Coordinates, destinations: Sequence[Coordinates]) -> list[int | None]:
+        return [
+            math.ceil(haversine_meters(*origin, *destination) * self.detour / self.speed_m_per_min)
+            for destination in destinations
+        ]
+
+
+WalkTimeClient = DistanceMatrixClient | StubWalkClient
+
+
+def walk_time_client(name: str) -> WalkTimeClient:
+    """The client selected by `walk_time_client` in config.json: "stub", otherwise Google Maps."""
+    return StubWalkClient() if name == "stub" else DistanceMatrixClient()
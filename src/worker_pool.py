@@ -0,0 +1,95 @@
+"""Process-wide bounded thread pool for dashboard fan-out."""
+
+import contextvars
+import logging
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedExecutor:
+    """Size-capped ThreadPoolExecutor with a queue-depth limit, shared by all requests.
+
+    At most `max_workers` tasks run and at most `max_queue` wait. When the queue is full the task
+    runs in the submitting thread instead (caller-runs), so load is shed onto request threads that
+    already exist rather than spawning more. Utilisation and queue wait are reported via `metrics`.
+    Tasks run in a copy of the submitter's context, so they see the request's pinned config generation.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, metrics: Any = None, name: str = "pool") -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._metrics = metrics
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._capacity = threading.BoundedSemaphore(max_workers + max_queue)
+        self._active = 0
+        self._active_lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        """Number of tasks currently executing on pool threads."""
+        return self._active
+
+    def _record_start(self, enqueued_at: float) -> None:
+        wait_ms = (time.monotonic() - enqueued_at) * 1000
+        with self._active_lock:
+            self._active += 1
+            utilisation = self._active / self.max_workers
+        if self._metrics is not None:
+            self._metrics.timing(f"{self.name}.queue_wait_ms", wait_ms)
+            self._metrics.gauge(f"{self.name}.utilisation", utilisation)
+
+    def _record_end(self) -> None:
+        with self._active_lock:
+            self._active -= 1
+
+    def submit(self, fn: Callable[..., R], *args: Any) -> Future:
+        """Schedule `fn(*args)`; runs it inline when the pool and its queue are both full."""
+        if not self._capacity.acquire(blocking=False):
+            logger.debug(
+                "%s saturated (%d running, %d queued); running inline", self.name, self.max_workers, self.max_queue
+            )
+            if self._metrics is not None:
+                self._metrics.increment(f"{self.name}.caller_runs")
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+
+        enqueued_at = time.monotonic()
+        context = contextvars.copy_context()
+
+        def _task() -> R:
+            self._record_start(enqueued_at)
+            try:
+                return context.run(fn, *args)
+            finally:
+                self._record_end()
+                self._capacity.release()
+
+        try:
+            return self._executor.submit(_task)
+        except RuntimeError:
+            self._capacity.release()
+            raise
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Run `fn` over `items` on the pool and return results in input order (first error re-raised)."""
+        futures = [self.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
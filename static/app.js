@@ -405,6 +405,14 @@ function renderStations(data) {
             headerContainer.appendChild(walkTimeEl);
         }
 
+        // VBB is failing: these are the last-known-good departures, aged by dataAge seconds
+        if (station.stale) {
+            const staleEl = document.createElement('div');
+            staleEl.className = 'station-stale';
+            staleEl.textContent = `⚠ VBB unavailable · cached ${Math.round((station.dataAge ?? 0) / 60)} min ago`;
+            headerContainer.appendChild(staleEl);
+        }
+
         section.appendChild(headerContainer);
 
         // Add table with all departures
@@ -253,7 +253,7 @@ function renderAgedQuadrantsIfNeeded(nowMs = Date.now()) {
 // Display serving status (timer colour + header badge)
 // =============================================================================
 
-/** @typedef {'loading' | 'fresh' | 'error'} DisplayServingStatus */
+/** @typedef {'loading' | 'fresh' | 'stale' | 'error'} DisplayServingStatus */
 
 /**
  * Derive UI state from the latest fetch outcome.
@@ -263,6 +263,9 @@ function resolveDisplayStatus() {
     if (state.lastError) {
         return 'error';
     }
+    if (state.lastData?.stale) {
+        return 'stale';  // server is serving last-known-good departures while VBB fails
+    }
     if (state.lastData) {
         return 'fresh';
     }
@@ -280,7 +283,9 @@ function formatRelativeAgo(fromMs) {
 
 function formatLastUpdatedLabel() {
     if (state.lastUpdatedAt == null) return '';
-    return `(last updated ${formatRelativeAgo(state.lastUpdatedAt)})`;
+    // data_age_s: how old the server's copy already was when we received it
+    const fetchedAt = state.lastUpdatedAt - (state.lastData?.data_age_s ?? 0) * 1000;
+    return `(last updated ${formatRelativeAgo(fetchedAt)})`;
 }
 
 /**
@@ -291,6 +296,9 @@ function getStatusBadgeText(status) {
     if (status === 'error') {
         return state.lastError?.badge ?? '⚠\u2009no data';
     }
+    if (status === 'stale') {
+        return '⚠\u2009VBB down · cached';
+    }
     return null;
 }
 
@@ -314,14 +322,15 @@ function updateDisplayStatus() {
     if (timerEl) {
         timerEl.classList.remove(
             'last-updated-ago--fresh',
+            'last-updated-ago--stale',
             'last-updated-ago--error',
             'last-updated-ago--loading',
         );
         if (status === 'loading') {
             timerEl.classList.add('last-updated-ago--loading');
             timerEl.textContent = '';
-        } else if (status === 'fresh') {
-            timerEl.classList.add('last-updated-ago--fresh');
+        } else if (status === 'fresh' || status === 'stale') {
+            timerEl.classList.add(`last-updated-ago--${status}`);
             timerEl.textContent = formatLastUpdatedLabel();
         } else {
             timerEl.classList.add('last-updated-ago--error');
@@ -333,12 +342,12 @@ function updateDisplayStatus() {
 
     if (badgeEl) {
         const badgeText = getStatusBadgeText(status);
-        badgeEl.classList.remove('visible', 'stale-badge--error');
+        badgeEl.classList.remove('visible', 'stale-badge--error', 'stale-badge--stale');
         if (badgeText) {
             badgeEl.classList.add('visible');
             badgeEl.textContent = badgeText;
-            if (status === 'error') {
-                badgeEl.classList.add('stale-badge--error');
+            if (status === 'error' || status === 'stale') {
+                badgeEl.classList.add(`stale-badge--${status}`);
             }
             badgeEl.setAttribute('aria-label', 'Error — tap for details');
         } else {
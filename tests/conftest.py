@@ -3,8 +3,46 @@
 import sys
 from types import ModuleType
 
+import pytest
+
 # Mock values module before any test imports src.config (e.g. test_config.py)
 if "src.values" not in sys.modules:
     _values = ModuleType("src.values")
     _values.GMAPS_API_KEY = ""
     sys.modules["src.values"] = _values
+
+
+@pytest.fixture(autouse=True)
+def _fresh_flyweights():
+    """Parsed stations and lines are shared across parses; keep one test's fixtures out of the next."""
+    from src.datamodels import clear_flyweights
+
+    clear_flyweights()
+    yield
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _directions_in_memory():
+    """Directions resolved by tests are never written to the repo's .cache/."""
+    from unittest.mock import patch
+
+    with patch("src.direction_table.DIRECTIONS_PATH", None):
+        yield
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _walk_times_in_memory():
+    """Walk times resolved by tests are never written to the repo's .cache/."""
+    from unittest.mock import patch
+
+    with patch("src.utils.WALK_TIMES_PATH", None):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _fresh_directions():
+    """Directions are memoised per (stop, destination, line); tests reuse IDs with made-up coordinates."""
+    from src.direction_table import clear_directions
+
+    clear_directions()
+    yield
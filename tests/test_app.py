@@ -8,6 +8,7 @@ import pytest
 
 import src.app as app_module
 from src.app import app
+from src.client_sessions import SESSION_COOKIE
 from src.datamodels import Color
 from src.datamodels import Departure
 from src.datamodels import Line
@@ -15,7 +16,12 @@ from src.datamodels import Location
 from src.datamodels import Operator
 from src.datamodels import Products
 from src.datamodels import Station
+from src.display_feed import FeedSnapshot
+from src.vbb_api import DepartureFetch
 from src.vbb_api import VBBAPIError
+from src.vbb_api import _last_good
+from src.vbb_api import departure_cache_key
+from src.vbb_api import departure_params
 
 TEST_STATION_ID = "900110011"
 BASE_TIME_UTC = datetime(2026, 3, 24, 8, 0, 0, tzinfo=timezone.utc)
@@ -24,12 +30,18 @@ BASE_TIME_UTC = datetime(2026, 3, 24, 8, 0, 0, tzinfo=timezone.utc)
 @pytest.fixture
 def client():
     app.config["TESTING"] = True
-    app_module.browser_coordinates = None
-    app_module.cached_stations = None
+    app_module.client_sessions.clear()
+    app_module.display_feed.reset()
     with app.test_client() as client:
         yield client
 
 
+@pytest.fixture(autouse=True)
+def prefetch_walk_times():
+    with patch("src.app.prefetch_walk_times") as mock_prefetch:
+        yield mock_prefetch
+
+
 @pytest.fixture
 def base_now_utc() -> datetime:
     return BASE_TIME_UTC
@@ -172,6 +184,7 @@ def test_api_stations_returns_json(
     client,
     stations_api_station,
     stations_api_departure,
+    prefetch_walk_times,
 ):
     mock_get_stations.return_value = [stations_api_station]
     mock_get_trains.return_value = [stations_api_departure]
@@ -183,6 +196,108 @@ def test_api_stations_returns_json(
     data = response.get_json()
     assert "stations" in data
     assert "config" in data
+    assert "gmaps_api_key" not in data["config"]
+    # The row resolves the walk time once and hands it to process_station_departures.
+    mock_get_walk_time_app.assert_called_once()
+    mock_get_walk_time_utils.assert_not_called()
+    prefetch_walk_times.assert_called_once_with([stations_api_station], (52.522, 13.413))
+
+
+@patch("src.app.USE_ASYNC_VBB", True)
+@patch("src.app.get_walk_time", return_value=10)
+@patch("src.utils.get_walk_time", return_value=10)
+@patch("src.app.get_nearby_stations")
+@patch("src.app.get_inbound_trains")
+@patch("src.app.async_vbb_client")
+def test_api_stations_async_client_fetches_all_stops_in_one_call(
+    mock_async_client,
+    mock_get_trains,
+    mock_get_stations,
+    mock_get_walk_time_utils,
+    mock_get_walk_time_app,
+    client,
+    stations_api_station,
+    stations_api_departure,
+):
+    stations_api_station.id = "900110011"
+    mock_get_stations.return_value = [stations_api_station, stations_api_station]
+    mock_async_client.get.return_value.fetch_many.return_value = [[stations_api_departure], []]
+
+    response = client.get("/api/stations")
+
+    assert response.status_code == 200
+    mock_async_client.get.return_value.fetch_many.assert_called_once_with(["900110011", "900110011"], 15.0)
+    mock_get_trains.assert_not_called()
+    assert [len(s["departures"]) for s in response.get_json()["stations"]] == [1, 0]
+
+
+@patch("src.app.get_walk_time", return_value=10)
+@patch("src.utils.get_walk_time", return_value=10)
+@patch("src.app.get_nearby_stations")
+@patch("src.app.get_inbound_trains")
+def test_api_stations_serves_last_good_rows_when_vbb_fails(
+    mock_get_trains,
+    mock_get_stations,
+    mock_get_walk_time_utils,
+    mock_get_walk_time_app,
+    client,
+    stations_api_station,
+    stations_api_departure,
+):
+    stations_api_station.id = "900110011"
+    mock_get_stations.return_value = [stations_api_station]
+    mock_get_trains.side_effect = VBBAPIError("circuit open", kind="circuit_open")
+    fallback = DepartureFetch([stations_api_departure], BASE_TIME_UTC, stale=True)
+
+    with patch("src.app.departures_or_last_good", return_value=fallback) as mock_fallback:
+        response = client.get("/api/stations")
+
+    assert response.status_code == 200
+    assert isinstance(mock_fallback.call_args.args[1], VBBAPIError)
+    station = response.get_json()["stations"][0]
+    assert station["stale"] is True
+    assert station["dataAge"] > 0
+    assert len(station["departures"]) == 1
+
+
+@patch("src.app.get_walk_time", return_value=10)
+@patch("src.utils.get_walk_time", return_value=10)
+@patch("src.app.get_nearby_stations")
+@patch("src.app.get_inbound_trains", return_value=[])
+def test_api_stations_keeps_stop_list_per_client(
+    mock_get_trains, mock_get_stations, mock_get_walk_time_utils, mock_get_walk_time_app, client, stations_api_station
+):
+    mock_get_stations.return_value = [stations_api_station]
+
+    client.post("/api/location", json={"latitude": 52.5219, "longitude": 13.4132})
+    client.get("/api/stations")
+    client.get("/api/stations")
+    client.post("/api/location", json={"latitude": 52.5219, "longitude": 13.4132})
+    client.get("/api/stations")
+
+    assert mock_get_stations.call_count == 1
+    assert mock_get_stations.call_args.args[0] == (52.522, 13.413)
+    assert client.get_cookie(SESSION_COOKIE) is not None
+
+
+@patch("src.app.get_walk_time", return_value=10)
+@patch("src.utils.get_walk_time", return_value=10)
+@patch("src.app.get_nearby_stations")
+@patch("src.app.get_inbound_trains", return_value=[])
+def test_api_location_does_not_leak_between_clients(
+    mock_get_trains, mock_get_stations, mock_get_walk_time_utils, mock_get_walk_time_app, stations_api_station
+):
+    mock_get_stations.return_value = [stations_api_station]
+    app_module.client_sessions.clear()
+
+    phone, kiosk = app.test_client(), app.test_client()
+    kiosk.get("/api/stations")
+    phone.post("/api/location", json={"latitude": 52.5219, "longitude": 13.4132})
+    phone.get("/api/stations")
+    kiosk.get("/api/stations")
+
+    assert [c.args[0] for c in mock_get_stations.call_args_list] == [None, (52.522, 13.413)]
+    assert len(app_module.client_sessions) == 2
 
 
 # =============================================================================
@@ -211,6 +326,8 @@ def test_api_display_data_returns_expected_shape(mock_departures, mock_filter, c
     assert "walk_time" in data
     assert "timestamp" in data
     assert "min_departure_min" in data
+    assert data["data_age_s"] == 0
+    assert data["stale"] is False
     assert "quadrants" in data
     assert isinstance(data["quadrants"], list)
 
@@ -276,3 +393,57 @@ def test_api_display_data_returns_502_on_vbb_error(mock_get_departures, client):
     assert body["diagnostics"]["station_id"] is not None
     assert body["error"] == "VBB unreachable"
     assert body["diagnostics"]["vbb_error_kind"] == "unknown"
+
+
+@patch("src.app.get_departures", return_value=[])
+def test_api_display_data_reuses_fresh_feed_snapshot(mock_get_departures, client):
+    client.get("/api/display/data")
+    response = client.get("/api/display/data")
+
+    assert response.status_code == 200
+    assert mock_get_departures.call_count == 1
+
+
+def test_api_display_data_reports_age_of_cached_departures(client):
+    departures = []
+    station_id = app_module.config["display"]["station_id"]
+    cache_key = departure_cache_key(station_id, departure_params())
+    _last_good.put(cache_key, (datetime.now(timezone.utc) - timedelta(seconds=10), departures))
+    try:
+        with patch("src.app.get_departures", return_value=departures):
+            data = client.get("/api/display/data").get_json()
+    finally:
+        _last_good.clear()
+
+    assert 10 <= data["data_age_s"] <= 11
+    assert data["stale"] is False
+
+
+@patch("src.app.get_departures")
+def test_api_display_data_serves_previous_departures_when_refresh_fails(mock_get_departures, client):
+    mock_get_departures.return_value = []
+    client.get("/api/display/data")
+    mock_get_departures.side_effect = VBBAPIError("downstream unavailable", kind="timeout")
+
+    app_module.display_feed.refresh()
+    response = client.get("/api/display/data")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["stale"] is True
+    assert "quadrants" in body
+
+
+@patch("src.app.get_departures")
+def test_api_display_data_502s_once_previous_departures_are_too_old(mock_get_departures, client):
+    mock_get_departures.return_value = []
+    client.get("/api/display/data")
+    feed = app_module.display_feed
+    too_old = datetime.now(timezone.utc) - timedelta(seconds=feed.max_stale_s + 1)
+    feed._snapshot = FeedSnapshot(feed._snapshot.departures, too_old)
+    mock_get_departures.side_effect = VBBAPIError("downstream unavailable", kind="timeout")
+
+    response = client.get("/api/display/data")
+
+    assert response.status_code == 502
+    assert response.get_json()["diagnostics"]["vbb_error_kind"] == "timeout"
@@ -0,0 +1,112 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from src.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def test_get_or_load_caches_until_ttl_expires(clock):
+    cache = TTLCache(ttl_s=10, max_entries=4, clock=clock)
+    loader = Mock(side_effect=["first", "second"])
+
+    assert cache.get_or_load("a", loader) == ("first", "miss")
+    clock.now = 9.9
+    assert cache.get_or_load("a", loader) == ("first", "hit")
+    clock.now = 10
+    assert cache.get_or_load("a", loader) == ("second", "miss")
+    assert loader.call_count == 2
+
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(ttl_s=60, max_entries=2, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_loader_errors_are_not_cached(clock):
+    cache = TTLCache(ttl_s=60, max_entries=2, clock=clock)
+    loader = Mock(side_effect=[RuntimeError("boom"), "ok"])
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("a", loader)
+    assert cache.get_or_load("a", loader) == ("ok", "miss")
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl_s=60, max_entries=4)
+    release = threading.Event()
+    loader = Mock(side_effect=lambda: release.wait(5) and "value")
+    outcomes: list[str] = []
+
+    def _call():
+        value, outcome = cache.get_or_load("a", loader, timeout=5)
+        assert value == "value"
+        outcomes.append(outcome)
+
+    leader = threading.Thread(target=_call)
+    leader.start()
+    while not cache._in_flight:
+        pass
+    followers = [threading.Thread(target=_call) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert loader.call_count == 1
+    assert sorted(outcomes) == ["coalesced", "coalesced", "coalesced", "miss"]
+
+
+def test_waiters_receive_leader_error():
+    cache = TTLCache(ttl_s=60, max_entries=4)
+    release = threading.Event()
+
+    def _failing_loader():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    errors: list[BaseException] = []
+
+    def _call():
+        try:
+            cache.get_or_load("a", _failing_loader, timeout=5)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=_call)
+    leader.start()
+    while not cache._in_flight:
+        pass
+    follower = threading.Thread(target=_call)
+    follower.start()
+    time.sleep(0.2)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2
+    assert cache.get("a") is None
@@ -0,0 +1,74 @@
+from unittest.mock import Mock
+
+from src.client_sessions import ClientSession
+from src.client_sessions import ClientSessionStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_creates_session_and_id():
+    store = ClientSessionStore(ttl_s=60, max_entries=4)
+    session_id, session = store.get(None)
+
+    assert session_id
+    assert store.get(session_id)[1] is session
+
+
+def test_unknown_id_is_kept_and_oversized_id_replaced():
+    store = ClientSessionStore(ttl_s=60, max_entries=4)
+
+    assert store.get("kiosk")[0] == "kiosk"
+    assert store.get("x" * 100)[0] != "x" * 100
+
+
+def test_sessions_expire_after_last_use():
+    clock = FakeClock()
+    store = ClientSessionStore(ttl_s=60, max_entries=4, clock=clock)
+    _, session = store.get("phone")
+
+    clock.now = 50
+    assert store.get("phone")[1] is session
+    clock.now = 100
+    assert store.get("phone")[1] is session
+    clock.now = 200
+    assert store.get("phone")[1] is not session
+
+
+def test_least_recently_used_session_evicted():
+    store = ClientSessionStore(ttl_s=60, max_entries=2)
+    _, first = store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+
+    assert store.get("a")[1] is first
+    assert len(store) == 2
+
+
+def test_resolve_stations_only_when_missing_or_refreshed():
+    session = ClientSession()
+    resolve = Mock(return_value=["stop"])
+
+    assert session.resolve_stations(resolve) == (["stop"], None, True)
+    assert session.resolve_stations(resolve) == (["stop"], None, False)
+    assert session.resolve_stations(resolve, refresh=True)[2] is True
+    assert resolve.call_count == 2
+
+
+def test_new_coordinates_drop_resolved_stations():
+    session = ClientSession()
+    resolve = Mock(return_value=["stop"])
+    session.resolve_stations(resolve)
+
+    assert session.set_coordinates((52.5, 13.4)) is True
+    assert session.set_coordinates((52.5, 13.4)) is False
+    session.resolve_stations(resolve)
+
+    resolve.assert_called_with((52.5, 13.4))
+    assert resolve.call_count == 2
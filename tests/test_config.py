@@ -1,8 +1,11 @@
+from unittest.mock import patch
+
 import pytest
 import typer
 from typer.testing import CliRunner
 
 from src.config import config_cli
+from src.startup_profile import StartupProfile
 
 app = typer.Typer()
 app.command()(config_cli)
@@ -37,3 +40,14 @@ def test_config_without_flag_fails():
     result = runner.invoke(app, [])
     assert result.exit_code == 1
     assert "Error: No config key specified" in result.output
+
+
+@patch("src.startup_profile.profile_startup")
+def test_config_startup_prints_import_breakdown(mock_profile):
+    mock_profile.return_value = StartupProfile(
+        "src.app", 400.0, [("flask", 240.0)], [{"name": "stop snapshot", "ms": 10.0}]
+    )
+    result = runner.invoke(app, ["--startup"])
+    assert result.exit_code == 0
+    assert "import src.app: 400 ms" in result.stdout
+    assert "stop snapshot" in result.stdout
@@ -1,7 +1,15 @@
+import copy
+import dataclasses
 from datetime import datetime
 
+import pytest
+
+from src.datamodels import Departure
+from src.datamodels import LazyDeparture
 from src.datamodels import Location
+from src.datamodels import NearbyStation
 from src.datamodels import Products
+from src.datamodels import _Flyweights
 from src.datamodels import parse_departures
 from src.datamodels import parse_stations
 
@@ -104,3 +112,120 @@ def test_parse_departures():
 
 def test_parse_departures_empty():
     assert parse_departures({"departures": []}) == []
+
+
+def test_nearby_station_reads_through_to_shared_station():
+    station = parse_stations(
+        [
+            {
+                "type": "stop",
+                "id": "900100001",
+                "name": "S+U Alexanderplatz",
+                "location": {"type": "location", "id": "900100001", "latitude": 52.521551, "longitude": 13.411511},
+                "products": dict.fromkeys(["suburban", "subway", "tram", "bus", "ferry", "express", "regional"], True),
+            }
+        ]
+    )[0]
+    near, far = NearbyStation(station, 120), NearbyStation(station, 900)
+
+    assert (near.distance, far.distance) == (120, 900)
+    assert near.id == far.id == "900100001"
+    assert near.location is far.location is station.location
+    assert copy.copy(near) == near
+
+
+def _departure(trip_id: str, fahrt_nr: str, when: str = "2025-01-09T12:30:00+01:00") -> dict:
+    stop = {
+        "type": "stop",
+        "id": "900110011",
+        "name": "S Bornholmer Str. (Berlin)",
+        "location": {"type": "location", "id": "900110011", "latitude": 52.554759, "longitude": 13.397838},
+        "products": dict.fromkeys(["suburban", "subway", "tram", "bus", "ferry", "express", "regional"], True),
+    }
+    return {
+        "tripId": trip_id,
+        "stop": stop,
+        "when": when,
+        "plannedWhen": when,
+        "delay": 0,
+        "platform": "2",
+        "plannedPlatform": "2",
+        "prognosisType": "prognosed",
+        "direction": "S Blankenfelde",
+        "provenance": None,
+        "line": {
+            "type": "line",
+            "id": "s2",
+            "fahrtNr": fahrt_nr,
+            "name": "S2",
+            "public": True,
+            "adminCode": "DBS---",
+            "productName": "S",
+            "mode": "train",
+            "product": "suburban",
+            "operator": {"type": "operator", "id": "s-bahn-berlin-gmbh", "name": "S-Bahn Berlin GmbH"},
+            "color": {"fg": "#fff", "bg": "#007734"},
+        },
+        "remarks": [],
+        "origin": None,
+        "destination": copy.deepcopy(stop),
+    }
+
+
+def test_parse_departures_shares_stations_lines_and_timestamps():
+    first, second = parse_departures({"departures": [_departure("t1", "1"), _departure("t2", "2")]})
+    (again,) = parse_departures({"departures": [_departure("t1", "1")]})
+
+    assert first.stop is second.stop is first.destination
+    assert first.stop.name == "S Bornholmer Str. "
+    assert first.line is not second.line
+    assert first.line.operator is second.line.operator
+    assert first.line.color is second.line.color
+    assert again.line is first.line
+    assert again.when is first.when is first.plannedWhen
+    assert again is not first
+
+
+def test_shared_datamodels_are_frozen_and_slotted():
+    (departure,) = parse_departures({"departures": [_departure("t1", "1")]})
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        departure.stop.name = "renamed"
+    assert not hasattr(departure, "__dict__")
+    assert not hasattr(departure.line, "__dict__")
+
+
+def test_flyweights_are_cleared_when_full():
+    registry = _Flyweights(max_entries=2)
+    a = registry.get("a", object)
+    registry.get("b", object)
+    assert registry.get("a", object) is a
+
+    registry.get("c", object)
+
+    assert len(registry) == 1
+    assert registry.get("a", object) is not a
+
+
+def test_lazy_departure_decodes_fields_on_first_access():
+    raw = _departure("t1", "1")
+    (view,) = parse_departures({"departures": [raw]}, lazy=True)
+
+    assert isinstance(view, LazyDeparture) and isinstance(view, Departure)
+    with pytest.raises(AttributeError):
+        Departure.__dict__["origin"].__get__(view)
+    assert view.when is view.when
+    assert view.stop.name == "S Bornholmer Str. "
+    assert view.origin is None
+    assert view == parse_departures({"departures": [raw]})[0]
+
+
+def test_lazy_departures_skip_invalid_when_and_allow_assignment():
+    invalid = _departure("t0", "0", when=None)
+    views = parse_departures({"departures": [invalid, _departure("t1", "1")]}, lazy=True)
+
+    assert [view.tripId for view in views] == ["t1"]
+    views[0].delay = 120
+    assert views[0].delay == 120
+    with pytest.raises(AttributeError):
+        views[0].not_a_field
@@ -0,0 +1,52 @@
+import pytest
+
+from src.deadline import MIN_ATTEMPT_S
+from src.deadline import Deadline
+from src.deadline import backoff_s
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_remaining_counts_down_and_never_goes_negative():
+    clock = FakeClock()
+    deadline = Deadline(5, clock=clock)
+    clock.now = 2
+    assert deadline.remaining() == 3
+    clock.now = 9
+    assert deadline.remaining() == 0
+
+
+@pytest.mark.parametrize(
+    ("budget_s", "attempts_left", "expected"),
+    [
+        (20, 4, 5),  # capped at max_timeout_s
+        (8, 4, 2),  # split evenly
+        (1.2, 4, 0.6),  # only two MIN_ATTEMPT_S attempts fit
+        (0.6, 4, 0.6),  # one attempt gets everything
+    ],
+)
+def test_attempt_timeout_splits_remaining_budget(budget_s, attempts_left, expected):
+    deadline = Deadline(budget_s, clock=FakeClock())
+    assert deadline.attempt_timeout(attempts_left, max_timeout_s=5) == pytest.approx(expected)
+
+
+def test_attempt_timeout_none_when_budget_too_small():
+    deadline = Deadline(MIN_ATTEMPT_S - 0.01, clock=FakeClock())
+    assert deadline.attempt_timeout(4, max_timeout_s=5) is None
+
+
+def test_can_wait_leaves_room_for_an_attempt():
+    deadline = Deadline(2, clock=FakeClock())
+    assert deadline.can_wait(1.5)
+    assert not deadline.can_wait(1.6)
+
+
+@pytest.mark.parametrize(("retry", "expected"), [(1, 0.0), (2, 1.0), (3, 2.0)])
+def test_backoff_matches_urllib3_schedule(retry, expected):
+    assert backoff_s(retry, factor=0.5) == expected
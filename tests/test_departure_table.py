@@ -0,0 +1,119 @@
+"""The columnar paths must give exactly what the per-departure loops give on the recorded feed."""
+
+import copy
+import json
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.config import load_app_config
+from src.datamodels import parse_departures
+from src.departure_table import SYMBOLS
+from src.departure_table import DepartureTable
+from src.departure_table import filter_and_group_table
+from src.departure_table import process_station_table
+from src.quadrants import filter_and_group
+from src.utils import process_station_departures
+
+ROOT = Path(__file__).resolve().parent.parent
+RECORDING = ROOT / "assets" / "vbb_recordings" / "departures" / "900110011.json"
+QUADRANTS_CONFIG = load_app_config(ROOT / "config.json")["display"]["quadrants"]
+
+
+@pytest.fixture
+def departures():
+    raw = json.loads(RECORDING.read_text())["payload"]["departures"]
+    # Second copy half a minute later: ties and sub-minute offsets around the min_minutes cut.
+    shifted = copy.deepcopy(raw)
+    for dep in shifted:
+        dep["tripId"] += "#2"
+        dep["provenance"] = "S+U Gesundbrunnen Bhf"
+        if dep["when"]:
+            dep["when"] = (datetime.fromisoformat(dep["when"]) + timedelta(seconds=30)).isoformat()
+    return parse_departures({"departures": raw + shifted})
+
+
+@pytest.fixture
+def now(departures):
+    return min(dep.when for dep in departures) - timedelta(minutes=2, seconds=10)
+
+
+def test_table_keeps_located_departures_in_order(departures):
+    departures[3].destination = None
+    located = [dep for dep in departures if dep.destination and dep.destination.location and dep.stop.location]
+    table = DepartureTable.from_departures(departures)
+    assert table.departures == tuple(located)
+    assert departures[3] not in table.departures
+    assert [table.lines[code] for code in table.line_codes] == [dep.line.name for dep in table.departures]
+
+
+def test_direction_codes_come_from_the_direction_table(departures):
+    with patch("src.departure_table.resolve_direction", return_value="↻") as mock_resolve:
+        table = DepartureTable.from_departures(departures)
+
+    assert [call.args[0] for call in mock_resolve.call_args_list] == list(table.departures)
+    assert {SYMBOLS[code] for code in table.direction_codes} == {"↻"}
+
+
+def test_minutes_truncate_toward_zero_like_int(departures, now):
+    table = DepartureTable.from_departures(departures)
+    for later in (now, now + timedelta(minutes=20)):
+        expected = [int((dep.when - later).total_seconds() / 60) for dep in table.departures]
+        assert table.minutes_until(later).tolist() == expected
+
+
+@pytest.mark.parametrize("min_minutes", [0, 5, 12])
+@pytest.mark.parametrize("max_per_quadrant", [None, 1, 3])
+def test_filter_and_group_table_matches_per_departure(departures, now, min_minutes, max_per_quadrant):
+    expected = filter_and_group(departures, now, QUADRANTS_CONFIG, min_minutes, max_per_quadrant)
+    table = DepartureTable.from_departures(departures)
+
+    assert filter_and_group_table(table, now, QUADRANTS_CONFIG, min_minutes, max_per_quadrant) == expected
+    assert any(q.departures for q in expected)
+
+
+def test_filter_and_group_table_cleanses_provenance(departures, now):
+    table = DepartureTable.from_departures(departures)
+    slots = [slot for q in filter_and_group_table(table, now, QUADRANTS_CONFIG, min_minutes=0) for slot in q.departures]
+
+    assert {slot.provenance for slot in slots if slot.tripId.endswith("#2")} == {"Gesundbrunnen"}
+    assert {slot.provenance for slot in slots if not slot.tripId.endswith("#2")} == {None}
+
+
+def test_filter_and_group_table_requires_trip_id(departures, now):
+    departures[0].tripId = ""
+    table = DepartureTable.from_departures(departures)
+    with pytest.raises(ValueError, match="missing tripId"):
+        filter_and_group_table(table, now, QUADRANTS_CONFIG, min_minutes=0)
+
+
+def test_process_station_table_matches_per_departure(departures, now):
+    station = departures[0].stop
+    with (
+        patch("src.utils.get_walk_time", return_value=4),
+        patch("src.departure_table.get_walk_time", return_value=4),
+        patch("src.utils.datetime") as mock_datetime,
+    ):
+        mock_datetime.now.return_value = now
+        expected = process_station_departures(station, departures)
+        rows = process_station_table(station, DepartureTable.from_departures(departures), now=now)
+
+    assert rows == expected
+
+
+def test_explicit_none_walk_time_is_not_looked_up_again(departures, now):
+    station = departures[0].stop
+    with (
+        patch("src.utils.get_walk_time") as utils_lookup,
+        patch("src.departure_table.get_walk_time") as table_lookup,
+    ):
+        rows = process_station_departures(station, departures, None, walk_time=None)
+        table_rows = process_station_table(station, DepartureTable.from_departures(departures), None, None, now)
+
+    utils_lookup.assert_not_called()
+    table_lookup.assert_not_called()
+    assert rows
+    assert table_rows
@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from src import direction_table
+from src.datamodels import parse_departures
+from src.direction_table import DirectionTable
+from src.direction_table import resolve_direction
+from src.utils import bearing_to_cardinal
+from src.utils import get_direction
+from src.utils import get_initial_bearing
+
+RECORDING = Path(__file__).resolve().parent.parent / "assets" / "vbb_recordings" / "departures" / "900110011.json"
+
+
+@pytest.fixture
+def departures():
+    return parse_departures(json.loads(RECORDING.read_text())["payload"])
+
+
+def test_resolve_matches_bearing_math_with_line_overrides(departures):
+    table = DirectionTable("sha")
+    located = [dep for dep in departures if dep.destination and dep.destination.location]
+    for dep in located:
+        start, end = dep.stop.location, dep.destination.location
+        cardinal = bearing_to_cardinal(
+            get_initial_bearing(start.latitude, start.longitude, end.latitude, end.longitude)
+        )
+        assert table.resolve(dep) == get_direction(dep.line.name, cardinal)
+    assert {table.resolve(dep) for dep in located if dep.line.name == "S8"} <= {"↑", "←", "↻"}
+
+
+def test_resolve_computes_each_triple_once(departures):
+    table = DirectionTable("sha")
+    located = [dep for dep in departures if dep.destination and dep.destination.location]
+    with patch("src.direction_table._compute_direction", wraps=direction_table._compute_direction) as compute:
+        for _ in range(3):
+            for dep in located:
+                table.resolve(dep)
+
+    triples = {(dep.stop.id, dep.destination.id, dep.line.name) for dep in located}
+    assert compute.call_count == len(triples) == len(table)
+
+
+def test_departure_without_coordinates_or_ids(departures):
+    table = DirectionTable("sha")
+    unlocated = next(dep for dep in departures if not dep.destination or not dep.destination.location)
+    assert table.resolve(unlocated) is None
+
+    anonymous = next(dep for dep in departures if dep.destination and dep.destination.location)
+    anonymous.destination = Mock(id="", location=anonymous.destination.location)
+    assert table.resolve(anonymous) is not None
+    assert len(table) == 0
+
+
+def test_full_table_is_cleared(departures):
+    table = DirectionTable("sha", max_entries=2)
+    for dep in departures:
+        table.resolve(dep)
+    assert 0 < len(table) <= 2
+
+
+def test_saved_table_is_reloaded_for_the_same_snapshot(departures, tmp_path):
+    path = tmp_path / "directions.json"
+    table = DirectionTable("sha", path)
+    for dep in departures:
+        table.resolve(dep)
+    table.save()
+
+    loaded = DirectionTable.load(path, "sha")
+    with patch("src.direction_table._compute_direction") as compute:
+        for dep in departures:
+            assert loaded.resolve(dep) == table.resolve(dep)
+    compute.assert_not_called()
+
+
+def test_table_saved_for_another_snapshot_is_discarded(departures, tmp_path):
+    path = tmp_path / "directions.json"
+    table = DirectionTable("old", path)
+    table.resolve(departures[0])
+
+    assert len(DirectionTable.load(path, "new")) == 0
+
+
+def test_unreadable_table_is_ignored(tmp_path, caplog):
+    path = tmp_path / "directions.json"
+    path.write_text('{"snapshot_sha256": "sha", "directions": [["too", "short"]]}')
+
+    assert len(DirectionTable.load(path, "sha")) == 0
+    assert "Ignoring unreadable direction table" in caplog.text
+
+
+def test_saves_are_throttled(departures, tmp_path):
+    clock = Mock(return_value=100.0)
+    table = DirectionTable("sha", tmp_path / "directions.json", save_interval_s=60, clock=clock)
+    distinct = {
+        (d.stop.id, d.destination.id, d.line.name): d for d in departures if d.destination and d.destination.location
+    }
+    first, second, third = list(distinct.values())[:3]
+
+    with patch.object(table, "save", wraps=table.save) as save:
+        table.resolve(first)
+        table.resolve(second)
+        clock.return_value = 161.0
+        table.resolve(third)
+    assert save.call_count == 2
+    assert len(json.loads((tmp_path / "directions.json").read_text())["directions"]) == 3
+
+
+def test_resolve_direction_uses_current_generation(departures):
+    with patch("src.direction_table.current") as mock_current:
+        resolve_direction(departures[0])
+    mock_current.return_value.part.assert_called_once_with("direction table")
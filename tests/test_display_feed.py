@@ -0,0 +1,101 @@
+import time
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest.mock import Mock
+
+import pytest
+
+from src.display_feed import DepartureFeed
+from src.display_feed import FeedSnapshot
+from src.vbb_api import DepartureFetch
+from src.vbb_api import VBBAPIError
+
+
+def _fetched(departures: list, age_s: float = 0) -> DepartureFetch:
+    return DepartureFetch(departures, datetime.now(timezone.utc) - timedelta(seconds=age_s))
+
+
+def test_latest_fetches_once_while_fresh():
+    fetch = Mock(return_value=_fetched(["dep"]))
+    feed = DepartureFeed(fetch, interval_s=60)
+
+    assert feed.latest().departures == ["dep"]
+    assert feed.latest().departures == ["dep"]
+    assert fetch.call_count == 1
+
+
+def test_latest_refreshes_inline_when_stale_and_not_running():
+    fetch = Mock(side_effect=[_fetched(["old"]), _fetched(["new"])])
+    feed = DepartureFeed(fetch, interval_s=30)
+    feed.latest()
+    feed._snapshot = FeedSnapshot(["old"], datetime.now(timezone.utc) - timedelta(seconds=31))
+
+    assert feed.latest().departures == ["new"]
+
+
+def test_snapshot_keeps_the_fetch_time():
+    fetched = _fetched(["dep"], age_s=12)
+    snapshot = DepartureFeed(Mock(return_value=fetched), interval_s=30).refresh()
+
+    assert snapshot.fetched_at == fetched.fetched_at
+
+
+def test_refresh_keeps_previous_departures_on_error():
+    error = VBBAPIError("VBB API error: timed out", kind="timeout")
+    fetch = Mock(side_effect=[_fetched(["dep"]), error])
+    feed = DepartureFeed(fetch, interval_s=30)
+    first = feed.refresh()
+
+    snapshot = feed.refresh()
+
+    assert snapshot.departures == ["dep"]
+    assert snapshot.fetched_at == first.fetched_at
+    assert snapshot.error is error
+
+
+def test_refresh_drops_departures_older_than_max_stale():
+    error = VBBAPIError("VBB API error: timed out", kind="timeout")
+    feed = DepartureFeed(Mock(side_effect=[_fetched(["dep"]), error, error]), interval_s=30, max_stale_s=60)
+    feed.refresh()
+    feed._snapshot = FeedSnapshot(["dep"], datetime.now(timezone.utc) - timedelta(seconds=61))
+
+    with pytest.raises(VBBAPIError):
+        feed.refresh()
+    with pytest.raises(VBBAPIError):
+        feed.latest()
+
+
+def test_refresh_raises_when_nothing_cached():
+    feed = DepartureFeed(Mock(side_effect=VBBAPIError("down", kind="connection")), interval_s=30)
+    with pytest.raises(VBBAPIError):
+        feed.latest()
+
+
+def test_age_seconds_never_negative():
+    now = datetime.now(timezone.utc)
+    snapshot = FeedSnapshot([], now + timedelta(seconds=5))
+    assert snapshot.age_seconds(now) == 0.0
+    assert snapshot.age_seconds(now + timedelta(seconds=15)) == 10.0
+
+
+def test_background_thread_refreshes_and_stops():
+    fetch = Mock(side_effect=lambda: _fetched([]))
+    feed = DepartureFeed(fetch, interval_s=0.01)
+    feed.start()
+    try:
+        assert feed.is_running
+        deadline = time.monotonic() + 5
+        while fetch.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        feed.stop()
+    assert not feed.is_running
+    assert fetch.call_count >= 2
+
+
+def test_snapshot_table_is_built_once_per_snapshot():
+    snapshot = FeedSnapshot([], datetime.now(timezone.utc))
+
+    assert len(snapshot.table) == 0
+    assert snapshot.table is snapshot.table
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from src import generation
+from src.config import load_app_config
+from src.generation import Generation
+from src.generation import ReloadWatcher
+from src.generation import config
+from src.generation import current
+from src.generation import needs_reload
+from src.generation import pin
+from src.generation import register_part
+from src.generation import reload
+from src.generation import restart_only
+from src.generation import unpin
+
+
+def _write(path, data, bump_ns=0):
+    path.write_text(json.dumps(data))
+    if bump_ns:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump_ns))
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    """An isolated generation 1 loaded from a temporary config.json, with no registered parts."""
+    path = tmp_path / "config.json"
+    _write(path, {"stations": {"a": {"walk_time": 3}}, "display": {"refresh_interval_s": 20}})
+    start = Generation(1, load_app_config(path), path.stat().st_mtime_ns)
+    with (
+        patch("src.generation.CONFIG_PATH", path),
+        patch("src.generation._current", start),
+        patch.dict("src.generation._parts", clear=True),
+        patch("src.generation._restart_only", set()),
+    ):
+        yield path
+
+
+@pytest.fixture
+def reload_metrics():
+    with patch("src.generation.metrics") as mock_metrics:
+        yield mock_metrics
+
+
+def test_part_is_built_once_on_first_use(config_file):
+    build = Mock(side_effect=lambda app_config: len(app_config["stations"]))
+    register_part("count", build)
+
+    build.assert_not_called()
+    assert current().part("count") == 1
+    assert current().part("count") == 1
+    build.assert_called_once()
+
+
+def test_live_config_follows_reload(config_file, reload_metrics):
+    assert config["stations"]["a"]["walk_time"] == 3
+    _write(config_file, {"stations": {"a": {"walk_time": 9}}, "display": {}}, bump_ns=10**9)
+
+    new = reload()
+
+    assert new.number == 2
+    assert config["stations"]["a"]["walk_time"] == 9
+    reload_metrics.increment.assert_called_once_with("reload", tags={"outcome": "ok", "trigger": "manual"})
+
+
+def test_reload_without_changes_keeps_generation(config_file):
+    assert not needs_reload()
+    assert reload() is None
+    assert current().number == 1
+
+
+def test_touched_but_unchanged_config_is_not_reloaded_again(config_file):
+    _write(config_file, json.loads(config_file.read_text()), bump_ns=10**9)
+    assert needs_reload()
+
+    assert reload() is None
+    assert not needs_reload()
+
+
+def test_only_parts_depending_on_changed_keys_are_rebuilt(config_file):
+    stations = Mock(side_effect=lambda app_config: object())
+    display = Mock(side_effect=lambda app_config: object())
+    register_part("stations", stations, config_keys=("stations",))
+    register_part("display", display, config_keys=("display",))
+    old_stations, old_display = current().part("stations"), current().part("display")
+
+    _write(config_file, {"stations": {"a": {"walk_time": 3}}, "display": {"refresh_interval_s": 5}}, bump_ns=10**9)
+    reload()
+
+    assert current().part("stations") is old_stations
+    assert current().part("display") is not old_display
+    assert display.call_count == 2
+
+
+def test_part_file_change_triggers_rebuild(config_file, tmp_path):
+    data_file = tmp_path / "snapshot.json"
+    _write(data_file, [1, 2])
+    register_part("snapshot", lambda app_config: json.loads(data_file.read_text()), files=(data_file,))
+    assert current().part("snapshot") == [1, 2]
+
+    _write(data_file, [1, 2, 3], bump_ns=10**9)
+    assert needs_reload()
+    reload("mtime")
+
+    assert current().part("snapshot") == [1, 2, 3]
+
+
+def test_unbuilt_parts_are_not_built_by_reload(config_file):
+    build = Mock(return_value="value")
+    register_part("unused", build)
+    _write(config_file, {"stations": {}, "display": {}}, bump_ns=10**9)
+
+    reload()
+
+    build.assert_not_called()
+
+
+def test_pinned_request_keeps_its_generation(config_file):
+    token = pin()
+    try:
+        _write(config_file, {"stations": {}, "display": {}}, bump_ns=10**9)
+        reload()
+        assert current().number == 1
+        assert "a" in config["stations"]
+    finally:
+        unpin(token)
+    assert current().number == 2
+
+
+def test_failed_build_keeps_old_generation(config_file, reload_metrics):
+    register_part("flaky", Mock(side_effect=[object(), RuntimeError("bad snapshot")]))
+    built = current().part("flaky")
+
+    assert reload(force=True) is None
+
+    assert current().number == 1
+    assert current().part("flaky") is built
+    reload_metrics.increment.assert_called_once_with("reload", tags={"outcome": "failed", "trigger": "manual"})
+
+
+def test_invalid_config_keeps_old_generation(config_file):
+    config_file.write_text("{not json")
+    os.utime(config_file, ns=(0, config_file.stat().st_mtime_ns + 10**9))
+
+    assert reload() is None
+    assert config["stations"]["a"]["walk_time"] == 3
+
+
+def test_restart_only_key_change_is_logged(config_file, caplog):
+    restart_only("display.refresh_interval_s")
+    _write(config_file, {"stations": {"a": {"walk_time": 3}}, "display": {"refresh_interval_s": 5}}, bump_ns=10**9)
+
+    reload()
+
+    assert "['display.refresh_interval_s'] changed but only take effect after a restart" in caplog.text
+
+
+def test_watcher_reloads_on_sighup_without_polling(config_file):
+    reloaded = threading.Event()
+    watcher = ReloadWatcher(interval_s=0)
+    with patch("src.generation.reload", side_effect=lambda trigger, force: reloaded.set()) as mock_reload:
+        watcher.start(handle_sighup=False)
+        watcher._on_sighup(None, None)
+        assert reloaded.wait(timeout=2)
+        watcher.stop()
+    mock_reload.assert_called_once_with("sighup", force=True)
+
+
+def test_live_config_is_read_only():
+    with pytest.raises(TypeError):
+        config["stations"] = {}
+    assert generation.current().config is generation._current.config
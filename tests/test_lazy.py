@@ -0,0 +1,66 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from src.lazy import Lazy
+from src.lazy import registered
+
+
+def test_factory_runs_once_on_first_get():
+    factory = Mock(return_value="value")
+    lazy = Lazy("test", factory)
+
+    assert not lazy.loaded
+    factory.assert_not_called()
+    assert lazy.get() == "value"
+    assert lazy.get() == "value"
+    factory.assert_called_once()
+    assert lazy.loaded
+    assert lazy.init_seconds is not None
+
+
+def test_failing_factory_is_retried():
+    factory = Mock(side_effect=[RuntimeError("boom"), "value"])
+    lazy = Lazy("test", factory)
+
+    with pytest.raises(RuntimeError):
+        lazy.get()
+    assert not lazy.loaded
+    assert lazy.get() == "value"
+
+
+def test_concurrent_first_callers_share_one_factory_run():
+    release = threading.Event()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        release.wait(timeout=1)
+        return object()
+
+    lazy = Lazy("test", factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({id(result) for result in results}) == 1
+
+
+def test_reset_runs_factory_again():
+    factory = Mock(side_effect=["first", "second"])
+    lazy = Lazy("test", factory)
+
+    assert lazy.get() == "first"
+    lazy.reset()
+    assert lazy.get() == "second"
+
+
+def test_instances_are_registered():
+    lazy = Lazy("registered", Mock())
+    assert lazy in registered()
@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.nearby_table import NearbyTable
+from src.nearby_table import cell_center
+from src.nearby_table import cell_index
+from src.nearby_table import encode_nearby_table
+from src.stop_snapshot import SnapshotFormatError
+from src.stop_snapshot import source_digest
+from src.stop_table import StopTable
+from src.vbb_api import NearbyStops
+
+ASSETS = Path(__file__).resolve().parent.parent / "assets"
+SNAPSHOT_JSON = (ASSETS / "vbb_stations.json").read_bytes()
+STOP_TABLE = StopTable(json.loads(SNAPSHOT_JSON))
+# A small patch of Mitte/Prenzlauer Berg keeps the build fast.
+BBOX = (52.515, 52.56, 13.38, 13.43)
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory) -> Path:
+    path = tmp_path_factory.mktemp("nearby") / "nearby.bin"
+    path.write_bytes(encode_nearby_table(STOP_TABLE, BBOX, 20, 1500, source_digest(SNAPSHOT_JSON)))
+    return path
+
+
+def test_cell_index_matches_rounding():
+    for value in [52.5215, 52.52149, 13.4, 13.0005, 52.9999]:
+        assert cell_center(cell_index(value)) == round(value, 3)
+
+
+def test_lookup_matches_runtime_ranking_from_cell_center(table_path):
+    table = NearbyTable(table_path, expected_sha256=source_digest(SNAPSHOT_JSON))
+
+    for lat, lon in [(52.5219, 13.4132), (52.552045, 13.399863), (52.515, 13.43), (52.56, 13.38)]:
+        positions, meters = table.lookup(lat, lon, 20)
+        expected_positions, expected_meters = STOP_TABLE.nearest_positions(round(lat, 3), round(lon, 3), 20, 1500)
+        assert positions.tolist() == expected_positions.tolist()
+        assert meters.tolist() == np.round(expected_meters).tolist()
+
+
+def test_lookup_truncates_to_limit_and_misses_outside_area(table_path):
+    table = NearbyTable(table_path)
+
+    assert len(table.lookup(52.5219, 13.4132, 3)[0]) == 3
+    assert table.lookup(52.4, 13.4132, 20) is None
+    assert table.covers(10, 1500)
+    assert not table.covers(30, 1500)
+    assert not table.covers(20, 1000)
+
+
+def test_rejects_table_built_from_other_snapshot(table_path):
+    with pytest.raises(SnapshotFormatError, match="different"):
+        NearbyTable(table_path, expected_sha256=source_digest(b"[]"))
+
+
+@pytest.mark.parametrize("content", [b"", b"VBBS" + bytes(80)])
+def test_rejects_corrupt_files(tmp_path, content):
+    path = tmp_path / "broken.bin"
+    path.write_bytes(content)
+    with pytest.raises(SnapshotFormatError):
+        NearbyTable(path)
+
+
+def test_nearby_stops_answers_from_table_like_runtime_ranking(table_path):
+    precomputed = NearbyStops(STOP_TABLE, precomputed=NearbyTable(table_path))
+    runtime = NearbyStops(STOP_TABLE)
+
+    for lat, lon in [(52.5219, 13.4132), (52.4, 13.3)]:
+        from_table = precomputed.lookup(lat, lon, 20, 1500)
+        assert [(s.id, s.distance) for s in from_table] == [
+            (s.id, s.distance) for s in runtime.lookup(lat, lon, 20, 1500)
+        ]
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.provenance import BUILTIN_RULES
+from src.provenance import ProvenanceNormaliser
+from src.provenance import ProvenanceRules
+
+SNAPSHOT = Path(__file__).resolve().parent.parent / "assets" / "vbb_stations.json"
+
+
+def _chained(provenance: str, max_length: int = 28) -> str:
+    """The if/replace chain the rules were distilled from."""
+    if "Hauptbahnhof" in provenance:
+        provenance = provenance.replace("Hauptbahnhof", "HBF")
+    elif ", Bahnhof" in provenance:
+        provenance = provenance.replace(", Bahnhof", "")
+    elif "(Berlin)" in provenance:
+        provenance = provenance.replace("(Berlin)", "")
+    elif "Bhf" in provenance:
+        provenance = provenance.replace("Bhf", "")
+    for noise in ("S+U", "(TF)", "S ", "U ", "[Gleis 1-8]"):
+        provenance = provenance.replace(noise, "")
+    return provenance[:max_length].strip()
+
+
+def test_builtin_rules_match_the_replace_chain_for_every_snapshot_stop():
+    normaliser = ProvenanceNormaliser(BUILTIN_RULES)
+    names = {stop["name"] for stop in json.loads(SNAPSHOT.read_text())}
+    names |= {"Berlin Hauptbahnhof (S-Bahn), Bahnhof", "S+U Gesundbrunnen Bhf (Berlin)", "Flughafen BER [Gleis 1-8]"}
+
+    assert {name: normaliser(name) for name in names} == {name: _chained(name) for name in names}
+
+
+def test_alternatives_apply_by_priority_not_position():
+    normaliser = ProvenanceNormaliser(BUILTIN_RULES)
+    assert normaliser.rewrite("Bhf Wannsee Hauptbahnhof") == "Bhf Wannsee HBF"
+
+
+def test_results_are_memoised_and_counted():
+    normaliser = ProvenanceNormaliser(BUILTIN_RULES)
+    with patch.object(normaliser, "rewrite", wraps=normaliser.rewrite) as rewrite:
+        for _ in range(3):
+            assert normaliser("S Wannsee (Berlin)") == "Wannsee"
+        normaliser("S Wannsee (Berlin)", max_length=3)
+
+    assert rewrite.call_count == 2
+    assert (normaliser.hits, normaliser.misses, len(normaliser)) == (2, 2, 2)
+
+
+def test_full_memo_is_cleared():
+    normaliser = ProvenanceNormaliser(BUILTIN_RULES, max_entries=2)
+    for name in ("A", "B", "C"):
+        normaliser(name)
+    assert len(normaliser) == 1
+
+
+def test_hit_ratio_is_reported_every_n_lookups():
+    normaliser = ProvenanceNormaliser(BUILTIN_RULES, report_every=4)
+    with patch("src.provenance.metrics") as mock_metrics:
+        for _ in range(4):
+            normaliser("S Pankow")
+    mock_metrics.gauge.assert_any_call("provenance_cache.hit_ratio", 0.75)
+    mock_metrics.gauge.assert_any_call("provenance_cache.entries", 1)
+
+
+def test_config_rules_run_before_builtins():
+    rules = ProvenanceRules.from_config(
+        {"provenance_rules": {"alternatives": [["Flughafen BER", "BER"]], "always": [["Terminal 1-2", "T1"]]}}
+    )
+    normaliser = ProvenanceNormaliser(rules)
+
+    assert rules.alternatives[0] == ("Flughafen BER", "BER")
+    assert normaliser("S Flughafen BER Terminal 1-2 Bhf") == "BER T1 Bhf"
+
+
+@pytest.mark.parametrize("app_config", [{}, {"provenance_rules": {}}])
+def test_without_config_rules_only_builtins_apply(app_config):
+    assert ProvenanceRules.from_config(app_config) == BUILTIN_RULES
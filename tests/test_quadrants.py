@@ -9,6 +9,7 @@ import pytest
 
 from src.quadrants import DepartureSlot
 from src.quadrants import QuadrantData
+from src.quadrants import QuadrantRoutes
 from src.quadrants import filter_and_group
 
 
@@ -90,6 +91,15 @@ def test_filter_and_group_includes_departures_above_min_minutes(now):
     assert 9 <= slot.minutes <= 11
 
 
+@pytest.mark.parametrize(("provenance", "expected"), [("S+U Gesundbrunnen Bhf", "Gesundbrunnen"), (None, None)])
+def test_filter_and_group_cleanses_provenance(now, provenance, expected):
+    dep = _make_departure("S1", minutes_until=10, provenance=provenance)
+    with pytest.MonkeyPatch().context() as mp:
+        mp.setattr("src.quadrants.compute_direction", lambda _: "↑")
+        result = filter_and_group([dep], now, QUADRANTS_CONFIG, min_minutes=5)
+    assert result[0].departures[0].provenance == expected
+
+
 def test_filter_and_group_rejects_missing_trip_id(now):
     dep = _make_departure("S1", minutes_until=10, trip_id="")
     with pytest.MonkeyPatch().context() as mp:
@@ -152,3 +162,18 @@ def test_quadrant_data_dataclass():
     assert q.label == "S1/26"
     assert q.arrow == "↑"
     assert q.departures == [slot]
+
+
+def test_quadrant_routes_first_listed_quadrant_wins():
+    routes = QuadrantRoutes.from_config(
+        [*QUADRANTS_CONFIG, {"key": "dup", "label": "dup", "lines": ["S1"], "direction": "↑"}]
+    )
+    assert routes.route("S1", "↑") == "s1_up"
+    assert routes.route("S8", "↻") == "s8_ring"
+    assert routes.route("S8", "↓") is None
+
+
+def test_filter_and_group_uses_precompiled_routes(now):
+    routes = QuadrantRoutes.from_config(QUADRANTS_CONFIG)
+    result = filter_and_group([_make_departure("S8", 10)], now, QUADRANTS_CONFIG, routes=routes)
+    assert [len(q.departures) for q in result] == [0, 0, 1, 0]
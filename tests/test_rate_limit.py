@@ -0,0 +1,33 @@
+from src.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+
+
+def test_burst_is_free_then_callers_queue_in_order():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=2, burst=2, clock=clock, sleep=clock.sleep)
+
+    waits = [bucket.acquire() for _ in range(4)]
+
+    assert waits == [0.0, 0.0, 0.5, 1.0]
+    assert clock.sleeps == [0.5, 1.0]
+
+
+def test_tokens_refill_over_time_up_to_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_s=1, burst=1, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0.0
+    clock.now = 10
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 1.0
@@ -0,0 +1,38 @@
+from src.startup_profile import StartupProfile
+from src.startup_profile import format_profile
+from src.startup_profile import parse_importtime
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |   _io
+import time:       600 |       1000 | _frozen_importlib_external
+import time:        50 |         50 | src
+import time:       100 |        100 |       werkzeug.urls
+import time:      2000 |     240000 |     flask.app
+import time:      1000 |     241000 |   flask
+import time:       500 |       9000 |   src.config
+import time:      4000 |     260000 | src.app
+import time:       200 |        200 | unrelated
+"""
+
+
+def test_parse_importtime_returns_direct_imports_slowest_first():
+    assert parse_importtime(IMPORTTIME, "src.app") == [("flask", 241.0), ("src.config", 9.0)]
+
+
+def test_parse_importtime_missing_module():
+    assert parse_importtime(IMPORTTIME, "src.display") == []
+
+
+def test_format_profile_reports_deferred_costs_and_failures():
+    profile = StartupProfile(
+        module="src.app",
+        import_ms=260.0,
+        imports=[("flask", 241.0)],
+        deferred=[{"name": "stop snapshot", "ms": 12.5}, {"name": "Google Maps client", "error": "ValueError: bad"}],
+    )
+    lines = format_profile(profile)
+    assert lines[0] == "import src.app: 260 ms"
+    assert "flask" in lines[1]
+    assert any("stop snapshot" in line and "12.5 ms" in line for line in lines)
+    assert any("failed (ValueError: bad)" in line for line in lines)
@@ -0,0 +1,61 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from src.stop_index import StopGridIndex
+from src.stop_index import haversine_meters
+
+SNAPSHOT = json.loads((Path(__file__).resolve().parent.parent / "assets" / "vbb_stations.json").read_text())
+
+
+def _stop(stop_id: str, latitude: float, longitude: float) -> dict:
+    return {"id": stop_id, "location": {"latitude": latitude, "longitude": longitude}}
+
+
+def _brute_force(stops: list[dict], latitude: float, longitude: float, limit: int, radius_m: float):
+    pairs = []
+    for stop in stops:
+        loc = stop["location"]
+        meters = haversine_meters(latitude, longitude, loc["latitude"], loc["longitude"])
+        if meters <= radius_m:
+            pairs.append((meters, stop))
+    pairs.sort(key=lambda pair: pair[0])
+    return pairs[:limit]
+
+
+def test_haversine_known_distance():
+    # Alexanderplatz -> Brandenburger Tor is ~2.5 km
+    assert haversine_meters(52.5219, 13.4132, 52.5163, 13.3777) == pytest.approx(2480, rel=0.05)
+
+
+@pytest.mark.parametrize("radius_m", [300, 1500, 5000, 1e9])
+def test_nearest_matches_full_scan_on_snapshot(radius_m):
+    index = StopGridIndex(SNAPSHOT)
+    rng = random.Random(7)
+    for _ in range(200):
+        lat, lon = rng.uniform(52.3, 52.7), rng.uniform(13.0, 13.8)
+        assert index.nearest(lat, lon, 20, radius_m) == _brute_force(SNAPSHOT, lat, lon, 20, radius_m)
+
+
+def test_nearest_keeps_snapshot_order_for_equal_distances():
+    stops = [_stop("b", 52.5, 13.4), _stop("a", 52.5, 13.4), _stop("c", 52.5, 13.401)]
+    ranked = StopGridIndex(stops).nearest(52.5, 13.4, 2, 1000)
+    assert [stop["id"] for _, stop in ranked] == ["b", "a"]
+
+
+def test_nearest_finds_stops_across_cell_boundaries():
+    # 0.0099 and 0.0101 sit in neighbouring 0.01° cells, ~25 m apart
+    stops = [_stop("west", 52.5, 13.3999), _stop("east", 52.5, 13.4001)]
+    ranked = StopGridIndex(stops).nearest(52.5, 13.4001, 5, 50)
+    assert [stop["id"] for _, stop in ranked] == ["east", "west"]
+
+
+def test_nearest_excludes_stops_beyond_radius():
+    stops = [_stop("near", 52.5, 13.4), _stop("far", 52.6, 13.4)]
+    assert [stop["id"] for _, stop in StopGridIndex(stops).nearest(52.5, 13.4, 5, 1500)] == ["near"]
+
+
+def test_empty_index():
+    assert StopGridIndex([]).nearest(52.5, 13.4, 5, 1500) == []
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.stop_snapshot import BinarySnapshot
+from src.stop_snapshot import SnapshotFormatError
+from src.stop_snapshot import source_digest
+from src.stop_snapshot import write_binary_snapshot
+from src.stop_table import StopTable
+
+ASSETS = Path(__file__).resolve().parent.parent / "assets"
+SNAPSHOT_JSON = (ASSETS / "vbb_stations.json").read_bytes()
+SNAPSHOT = json.loads(SNAPSHOT_JSON)
+
+
+@pytest.fixture
+def binary_path(tmp_path: Path) -> Path:
+    path = tmp_path / "stations.bin"
+    write_binary_snapshot(SNAPSHOT, path, SNAPSHOT_JSON)
+    return path
+
+
+def test_round_trip_decodes_every_stop(binary_path):
+    snapshot = BinarySnapshot(binary_path, expected_sha256=source_digest(SNAPSHOT_JSON))
+
+    assert len(snapshot) == len(SNAPSHOT)
+    assert list(snapshot) == SNAPSHOT
+    assert snapshot[-1] == SNAPSHOT[-1]
+    assert snapshot.ids[5] == SNAPSHOT[5]["id"]
+    assert snapshot.names[2:4] == [SNAPSHOT[2]["name"], SNAPSHOT[3]["name"]]
+
+
+def test_binary_is_smaller_than_json(binary_path):
+    assert binary_path.stat().st_size < len(SNAPSHOT_JSON) / 3
+
+
+def test_rejects_snapshot_built_from_other_json(binary_path):
+    with pytest.raises(SnapshotFormatError, match="different"):
+        BinarySnapshot(binary_path, expected_sha256=source_digest(b"[]"))
+
+
+@pytest.mark.parametrize("content", [b"", b"JSON" + bytes(60)])
+def test_rejects_corrupt_files(tmp_path, content):
+    path = tmp_path / "broken.bin"
+    path.write_bytes(content)
+    with pytest.raises(SnapshotFormatError):
+        BinarySnapshot(path)
+
+
+def test_stop_table_from_records_ranks_like_json_table(binary_path):
+    snapshot = BinarySnapshot(binary_path)
+    from_binary = StopTable.from_records(snapshot, snapshot.ids, snapshot.names, snapshot.records)
+    from_json = StopTable(SNAPSHOT)
+
+    for lat, lon in [(52.5219, 13.4132), (52.552045, 13.399863), (52.45, 13.2)]:
+        positions, meters = from_binary.nearest_positions(lat, lon, 20, 1500)
+        expected_positions, expected_meters = from_json.nearest_positions(lat, lon, 20, 1500)
+        assert positions.tolist() == expected_positions.tolist()
+        assert np.array_equal(meters, expected_meters)
+    assert from_binary.nearest(52.5219, 13.4132, 1, 1500) == from_json.nearest(52.5219, 13.4132, 1, 1500)
+
+
+def test_bundled_binary_snapshot_matches_json():
+    """Regenerate with `python scripts/fetch_stations.py --binary-only` after editing vbb_stations.json."""
+    snapshot = BinarySnapshot(ASSETS / "vbb_stations.bin", expected_sha256=source_digest(SNAPSHOT_JSON))
+    assert list(snapshot) == SNAPSHOT
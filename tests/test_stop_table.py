@@ -0,0 +1,64 @@
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.stop_index import StopGridIndex
+from src.stop_table import PRODUCT_BITS
+from src.stop_table import StopTable
+from src.stop_table import product_mask
+
+SNAPSHOT = json.loads((Path(__file__).resolve().parent.parent / "assets" / "vbb_stations.json").read_text())
+NO_PRODUCTS = {name: False for name in PRODUCT_BITS}
+
+
+def _stop(stop_id: str, latitude: float, longitude: float, **products: bool) -> dict:
+    return {
+        "id": stop_id,
+        "name": stop_id,
+        "location": {"latitude": latitude, "longitude": longitude},
+        "products": {**NO_PRODUCTS, **products},
+    }
+
+
+def test_product_mask():
+    assert product_mask({**NO_PRODUCTS, "suburban": True, "bus": True}) == 0b1001
+    assert product_mask(NO_PRODUCTS) == 0
+
+
+def test_columns_parallel_to_snapshot():
+    table = StopTable(SNAPSHOT)
+    assert len(table) == len(SNAPSHOT)
+    assert table.ids[10] == SNAPSHOT[10]["id"]
+    assert table.latitudes[10] == SNAPSHOT[10]["location"]["latitude"]
+    assert table.products[10] == product_mask(SNAPSHOT[10]["products"])
+
+
+@pytest.mark.parametrize("radius_m", [300, 1500, 5000, 1e9])
+def test_nearest_matches_grid_index_on_snapshot(radius_m):
+    table, index = StopTable(SNAPSHOT), StopGridIndex(SNAPSHOT)
+    rng = random.Random(11)
+    for _ in range(200):
+        lat, lon = rng.uniform(52.3, 52.7), rng.uniform(13.0, 13.8)
+        expected = [(round(meters), stop["id"]) for meters, stop in index.nearest(lat, lon, 20, radius_m)]
+        assert [(round(meters), stop["id"]) for meters, stop in table.nearest(lat, lon, 20, radius_m)] == expected
+
+
+def test_nearest_keeps_snapshot_order_for_ties_across_the_cutoff():
+    stops = [_stop(str(i), 52.5, 13.4 + (0.001 if i < 3 else 0)) for i in range(6)]
+    positions, _ = StopTable(stops).nearest_positions(52.5, 13.4, 4, 1000)
+    assert positions.tolist() == [3, 4, 5, 0]
+
+
+def test_nearest_within_radius_only():
+    table = StopTable([_stop("near", 52.5, 13.4), _stop("far", 52.6, 13.4)])
+    positions, meters = table.nearest_positions(52.5, 13.4, 5, 1500)
+    assert positions.tolist() == [0]
+    assert meters[0] == 0
+
+
+def test_distances_vectorised():
+    table = StopTable([_stop("a", 52.5, 13.4), _stop("b", 52.51, 13.4)])
+    assert np.allclose(table.distances(52.5, 13.4), [0, 1112], atol=1)
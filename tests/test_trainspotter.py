@@ -77,7 +77,9 @@ def test_main_with_stations_and_departures(
     mock_departure.line = Mock(name="S41", product="suburban")
     mock_departure.when = datetime.now(timezone.utc)
     mock_departure.platform = "1"
-    mock_departure.provenance = "Ringbahn"
+    mock_departure.provenance = None
+    mock_departure.destination = Mock()
+    mock_departure.destination.name = "S Westkreuz (Berlin)"
     mock_get_trains.return_value = [mock_departure]
     mock_walk_time.return_value = 10
     mock_direction.return_value = "↻"
@@ -87,3 +89,4 @@ def test_main_with_stations_and_departures(
     main()
 
     assert any("Test Station" in str(call) for call in mock_print.call_args_list)
+    assert any("Westkreuz" in str(call) and "(Berlin)" not in str(call) for call in mock_print.call_args_list)
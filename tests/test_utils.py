@@ -1,15 +1,20 @@
+import threading
 from unittest.mock import Mock
+from unittest.mock import patch
 
 import pytest
 
 from src.datamodels import Departure
 from src.datamodels import Line
+from src.utils import WalkTimeResolver
 from src.utils import bearing_to_cardinal
 from src.utils import cleanse_provenance
 from src.utils import cleanse_transport_type
 from src.utils import get_direction
 from src.utils import get_initial_bearing
 from src.utils import get_thresholds
+from src.walk_time_store import StubWalkClient
+from src.walk_time_store import WalkTimeStore
 
 
 def test_get_thresholds():
@@ -101,3 +106,128 @@ def test_bearing_to_cardinal(bearing: float, expected: str):
 )
 def test_get_direction(line: str, cardinal: str, expected: str):
     assert get_direction(line, cardinal) == expected
+
+
+WALK_STATIONS = {"brunnen": {"walk_time": 4}, "gesundbrunnen": {"walk_time": 9}, "pankow": {"walk_time": 12}}
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("S+U Gesundbrunnen Bhf (Berlin)", 4),  # both keys occur; the one listed first wins
+        ("S+U Pankow (Berlin)", 12),
+        ("S Wollankstr. (Berlin)", None),
+    ],
+)
+def test_configured_walk_time_first_config_key_wins(name: str, expected: int | None):
+    resolver = WalkTimeResolver(WALK_STATIONS)
+    assert resolver.configured_minutes(name) == expected
+    assert resolver.configured_minutes(name) == expected
+
+
+def test_configured_walk_time_without_stations():
+    assert WalkTimeResolver({}).configured_minutes("S Pankow") is None
+
+
+def _unconfigured_station(station_id: str = "900130002") -> Mock:
+    station = Mock(id=station_id, location=Mock(latitude=52.5493, longitude=13.3881))
+    station.name = "S Wollankstr. (Berlin)"
+    return station
+
+
+def _resolver(client: Mock | None = None) -> WalkTimeResolver:
+    return WalkTimeResolver(WALK_STATIONS, WalkTimeStore(), client or Mock(wraps=StubWalkClient()))
+
+
+def test_gmaps_walk_time_is_memoised_per_station_and_cell():
+    client = Mock()
+    client.walk_minutes.side_effect = [[7], [11]]
+    resolver = _resolver(client)
+    with patch("src.utils.metrics") as mock_metrics:
+        assert resolver.resolve(_unconfigured_station(), (52.5219, 13.4132)) == 7
+        assert resolver.resolve(_unconfigured_station(), (52.52191, 13.41318)) == 7
+        assert resolver.resolve(_unconfigured_station(), (52.5300, 13.4132)) == 11
+
+    assert client.walk_minutes.call_count == 2
+    client.walk_minutes.assert_any_call((52.521, 13.413), [(52.5493, 13.3881)])
+    mock_metrics.increment.assert_any_call("walk_time_cache.hit")
+
+
+def test_uncached_stations_are_looked_up_in_one_batch():
+    resolver = _resolver()
+    stations = [_unconfigured_station(station_id) for station_id in ("a", "b", "c")]
+    resolver.resolve(stations[0], (52.5219, 13.4132))
+
+    walk_times = resolver.resolve_many(stations, (52.5219, 13.4132))
+
+    assert resolver.client.walk_minutes.call_count == 2
+    assert len(resolver.client.walk_minutes.call_args.args[1]) == 2
+    assert set(walk_times) == {"a", "b", "c"}
+
+
+def test_configured_and_unlocated_stations_are_not_looked_up():
+    resolver = _resolver()
+    configured = _unconfigured_station("c")
+    configured.name = "S+U Pankow (Berlin)"
+    unlocated = _unconfigured_station("u")
+    unlocated.location = None
+
+    assert resolver.resolve_many([configured, unlocated], (52.5219, 13.4132)) == {}
+    resolver.client.walk_minutes.assert_not_called()
+
+
+def test_stored_walk_times_survive_a_new_resolver():
+    store = WalkTimeStore()
+    WalkTimeResolver(WALK_STATIONS, store, StubWalkClient()).resolve(_unconfigured_station(), (52.5219, 13.4132))
+    client = Mock()
+    with patch("src.utils.metrics") as mock_metrics:
+        walk_time = WalkTimeResolver(WALK_STATIONS, store, client).resolve(_unconfigured_station(), (52.5219, 13.4132))
+
+    assert walk_time is not None
+    client.walk_minutes.assert_not_called()
+    mock_metrics.increment.assert_called_once_with("walk_time_cache.store")
+
+
+def test_stations_without_a_route_are_memoised_but_not_stored():
+    client = Mock()
+    client.walk_minutes.return_value = [None]
+    resolver = _resolver(client)
+    for _ in range(2):
+        assert resolver.resolve(_unconfigured_station(), (52.5219, 13.4132)) is None
+
+    client.walk_minutes.assert_called_once()
+    assert len(resolver.store) == 0
+
+
+def test_lookups_for_other_cells_do_not_wait_for_a_slow_cell():
+    slow_cell_started = threading.Event()
+    release_slow_cell = threading.Event()
+
+    def walk_minutes(origin, destinations):
+        if origin == (52.521, 13.413):
+            slow_cell_started.set()
+            release_slow_cell.wait(timeout=5)
+        return [5] * len(destinations)
+
+    client = Mock()
+    client.walk_minutes.side_effect = walk_minutes
+    resolver = _resolver(client)
+    slow = threading.Thread(target=resolver.resolve, args=(_unconfigured_station(), (52.5219, 13.4132)))
+    slow.start()
+    try:
+        assert slow_cell_started.wait(timeout=5)
+        walk_times = []
+        fast = threading.Thread(
+            target=lambda: walk_times.append(resolver.resolve(_unconfigured_station(), (52.5300, 13.4132)))
+        )
+        fast.start()
+        fast.join(timeout=2)
+        assert walk_times == [5]
+    finally:
+        release_slow_cell.set()
+        slow.join()
+
+
+def test_gmaps_walk_time_requires_coordinates():
+    with pytest.raises(AssertionError, match="required if Station not configured"):
+        WalkTimeResolver(WALK_STATIONS).resolve(_unconfigured_station(), None)
@@ -1,17 +1,51 @@
+import json
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
 import requests
 
+from src.datamodels import NearbyStation
 from src.datamodels import Station
+from src.stop_table import StopTable
+from src.vbb_api import MAX_ATTEMPTS
+from src.vbb_api import MAX_NEARBY_STATIONS
+from src.vbb_api import NearbyStops
 from src.vbb_api import VBBAPIError
+from src.vbb_api import _all_stations
 from src.vbb_api import _classify_request_exception
+from src.vbb_api import _departure_cache
+from src.vbb_api import _last_good
+from src.vbb_api import _rank_stops_by_distance
+from src.vbb_api import _stop_table
+from src.vbb_api import circuit_breaker
+from src.vbb_api import decode_departures
 from src.vbb_api import get_departures
+from src.vbb_api import get_departures_with_fallback
 from src.vbb_api import get_inbound_trains
 from src.vbb_api import get_nearby_stations
 
 
+@pytest.fixture(autouse=True)
+def clear_vbb_state():
+    _departure_cache.clear()
+    _last_good.clear()
+    circuit_breaker.reset()
+    yield
+    _departure_cache.clear()
+    _last_good.clear()
+    circuit_breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep():
+    with patch("src.vbb_api.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
 def _minimal_stop():
     return {
         "type": "stop",
@@ -48,6 +82,13 @@ ALEXANDERPLATZ_FIXTURE = {
     "stationDHID": "de:11000:900100003",
 }
 
+# Same spot as Alexanderplatz but without S-Bahn: listed first in the snapshot, ranked after it.
+BUS_ONLY_FIXTURE = {
+    **ALEXANDERPLATZ_FIXTURE,
+    "id": "900100999",
+    "products": {**ALEXANDERPLATZ_FIXTURE["products"], "suburban": False},
+}
+
 REMOTE_FIXTURE = {
     "type": "stop",
     "id": "900260005",
@@ -66,9 +107,9 @@ REMOTE_FIXTURE = {
 }
 
 
-@patch("src.vbb_api._MAX_STRAIGHTLINE_DISTANCE_M", 1e9)
-@patch("src.vbb_api._ALL_STATIONS", [ALEXANDERPLATZ_FIXTURE, REMOTE_FIXTURE])
-def test_get_nearby_stations_returns_sorted_by_distance():
+@patch("src.vbb_api._max_straightline_m", lambda: 1e9)
+@patch("src.vbb_api._nearby_stops", return_value=NearbyStops(StopTable([ALEXANDERPLATZ_FIXTURE, REMOTE_FIXTURE])))
+def test_get_nearby_stations_returns_sorted_by_distance(mock_nearby_stops):
     coords_near_alex = (52.5219, 13.4132)
     stations = get_nearby_stations(coords_near_alex)
 
@@ -76,61 +117,87 @@ def test_get_nearby_stations_returns_sorted_by_distance():
     assert stations[0].distance < stations[1].distance
 
 
-@patch("src.vbb_api._MAX_STRAIGHTLINE_DISTANCE_M", 1e9)
-@patch("src.vbb_api._ALL_STATIONS", [ALEXANDERPLATZ_FIXTURE, REMOTE_FIXTURE])
-def test_get_nearby_stations_uses_config_when_no_coordinates():
+@patch("src.vbb_api._max_straightline_m", lambda: 1e9)
+@patch("src.vbb_api._nearby_stops", return_value=NearbyStops(StopTable([ALEXANDERPLATZ_FIXTURE, REMOTE_FIXTURE])))
+def test_get_nearby_stations_uses_config_when_no_coordinates(mock_nearby_stops):
     stations = get_nearby_stations()
     assert len(stations) == 2
-    assert all(isinstance(s, Station) for s in stations)
+    assert all(isinstance(s, NearbyStation) and isinstance(s.station, Station) for s in stations)
 
 
-@patch("src.vbb_api._ALL_STATIONS", [ALEXANDERPLATZ_FIXTURE, REMOTE_FIXTURE])
-def test_get_nearby_stations_excludes_stops_beyond_straightline_radius():
+@patch("src.vbb_api._nearby_stops", return_value=NearbyStops(StopTable([ALEXANDERPLATZ_FIXTURE, REMOTE_FIXTURE])))
+def test_get_nearby_stations_excludes_stops_beyond_straightline_radius(mock_nearby_stops):
     """Spandau is far from Alexanderplatz; default max_nearby_straightline_m should drop it."""
     stations = get_nearby_stations((52.5219, 13.4132))
     assert len(stations) == 1
     assert stations[0].id == ALEXANDERPLATZ_FIXTURE["id"]
 
 
-@patch("src.vbb_api._ALL_STATIONS", [ALEXANDERPLATZ_FIXTURE])
-def test_get_nearby_stations_computes_haversine_distance():
+@patch("src.vbb_api._nearby_stops", return_value=NearbyStops(StopTable([BUS_ONLY_FIXTURE, ALEXANDERPLATZ_FIXTURE])))
+def test_get_nearby_stations_lists_suburban_stops_first(mock_nearby_stops):
+    stations = get_nearby_stations((52.5219, 13.4132))
+    assert [s.id for s in stations] == [ALEXANDERPLATZ_FIXTURE["id"], BUS_ONLY_FIXTURE["id"]]
+
+
+@patch("src.vbb_api._nearby_stops", return_value=NearbyStops(StopTable([ALEXANDERPLATZ_FIXTURE])))
+def test_get_nearby_stations_computes_haversine_distance(mock_nearby_stops):
     stations = get_nearby_stations((52.5219, 13.4132))
     assert stations[0].distance > 0
 
 
+@patch("src.vbb_api.metrics")
+def test_nearby_stops_memoises_per_cell_and_shares_stations(mock_metrics):
+    nearby_stops = NearbyStops(StopTable([ALEXANDERPLATZ_FIXTURE, BUS_ONLY_FIXTURE]))
+
+    first = nearby_stops.lookup(52.52191, 13.41321, MAX_NEARBY_STATIONS, 1500)
+    same_cell = nearby_stops.lookup(52.52189, 13.41319, MAX_NEARBY_STATIONS, 1500)
+    next_cell = nearby_stops.lookup(52.5235, 13.4132, MAX_NEARBY_STATIONS, 1500)
+
+    assert same_cell == first
+    assert [outcome.args[0] for outcome in mock_metrics.increment.call_args_list] == [
+        "nearby_cache.miss",
+        "nearby_cache.hit",
+        "nearby_cache.miss",
+    ]
+    assert next_cell[0].distance != first[0].distance
+    assert next_cell[0].station is first[0].station is nearby_stops.stations[0]
+
+
 @patch("src.vbb_api.session.get")
 def test_get_inbound_trains_success(mock_get):
     mock_response = Mock()
-    mock_response.json.return_value = {
-        "departures": [
-            {
-                "tripId": "1|123|0|80|1012025",
-                "stop": _minimal_stop(),
-                "when": "2025-01-09T12:30:00+01:00",
-                "plannedWhen": "2025-01-09T12:30:00+01:00",
-                "delay": None,
-                "platform": "1",
-                "plannedPlatform": "1",
-                "prognosisType": None,
-                "direction": "Spandau",
-                "provenance": "via Friedrichstraße",
-                "line": {
-                    "type": "line",
-                    "id": "s41",
-                    "fahrtNr": "12345",
-                    "name": "S41",
-                    "public": True,
-                    "adminCode": "80____",
-                    "productName": "S",
-                    "mode": "train",
-                    "product": "suburban",
-                },
-                "remarks": [],
-                "origin": None,
-                "destination": None,
-            }
-        ]
-    }
+    mock_response.content = json.dumps(
+        {
+            "departures": [
+                {
+                    "tripId": "1|123|0|80|1012025",
+                    "stop": _minimal_stop(),
+                    "when": "2025-01-09T12:30:00+01:00",
+                    "plannedWhen": "2025-01-09T12:30:00+01:00",
+                    "delay": None,
+                    "platform": "1",
+                    "plannedPlatform": "1",
+                    "prognosisType": None,
+                    "direction": "Spandau",
+                    "provenance": "via Friedrichstraße",
+                    "line": {
+                        "type": "line",
+                        "id": "s41",
+                        "fahrtNr": "12345",
+                        "name": "S41",
+                        "public": True,
+                        "adminCode": "80____",
+                        "productName": "S",
+                        "mode": "train",
+                        "product": "suburban",
+                    },
+                    "remarks": [],
+                    "origin": None,
+                    "destination": None,
+                }
+            ]
+        }
+    ).encode()
     mock_response.raise_for_status = Mock()
     mock_get.return_value = mock_response
 
@@ -183,3 +250,261 @@ def test_vbb_api_error_summary_for_http_status():
     assert error.summary == "VBB returned 503"
     diagnostics = error.to_diagnostics()
     assert diagnostics["vbb_http_status"] == 503
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_serves_repeat_calls_from_cache(mock_get):
+    mock_response = Mock()
+    mock_response.content = json.dumps({"departures": []}).encode()
+    mock_get.return_value = mock_response
+
+    assert get_departures("900110011") == []
+    assert get_departures("900110011") == []
+    get_departures("900100003")
+
+    assert mock_get.call_count == 2
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_does_not_cache_errors(mock_get):
+    mock_response = Mock()
+    mock_response.content = json.dumps({"departures": []}).encode()
+    mock_get.side_effect = [requests.HTTPError("404", response=Mock(status_code=404)), mock_response]
+
+    with pytest.raises(VBBAPIError):
+        get_departures("900110011")
+    assert get_departures("900110011") == []
+    assert mock_get.call_count == 2
+
+
+def _departure_payload(minutes_until: int, trip_id: str) -> dict:
+    when = (datetime.now(timezone.utc) + timedelta(minutes=minutes_until)).isoformat()
+    return {
+        "tripId": trip_id,
+        "stop": _minimal_stop(),
+        "when": when,
+        "plannedWhen": when,
+        "delay": None,
+        "platform": "1",
+        "plannedPlatform": "1",
+        "prognosisType": None,
+        "direction": "Spandau",
+        "provenance": "Spandau",
+        "line": {
+            "type": "line",
+            "id": "s41",
+            "fahrtNr": "12345",
+            "name": "S41",
+            "public": True,
+            "adminCode": "80____",
+            "productName": "S",
+            "mode": "train",
+            "product": "suburban",
+        },
+        "remarks": [],
+        "origin": None,
+        "destination": None,
+    }
+
+
+@patch("src.vbb_api.session.get")
+def test_circuit_opens_and_fails_fast(mock_get):
+    mock_get.side_effect = requests.ConnectionError("connection refused")
+    for _ in range(3):
+        with pytest.raises(VBBAPIError):
+            get_departures("900110011")
+
+    with pytest.raises(VBBAPIError) as exc_info:
+        get_departures("900110011")
+
+    assert exc_info.value.kind == "circuit_open"
+    assert exc_info.value.summary == "VBB unavailable (circuit open)"
+    assert mock_get.call_count == 3 * MAX_ATTEMPTS
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_with_fallback_serves_last_good_without_departed_trains(mock_get):
+    mock_response = Mock()
+    mock_response.content = json.dumps(
+        {"departures": [_departure_payload(-2, "departed"), _departure_payload(10, "upcoming")]}
+    ).encode()
+    mock_get.return_value = mock_response
+    fresh = get_departures_with_fallback("900110011")
+    assert not fresh.stale
+    assert len(fresh.departures) == 2
+
+    _departure_cache.clear()
+    mock_get.side_effect = requests.ReadTimeout("read timed out")
+    fallback = get_departures_with_fallback("900110011")
+
+    assert fallback.stale
+    assert fallback.fetched_at == fresh.fetched_at
+    assert [d.tripId for d in fallback.departures] == ["upcoming"]
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_with_fallback_raises_without_last_good(mock_get):
+    mock_get.side_effect = requests.ReadTimeout("read timed out")
+    with pytest.raises(VBBAPIError) as exc_info:
+        get_departures_with_fallback("900110011")
+    assert exc_info.value.kind == "timeout"
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_retries_transient_errors(mock_get, no_backoff_sleep):
+    mock_response = Mock()
+    mock_response.content = json.dumps({"departures": []}).encode()
+    mock_get.side_effect = [
+        requests.HTTPError("503", response=Mock(status_code=503)),
+        requests.ConnectionError("connection reset"),
+        mock_response,
+    ]
+
+    assert get_departures("900110011") == []
+    assert mock_get.call_count == 3
+    assert [c.args[0] for c in no_backoff_sleep.call_args_list] == [0.0, 1.0]
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_does_not_retry_client_errors(mock_get):
+    mock_get.side_effect = requests.HTTPError("404", response=Mock(status_code=404))
+
+    with pytest.raises(VBBAPIError) as exc_info:
+        get_departures("900110011")
+
+    assert exc_info.value.kind == "http_404"
+    assert mock_get.call_count == 1
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_splits_deadline_between_attempts(mock_get):
+    mock_get.side_effect = requests.ReadTimeout("read timed out")
+
+    with pytest.raises(VBBAPIError):
+        get_departures("900110011", deadline_s=8)
+
+    first_timeout = mock_get.call_args_list[0].kwargs["timeout"]
+    assert first_timeout == pytest.approx(2.0, abs=0.01)
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_raises_deadline_exceeded_when_no_attempt_fits(mock_get):
+    with pytest.raises(VBBAPIError) as exc_info:
+        get_departures("900110011", deadline_s=0.1)
+
+    assert exc_info.value.kind == "deadline_exceeded"
+    assert exc_info.value.summary == "VBB too slow (deadline exceeded)"
+    mock_get.assert_not_called()
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_stops_retrying_when_budget_cannot_fit_backoff(mock_get, no_backoff_sleep):
+    mock_get.side_effect = requests.HTTPError("503", response=Mock(status_code=503))
+    fake_now = [0.0]
+    no_backoff_sleep.side_effect = lambda seconds: fake_now.__setitem__(0, fake_now[0] + seconds)
+
+    with patch("src.deadline.time.monotonic", side_effect=lambda: fake_now[0]):
+        with pytest.raises(VBBAPIError) as exc_info:
+            get_departures("900110011", deadline_s=1.2)
+
+    # attempt 1, attempt 2 (no pause), then a 1.0 s backoff would leave < 0.5 s for attempt 3
+    assert mock_get.call_count == 2
+    assert exc_info.value.kind == "deadline_exceeded"
+
+
+def test_stop_table_matches_reference_ranking():
+    for lat, lon in [(52.5219, 13.4132), (52.552045, 13.399863), (52.4, 13.05), (53.5, 10.0)]:
+        expected = _rank_stops_by_distance(_all_stations(), lat, lon, MAX_NEARBY_STATIONS, 1500)
+        ranked = _stop_table().nearest(lat, lon, MAX_NEARBY_STATIONS, 1500)
+        assert [(round(m), stop["id"]) for m, stop in ranked] == [(round(m), stop["id"]) for m, stop in expected]
+
+
+def _schema_payload(**overrides) -> dict:
+    departure = {
+        "tripId": "1|123|0|80|1012025",
+        "stop": _minimal_stop(),
+        "when": "2025-01-09T12:30:00+01:00",
+        "plannedWhen": "2025-01-09T12:30:00+01:00",
+        "delay": None,
+        "platform": "1",
+        "plannedPlatform": "1",
+        "prognosisType": None,
+        "direction": "Spandau",
+        "provenance": "via Friedrichstraße",
+        "line": {
+            "type": "line",
+            "id": "s41",
+            "fahrtNr": "12345",
+            "name": "S41",
+            "public": True,
+            "adminCode": "80____",
+            "productName": "S",
+            "mode": "train",
+            "product": "suburban",
+        },
+        "remarks": [],
+        "origin": None,
+        "destination": None,
+        **overrides,
+    }
+    return {"departures": [departure]}
+
+
+@pytest.mark.parametrize("decoder", ["json", "pydantic"])
+def test_decode_departures_with_each_decoder(decoder):
+    body = json.dumps(_schema_payload()).encode()
+    with patch("src.vbb_api.config", {"vbb_decoder": decoder, "lazy_departures": False}):
+        (departure,) = decode_departures(body)
+
+    assert departure.line.name == "S41"
+    assert departure.stop.name == "S+U Alexanderplatz"
+
+
+def test_pydantic_decoder_ignores_added_fields():
+    payload = _schema_payload()
+    payload["departures"][0]["line"]["newField"] = 1
+    body = json.dumps(payload).encode()
+
+    with patch("src.vbb_api.config", {"vbb_decoder": "json", "lazy_departures": False}):
+        with pytest.raises(VBBAPIError, match="newField"):
+            decode_departures(body)
+    with patch("src.vbb_api.config", {"vbb_decoder": "pydantic", "lazy_departures": False}):
+        assert decode_departures(body)[0].line.name == "S41"
+
+
+@pytest.mark.parametrize("decoder", ["json", "pydantic"])
+@patch("src.vbb_api.metrics")
+def test_decode_departures_classifies_schema_drift(mock_metrics, decoder):
+    body = json.dumps(_schema_payload(line={"type": "line", "id": "s41"})).encode()
+    with patch("src.vbb_api.config", {"vbb_decoder": decoder, "lazy_departures": False}):
+        with pytest.raises(VBBAPIError) as exc_info:
+            decode_departures(body)
+
+    assert exc_info.value.kind == "schema"
+    assert exc_info.value.summary == "VBB response format changed"
+    mock_metrics.increment.assert_called_once_with("vbb.schema_error", tags={"decoder": decoder})
+
+
+@pytest.mark.parametrize("app_config", [{}, {"lazy_departures": True}])
+def test_json_decoder_catches_nested_drift_even_with_lazy_departures(app_config):
+    line = _schema_payload()["departures"][0]["line"]
+    del line["fahrtNr"]
+    body = json.dumps(_schema_payload(line=line)).encode()
+
+    with patch("src.vbb_api.config", app_config):
+        with pytest.raises(VBBAPIError) as exc_info:
+            decode_departures(body)
+    assert exc_info.value.kind == "schema"
+
+
+@patch("src.vbb_api.session.get")
+def test_get_departures_schema_error_does_not_open_circuit(mock_get):
+    mock_get.return_value = Mock(content=b'{"departures": [{"tripId": "x"}]}')
+
+    for _ in range(5):
+        with pytest.raises(VBBAPIError) as exc_info:
+            get_departures("900110011")
+        assert exc_info.value.kind == "schema"
+
+    assert mock_get.call_count == 5
+    assert circuit_breaker.allow()
@@ -0,0 +1,269 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from src.vbb_api import VBBAPIError
+from src.vbb_api import _departure_cache
+from src.vbb_api import _last_good
+from src.vbb_api import circuit_breaker
+from src.vbb_async import AsyncVBBClient
+from src.vbb_async import _classify_aiohttp_exception
+from src.vbb_async import _query_params
+
+DEPARTURES_PAYLOAD = {
+    "departures": [
+        {
+            "tripId": "1|123|0|80|1012025",
+            "stop": None,
+            "when": "2025-01-09T12:30:00+01:00",
+            "plannedWhen": "2025-01-09T12:30:00+01:00",
+            "delay": None,
+            "platform": "1",
+            "plannedPlatform": "1",
+            "prognosisType": None,
+            "direction": "Spandau",
+            "provenance": "via Friedrichstraße",
+            "line": {
+                "type": "line",
+                "id": "s41",
+                "fahrtNr": "12345",
+                "name": "S41",
+                "public": True,
+                "adminCode": "80____",
+                "productName": "S",
+                "mode": "train",
+                "product": "suburban",
+            },
+            "remarks": [],
+            "origin": None,
+            "destination": None,
+        }
+    ]
+}
+
+
+class FakeResponse:
+    def __init__(self, payload: dict | None = None, status: int = 200, delay_s: float = 0) -> None:
+        self.payload = payload
+        self.status = status
+        self.delay_s = delay_s
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay_s)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(request_info=Mock(), history=(), status=self.status)
+
+    async def read(self) -> bytes:
+        return json.dumps(self.payload).encode()
+
+
+class FakeSession:
+    def __init__(self, responses: dict[str, FakeResponse | Exception]) -> None:
+        self.responses = responses
+        self.calls: list[tuple[str, dict]] = []
+
+    def get(self, url: str, params: dict):
+        self.calls.append((url, params))
+        station_id = url.split("/")[-2]
+        response = self.responses[station_id]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture(autouse=True)
+def clear_vbb_state():
+    _departure_cache.clear()
+    _last_good.clear()
+    circuit_breaker.reset()
+    yield
+    _departure_cache.clear()
+    _last_good.clear()
+    circuit_breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff():
+    with patch("src.vbb_api.backoff_s", return_value=0.0):
+        yield
+
+
+def _client_with(session: FakeSession, stop_timeout_s: float = 1) -> AsyncVBBClient:
+    client = AsyncVBBClient("http://vbb.test", max_connections=4, stop_timeout_s=stop_timeout_s)
+    client._get_session = AsyncMock(return_value=session)
+    return client
+
+
+def test_get_departures_parses_payload():
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD)})
+    departures = asyncio.run(_client_with(session).get_departures("900110011"))
+
+    assert [d.line.name for d in departures] == ["S41"]
+    url, params = session.calls[0]
+    assert url == "http://vbb.test/stops/900110011/departures"
+    assert params["linesOfStops"] == "False"
+
+
+def test_get_departures_uses_shared_cache():
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD)})
+    client = _client_with(session)
+
+    asyncio.run(client.get_departures("900110011"))
+    asyncio.run(client.get_departures("900110011"))
+
+    assert len(session.calls) == 1
+
+
+@pytest.mark.parametrize(
+    ("response", "expected_kind", "expected_status"),
+    [
+        (FakeResponse(status=503), "http_503", 503),
+        (aiohttp.ClientConnectionError("refused"), "connection", None),
+        (FakeResponse(DEPARTURES_PAYLOAD, delay_s=0.5), "timeout", None),
+    ],
+)
+def test_get_departures_classifies_errors(response, expected_kind, expected_status):
+    client = _client_with(FakeSession({"900110011": response}), stop_timeout_s=0.05)
+
+    with pytest.raises(VBBAPIError) as exc_info:
+        asyncio.run(client.get_departures("900110011"))
+
+    assert exc_info.value.kind == expected_kind
+    assert exc_info.value.http_status == expected_status
+
+
+def test_get_departures_many_returns_errors_in_place():
+    session = FakeSession(
+        {"900110011": FakeResponse(DEPARTURES_PAYLOAD), "900100003": FakeResponse(status=502)},
+    )
+    results = asyncio.run(_client_with(session).get_departures_many(["900110011", "900100003"]))
+
+    assert len(results[0]) == 1
+    assert isinstance(results[1], VBBAPIError)
+    assert results[1].kind == "http_502"
+
+
+def test_concurrent_misses_for_one_stop_share_one_request():
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD, delay_s=0.05)})
+    client = _client_with(session)
+
+    async def fetch_twice():
+        return await asyncio.gather(client.get_departures("900110011"), client.get_departures("900110011"))
+
+    first, second = asyncio.run(fetch_twice())
+
+    assert len(session.calls) == 1
+    assert first is second
+    assert client._in_flight == {}
+
+
+def test_waiter_gives_up_at_its_own_deadline_without_cancelling_the_load():
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD, delay_s=0.7)})
+    client = _client_with(session, stop_timeout_s=5)
+
+    async def impatient_waiter():
+        leader = asyncio.ensure_future(client.get_departures("900110011", deadline_s=5))
+        await asyncio.sleep(0)
+        with pytest.raises(VBBAPIError) as exc_info:
+            await client.get_departures("900110011", deadline_s=0.1)
+        return exc_info.value, await leader
+
+    error, departures = asyncio.run(impatient_waiter())
+
+    assert error.kind == "deadline_exceeded"
+    assert len(departures) == 1
+    assert len(session.calls) == 1
+
+
+def test_fetch_gives_up_on_a_wedged_loop():
+    client = AsyncVBBClient("http://vbb.test", max_connections=4, stop_timeout_s=1)
+    client.wedged_loop_slack_s = 0.1
+    blocked = asyncio.Event()
+    client.get_departures = lambda station_id, deadline_s: blocked.wait()
+    try:
+        with pytest.raises(VBBAPIError) as exc_info:
+            client.fetch("900110011", deadline_s=0.1)
+    finally:
+        client.close()
+    assert exc_info.value.kind == "deadline_exceeded"
+
+
+def test_fetch_many_runs_on_loop_thread():
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD)})
+    client = _client_with(session)
+    try:
+        results = client.fetch_many(["900110011"])
+    finally:
+        client.close()
+    assert results[0][0].tripId == "1|123|0|80|1012025"
+
+
+def test_classify_unknown_error():
+    assert _classify_aiohttp_exception(aiohttp.ClientPayloadError("bad body")) == ("unknown", None)
+
+
+def test_query_params_stringifies_like_requests():
+    assert _query_params({"duration": 30, "remarks": False}) == {"duration": "30", "remarks": "False"}
+
+
+@patch("src.vbb_async.metrics")
+def test_cache_outcomes_reported(mock_metrics):
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD)})
+    client = _client_with(session)
+    asyncio.run(client.get_departures("900110011"))
+    asyncio.run(client.get_departures("900110011"))
+    assert [c.args[0] for c in mock_metrics.increment.call_args_list] == [
+        "departure_cache.miss",
+        "departure_cache.hit",
+    ]
+
+
+@patch("src.vbb_async.metrics")
+def test_coalesced_misses_reported(mock_metrics):
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD, delay_s=0.05)})
+    client = _client_with(session)
+
+    async def fetch_twice():
+        await asyncio.gather(client.get_departures("900110011"), client.get_departures("900110011"))
+
+    asyncio.run(fetch_twice())
+    assert [c.args[0] for c in mock_metrics.increment.call_args_list] == [
+        "departure_cache.miss",
+        "departure_cache.coalesced",
+    ]
+
+
+def test_get_departures_retries_until_success():
+    class FlakySession(FakeSession):
+        def get(self, url: str, params: dict):
+            self.calls.append((url, params))
+            if len(self.calls) == 1:
+                return FakeResponse(status=503)
+            return FakeResponse(DEPARTURES_PAYLOAD)
+
+    session = FlakySession({})
+    departures = asyncio.run(_client_with(session).get_departures("900110011"))
+
+    assert len(departures) == 1
+    assert len(session.calls) == 2
+
+
+def test_get_departures_deadline_exceeded():
+    session = FakeSession({"900110011": FakeResponse(DEPARTURES_PAYLOAD, delay_s=5)})
+    client = _client_with(session, stop_timeout_s=5)
+
+    with pytest.raises(VBBAPIError) as exc_info:
+        asyncio.run(client.get_departures("900110011", deadline_s=0.6))
+
+    assert exc_info.value.kind == "deadline_exceeded"
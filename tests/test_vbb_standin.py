@@ -0,0 +1,203 @@
+import time
+from datetime import datetime
+from datetime import timedelta
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from scripts.vbb_standin import RECORDINGS_DIR
+from scripts.vbb_standin import Recordings
+from scripts.vbb_standin import create_app
+from scripts.vbb_standin import nearby_from_snapshot
+from scripts.vbb_standin import parse_error_rates
+from scripts.vbb_standin import parse_latency
+from scripts.vbb_standin import pick_error
+from scripts.vbb_standin import relabel_stop
+from scripts.vbb_standin import shift_times
+from src.vbb_api import VBBAPIError
+from src.vbb_api import _departure_cache
+from src.vbb_api import _last_good
+from src.vbb_api import circuit_breaker
+from src.vbb_api import get_departures
+
+RECORDED_STOP = "900110011"
+OTHER_STOP = {"type": "stop", "id": "900100003", "name": "S+U Alexanderplatz"}
+
+
+class StandinAdapter(BaseAdapter):
+    """Sends `requests` calls to the stand-in's Flask test client; a slow answer raises ReadTimeout."""
+
+    def __init__(self, app) -> None:
+        super().__init__()
+        self.client = app.test_client()
+
+    def send(self, request, timeout=None, **kwargs):
+        url = urlsplit(request.url)
+        started = time.monotonic()
+        answer = self.client.get(url.path, query_string=url.query)
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise requests.ReadTimeout(f"stand-in took longer than {timeout}s", request=request)
+        response = requests.Response()
+        response.status_code = answer.status_code
+        response._content = answer.data
+        response.headers.update(answer.headers)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clear_vbb_state():
+    _departure_cache.clear()
+    _last_good.clear()
+    circuit_breaker.reset()
+    yield
+    _departure_cache.clear()
+    _last_good.clear()
+    circuit_breaker.reset()
+
+
+def _standin(error_rates: dict[str, float], hang_s: float = 30.0, strict: bool = False):
+    return create_app(
+        Recordings(RECORDINGS_DIR),
+        [{**OTHER_STOP}],
+        latency=parse_latency("0"),
+        error_rates=error_rates,
+        hang_s=hang_s,
+        strict=strict,
+    )
+
+
+def _session_for(app) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", StandinAdapter(app))
+    return session
+
+
+def test_shift_times_moves_timestamps_only():
+    payload = {
+        "departures": [
+            {"when": "2026-03-24T09:01:00+01:00", "plannedWhen": "2026-03-24T09:00:00+01:00", "delay": 60},
+            {"when": None, "plannedWhen": "2026-03-24T09:05:00+01:00", "delay": None},
+        ],
+        "realtimeDataUpdatedAt": 1000,
+    }
+
+    shifted = shift_times(payload, timedelta(hours=2))
+
+    assert shifted["departures"][0]["when"] == "2026-03-24T11:01:00+01:00"
+    assert shifted["departures"][0]["plannedWhen"] == "2026-03-24T11:00:00+01:00"
+    assert shifted["departures"][0]["delay"] == 60
+    assert shifted["departures"][1]["when"] is None
+    assert shifted["realtimeDataUpdatedAt"] == 1000 + 7200
+    assert payload["departures"][0]["when"] == "2026-03-24T09:01:00+01:00"
+
+
+def test_served_recording_looks_like_now():
+    response = _standin({}).test_client().get(f"/stops/{RECORDED_STOP}/departures")
+
+    first = datetime.fromisoformat(response.get_json()["departures"][0]["when"])
+    assert abs(first - datetime.now(first.tzinfo)) < timedelta(minutes=5)
+
+
+@pytest.mark.parametrize(
+    ("spec", "expected_s"),
+    [("0", 0.0), ("none", 0.0), ("const:150", 0.15), ("uniform:200,200", 0.2)],
+)
+def test_parse_latency(spec, expected_s):
+    assert parse_latency(spec)() == pytest.approx(expected_s)
+
+
+@pytest.mark.parametrize("spec", ["const", "const:1,2", "gamma:1,2"])
+def test_parse_latency_rejects_unknown_specs(spec):
+    with pytest.raises(ValueError):
+        parse_latency(spec)
+
+
+def test_parse_error_rates():
+    assert parse_error_rates(["503=0.05", "timeout=0.01"]) == {"503": 0.05, "timeout": 0.01}
+
+
+@pytest.mark.parametrize("specs", [["418=0.1"], ["503=0.6", "500=0.5"]])
+def test_parse_error_rates_rejects_bad_specs(specs):
+    with pytest.raises(ValueError):
+        parse_error_rates(specs)
+
+
+@pytest.mark.parametrize(("roll", "expected"), [(0.0, "503"), (0.04, "503"), (0.05, "timeout"), (0.07, None)])
+def test_pick_error_stacks_rates(roll, expected):
+    assert pick_error({"503": 0.05, "timeout": 0.01}, roll) == expected
+
+
+def test_nearby_from_snapshot_ranks_stops_within_distance():
+    stops = [
+        {"id": "far", "location": {"latitude": 52.5300, "longitude": 13.4000}},
+        {"id": "near", "location": {"latitude": 52.5209, "longitude": 13.4000}},
+        {"id": "next", "location": {"latitude": 52.5230, "longitude": 13.4000}},
+    ]
+
+    nearby = nearby_from_snapshot(stops, 52.5200, 13.4000, results=5, distance_m=500)
+
+    assert [(stop["id"], stop["distance"]) for stop in nearby] == [("near", 100), ("next", 334)]
+
+
+def test_unrecorded_stop_borrows_and_relabels_a_recording():
+    client = _standin({}).test_client()
+
+    response = client.get(f"/stops/{OTHER_STOP['id']}/departures")
+
+    departures = response.get_json()["departures"]
+    assert departures
+    assert {d["stop"]["id"] for d in departures} == {OTHER_STOP["id"]}
+    assert client.get("/__standin/stats").get_json()["borrowed"] == 1
+
+
+def test_strict_standin_404s_unrecorded_stops():
+    response = _standin({}, strict=True).test_client().get(f"/stops/{OTHER_STOP['id']}/departures")
+    assert response.status_code == 404
+
+
+def test_relabel_without_snapshot_entry_keeps_payload():
+    payload = {"departures": [{"stop": {"id": RECORDED_STOP}}]}
+    assert relabel_stop(payload, None) is payload
+
+
+@pytest.mark.parametrize(("injected", "expected_kind"), [("503", "http_503"), ("timeout", "timeout")])
+def test_vbb_api_retries_injected_errors(injected, expected_kind):
+    app = _standin({injected: 0.5}, hang_s=0.3)
+    with (
+        patch("scripts.vbb_standin.random") as mock_random,
+        patch("src.vbb_api.session", _session_for(app)),
+        patch("src.vbb_api.TIMEOUT", 0.1),
+        patch("src.vbb_api.backoff_s", return_value=0.0),
+        patch("src.vbb_api.logger") as mock_logger,
+    ):
+        mock_random.random.side_effect = [0.1, 0.9]
+        departures = get_departures(RECORDED_STOP, deadline_s=5)
+
+    assert departures
+    (message, attempt, _, kind, _), _ = mock_logger.debug.call_args
+    assert "failed" in message
+    assert (attempt, kind) == (1, expected_kind)
+    stats = app.test_client().get("/__standin/stats").get_json()
+    assert stats["requests.departures"] == 2
+    assert stats[f"injected.{injected}"] == 1
+
+
+def test_vbb_api_classifies_persistent_injected_errors():
+    app = _standin({"502": 1.0})
+    with (
+        patch("src.vbb_api.session", _session_for(app)),
+        patch("src.vbb_api.backoff_s", return_value=0.0),
+        pytest.raises(VBBAPIError) as exc_info,
+    ):
+        get_departures(RECORDED_STOP, deadline_s=5)
+
+    assert exc_info.value.kind == "http_502"
+    assert app.test_client().get("/__standin/stats").get_json()["injected.502"] == 4
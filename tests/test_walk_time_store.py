@@ -0,0 +1,90 @@
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from src.walk_time_store import DistanceMatrixClient
+from src.walk_time_store import StubWalkClient
+from src.walk_time_store import WalkTimeStore
+from src.walk_time_store import cell_centre
+from src.walk_time_store import origin_cell
+from src.walk_time_store import walk_time_client
+
+CELL = origin_cell((52.5219, 13.4132))
+
+
+def test_points_in_one_cell_share_its_centre():
+    assert origin_cell((52.52191, 13.41318)) == CELL != origin_cell((52.5241, 13.4132))
+    assert cell_centre(CELL) == (52.521, 13.413)
+
+
+def test_store_returns_only_requested_unexpired_stops_of_the_cell(tmp_path):
+    clock = Mock(return_value=1000.0)
+    store = WalkTimeStore(tmp_path / "walk_times.sqlite3", ttl_s=60, clock=clock)
+    store.put_many(CELL, {"a": 4, "b": 9})
+    store.put_many((0, 0), {"c": 1})
+
+    assert store.get_many(CELL, ["a", "c", "x"]) == {"a": 4}
+    clock.return_value = 1061.0
+    assert store.get_many(CELL, ["a", "b"]) == {}
+
+
+def test_store_persists_across_instances(tmp_path):
+    path = tmp_path / "cache" / "walk_times.sqlite3"
+    WalkTimeStore(path).put_many(CELL, {"a": 4})
+    assert WalkTimeStore(path).get_many(CELL, ["a"]) == {"a": 4}
+
+
+def test_rows_of_another_grid_are_not_read(tmp_path):
+    path = tmp_path / "walk_times.sqlite3"
+    WalkTimeStore(path, grid_deg=0.002).put_many(CELL, {"a": 4})
+    assert WalkTimeStore(path, grid_deg=0.001).get_many(CELL, ["a"]) == {}
+
+
+def test_oldest_rows_are_pruned_beyond_the_cap():
+    clock = Mock(return_value=0.0)
+    store = WalkTimeStore(max_entries=2, clock=clock)
+    for second, station_id in enumerate("abc"):
+        clock.return_value = float(second)
+        store.put_many(CELL, {station_id: 5})
+
+    assert len(store) == 2
+    assert store.get_many(CELL, ["a", "b", "c"]) == {"b": 5, "c": 5}
+
+
+def test_unreadable_store_is_treated_as_empty(tmp_path, caplog):
+    path = tmp_path / "walk_times.sqlite3"
+    path.write_text("not a database")
+    store = WalkTimeStore(path)
+
+    assert store.get_many(CELL, ["a"]) == {}
+    store.put_many(CELL, {"a": 4})
+    assert "Could not write walk-time store" in caplog.text
+
+
+def test_distance_matrix_batches_25_destinations_per_request():
+    destinations = [(52.5 + i / 1000, 13.4) for i in range(30)]
+
+    def distance_matrix(origins, destinations, mode):
+        elements = [{"status": "OK", "duration": {"value": 61}} for _ in destinations]
+        elements[-1] = {"status": "ZERO_RESULTS"}
+        return {"rows": [{"elements": elements}]}
+
+    with patch("src.walk_time_store.gmaps_client") as gmaps:
+        gmaps.get.return_value.distance_matrix.side_effect = distance_matrix
+        minutes = DistanceMatrixClient().walk_minutes((52.521, 13.413), destinations)
+
+    calls = gmaps.get.return_value.distance_matrix.call_args_list
+    assert [len(call.kwargs["destinations"]) for call in calls] == [25, 5]
+    assert calls[0].kwargs["origins"] == [(52.521, 13.413)] and calls[0].kwargs["mode"] == "walking"
+    assert minutes.count(None) == 2 and minutes[0] == 2 and len(minutes) == 30
+
+
+def test_stub_client_estimates_from_straight_line_distance():
+    # ~1 km north: 1.3 km at 80 m/min.
+    assert StubWalkClient().walk_minutes((52.5, 13.4), [(52.509, 13.4), (52.5, 13.4)]) == [17, 0]
+
+
+@pytest.mark.parametrize("name,expected", [("stub", StubWalkClient), ("google", DistanceMatrixClient)])
+def test_walk_time_client_by_config_name(name, expected):
+    assert isinstance(walk_time_client(name), expected)
@@ -0,0 +1,60 @@
+import contextvars
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from src.worker_pool import BoundedExecutor
+
+
+@pytest.fixture
+def pool():
+    executor = BoundedExecutor(max_workers=2, max_queue=1, metrics=Mock(), name="test_pool")
+    yield executor
+    executor.shutdown()
+
+
+def test_map_preserves_input_order(pool):
+    assert pool.map(lambda x: x * 2, [3, 1, 2]) == [6, 2, 4]
+
+
+def test_map_reraises_task_error(pool):
+    def _fail(x):
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        pool.map(_fail, [1])
+
+
+def test_runs_inline_when_queue_full(pool):
+    release = threading.Event()
+    blocked = [pool.submit(release.wait, 5) for _ in range(3)]
+
+    caller = threading.get_ident()
+    overflow = pool.submit(threading.get_ident)
+
+    assert overflow.result() == caller
+    pool._metrics.increment.assert_called_once_with("test_pool.caller_runs")
+    release.set()
+    assert all(f.result(5) for f in blocked)
+
+
+def test_capacity_released_after_tasks_finish(pool):
+    for _ in range(5):
+        pool.map(lambda x: x, [1, 2, 3])
+    assert pool._capacity.acquire(blocking=False)
+    pool._capacity.release()
+    assert pool.active == 0
+
+
+def test_reports_queue_wait_and_utilisation(pool):
+    pool.submit(lambda: None).result(5)
+    pool._metrics.timing.assert_called_once()
+    assert pool._metrics.timing.call_args.args[0] == "test_pool.queue_wait_ms"
+    pool._metrics.gauge.assert_called_once_with("test_pool.utilisation", 0.5)
+
+
+def test_tasks_see_submitter_context(pool):
+    request_var = contextvars.ContextVar("request_var", default=None)
+    request_var.set("request-1")
+    assert pool.submit(request_var.get).result(timeout=1) == "request-1"